@@ -1,7 +1,10 @@
 import pandas as pd
-import sqlite3
 import json
 from difflib import SequenceMatcher
+from excel_loader import read_sheet, find_data_start, table_from_sheet
+from master_db import PURCHASE_STANDARD_SCHEMA, GSTR2B_STANDARD_SCHEMA
+from bulk_loader import connect, bulk_load
+from reconciliation_engine import add_match_keys
 
 class AutoMappingTool:
     def __init__(self):
@@ -36,15 +39,8 @@ class AutoMappingTool:
             'itc_availability': ['itc', 'availability']
         }
     
-    def find_main_table(self, file_path):
-        df = pd.read_excel(file_path)
-        for i in range(len(df)):
-            test_df = pd.read_excel(file_path, skiprows=i)
-            if len(test_df.columns) >= 5:
-                non_null_count = test_df.iloc[0].count() if not test_df.empty else 0
-                if non_null_count >= 5:
-                    return i
-        return 0
+    def find_main_table(self, sheet):
+        return find_data_start(sheet)
     
     def similarity(self, a, b):
         return SequenceMatcher(None, a.lower(), b.lower()).ratio()
@@ -68,8 +64,9 @@ class AutoMappingTool:
         return mapping
     
     def process_excel(self, file_path, db_type):
-        skip_rows = self.find_main_table(file_path)
-        df = pd.read_excel(file_path, skiprows=skip_rows)
+        sheet = read_sheet(file_path)
+        skip_rows = self.find_main_table(sheet)
+        df = table_from_sheet(sheet, skip_rows)
         df = df.dropna(how='all')
         
         keywords = self.purchase_keywords if db_type == 'purchase' else self.gstr2b_keywords
@@ -83,9 +80,13 @@ class AutoMappingTool:
             else:
                 mapped_df[std_col] = None
         
-        # Save to database
-        conn = sqlite3.connect(f'{db_type}_standard.db')
-        mapped_df.to_sql(f'{db_type}_data', conn, if_exists='replace', index=False)
+        # Canonical matching keys, computed once per row at load time
+        add_match_keys(mapped_df, 'gstin' if db_type == 'purchase' else 'supplier_gstin')
+        
+        # Save to database with the declared column types
+        schema = PURCHASE_STANDARD_SCHEMA if db_type == 'purchase' else GSTR2B_STANDARD_SCHEMA
+        conn = connect(f'{db_type}_standard.db')
+        bulk_load(conn, f'{db_type}_data', [mapped_df], schema)
         conn.close()
         
         # Save mapping
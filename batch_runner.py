@@ -0,0 +1,117 @@
+import os
+import sys
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+import pandas as pd
+from final_report_generator import write_comprehensive_report
+
+EXCEL_EXTENSIONS = ('.xlsx', '.xls')
+
+# Upper bound on worker processes; each holds one client's registers in memory
+MAX_WORKERS = 4
+
+SUMMARY_CATEGORIES = ['Matched', 'Probable Match', 'Mismatched', 'Not in GSTR2B', 'Not in Books']
+
+
+def find_register(folder, marker):
+    """First Excel file in folder whose name contains marker (case-insensitive)"""
+    for name in sorted(os.listdir(folder)):
+        lower = name.lower()
+        if marker in lower and lower.endswith(EXCEL_EXTENSIONS) and not name.startswith('~$'):
+            return os.path.join(folder, name)
+    return None
+
+
+def client_folders(root):
+    """Client sub-folders of root, in name order"""
+    return [os.path.join(root, name) for name in sorted(os.listdir(root))
+            if os.path.isdir(os.path.join(root, name)) and not name.startswith('.')]
+
+
+def run_client(folder):
+    """Reconcile one client folder; never raises, returns a status row"""
+    started = time.time()
+    status = {'Client': os.path.basename(folder), 'Status': 'Failed', 'Report': '', 'Error': ''}
+    try:
+        purchase_file = find_register(folder, 'purchase')
+        gstr2b_file = find_register(folder, '2b')
+        if not purchase_file or not gstr2b_file:
+            raise FileNotFoundError('purchase and GSTR2B workbooks are both required')
+
+        filename, counts = write_comprehensive_report(purchase_file, gstr2b_file, output_dir=folder)
+        status.update(counts)
+        status.update({'Status': 'OK', 'Report': filename})
+    except Exception as e:
+        status['Error'] = f"{type(e).__name__}: {e}"
+        status['Traceback'] = traceback.format_exc()
+    status['Seconds'] = round(time.time() - started, 2)
+    return status
+
+
+def worker_died(folder, started, error):
+    """Status row for a client whose worker process died under it"""
+    return {'Client': os.path.basename(folder), 'Status': 'Failed', 'Report': '',
+            'Error': f"Worker process died: {error}", 'Seconds': round(time.time() - started, 2)}
+
+
+def run_batch(root, workers=None):
+    """Reconcile every client folder under root in one pool of worker processes.
+
+    At most workers clients are in flight at a time, each in a worker
+    process, so an exception only marks that client as failed. If a worker
+    process dies (out of memory, a crash in native code) the pool is
+    broken: the clients in flight are marked as failed and the clients not
+    started yet go to a fresh pool. Returns the status rows as a DataFrame
+    and writes them to a batch summary workbook in root.
+    """
+    folders = client_folders(root)
+    workers = workers or min(MAX_WORKERS, os.cpu_count() or 1, max(len(folders), 1))
+
+    rows = []
+    pending = deque(folders)
+    while pending:
+        broken = False
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            in_flight = {}
+            while in_flight or (pending and not broken):
+                # Submit only what can run now, so a broken pool takes
+                # down the running clients and nothing still waiting
+                while pending and not broken and len(in_flight) < workers:
+                    folder = pending.popleft()
+                    in_flight[executor.submit(run_client, folder)] = (folder, time.time())
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    folder, started = in_flight.pop(future)
+                    try:
+                        status = future.result()
+                    except BrokenProcessPool as e:
+                        broken = True
+                        status = worker_died(folder, started, e)
+                    icon = "✅" if status['Status'] == 'OK' else "❌"
+                    print(f"{icon} {status['Client']}: {status['Status']} {status['Error']}".rstrip())
+                    rows.append(status)
+
+    columns = ['Client', 'Status'] + SUMMARY_CATEGORIES + ['Report', 'Error', 'Seconds']
+    summary = pd.DataFrame(rows).reindex(columns=columns).sort_values('Client').reset_index(drop=True)
+
+    filename = os.path.join(root, f"Batch_Summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx")
+    with pd.ExcelWriter(filename, engine='xlsxwriter') as writer:
+        summary.to_excel(writer, sheet_name='Summary', index=False)
+        failures = [row for row in rows if row.get('Traceback')]
+        if failures:
+            pd.DataFrame(failures)[['Client', 'Traceback']].to_excel(writer, sheet_name='Errors', index=False)
+
+    print(f"\n📊 {len(summary)} clients: {(summary['Status'] == 'OK').sum()} OK, "
+          f"{(summary['Status'] != 'OK').sum()} failed")
+    print(f"✅ Batch summary saved as {filename}")
+    return summary
+
+
+if __name__ == "__main__":
+    root = sys.argv[1] if len(sys.argv) > 1 else 'clients'
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    run_batch(root, workers)
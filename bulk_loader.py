@@ -0,0 +1,141 @@
+import sqlite3
+from datetime import date, datetime
+from itertools import chain, islice
+import numpy as np
+import pandas as pd
+
+# Rows per executemany call
+BATCH_ROWS = 20000
+
+# WAL lets dashboards keep reading while a load runs; with WAL, NORMAL sync is
+# still crash-safe and avoids an fsync per commit
+LOAD_PRAGMAS = [
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-65536'
+]
+
+
+def connect(db_path):
+    """sqlite3 connection with the bulk-load pragmas applied"""
+    conn = sqlite3.connect(db_path)
+    for pragma in LOAD_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def sqlite_type(dtype):
+    """Column type for a pandas dtype that has no declared type"""
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return 'INTEGER'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'REAL'
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return 'TIMESTAMP'
+    return 'TEXT'
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def create_table(conn, table, schema):
+    """(Re)create table with the given column -> type schema"""
+    columns = ', '.join(f'{_quote(name)} {sql_type}' for name, sql_type in schema.items())
+    conn.execute(f'DROP TABLE IF EXISTS {_quote(table)}')
+    conn.execute(f'CREATE TABLE {_quote(table)} ({columns})')
+
+
+def _adapt(value):
+    # Values sqlite3 cannot bind as-is; dates are stored as text like to_sql did
+    if isinstance(value, datetime):
+        return value.isoformat(' ')
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, pd.Timedelta):
+        return str(value)
+    return value
+
+
+def column_values(series):
+    """Python values of a column ready for executemany, blanks as None"""
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        text = series.dt.strftime('%Y-%m-%d %H:%M:%S').astype(object)
+        return text.where(series.notna(), None).tolist()
+    values = series.astype(object).where(series.notna(), None).tolist()
+    if series.dtype == object:
+        values = [_adapt(value) for value in values]
+    return values
+
+
+def frame_rows(df, columns):
+    """Row tuples of df in the order of columns; columns df lacks are NULL"""
+    data = []
+    for column in columns:
+        if column in df.columns:
+            data.append(column_values(df[column]))
+        else:
+            data.append([None] * len(df))
+    return zip(*data)
+
+
+def insert_frames(conn, table, frames, names=None, batch_rows=BATCH_ROWS):
+    """Insert the rows of an iterable of DataFrames into table without committing.
+
+    names are the table columns written (default: all of them, as in
+    frame_rows). The caller owns the transaction. Returns the number of
+    rows inserted.
+    """
+    if names is None:
+        names = [row[1] for row in conn.execute(f'PRAGMA table_info({_quote(table)})')]
+    insert = (f'INSERT INTO {_quote(table)} ({", ".join(_quote(name) for name in names)}) '
+              f'VALUES ({", ".join("?" * len(names))})')
+    count = 0
+    for df in frames:
+        rows = frame_rows(df, names)
+        while True:
+            batch = list(islice(rows, batch_rows))
+            if not batch:
+                break
+            conn.executemany(insert, batch)
+        count += len(df)
+    return count
+
+
+def bulk_load(conn, table, frames, schema=None, replace=True, batch_rows=BATCH_ROWS):
+    """Write an iterable of DataFrames to table in a single transaction.
+
+    With replace=True the table is recreated: columns declared in schema
+    (column -> SQL type) come first with their declared types, followed by
+    any other column of the first frame with a type inferred from its dtype.
+    With replace=False rows are appended to the existing table's columns.
+    Rows go in through executemany in batches of batch_rows. Returns the
+    number of rows written.
+    """
+    frames = iter(frames)
+    first = next(frames, None)
+    frames = chain([first], frames) if first is not None else iter([])
+
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute('BEGIN')
+    try:
+        if replace:
+            columns = dict(schema or {})
+            if first is not None:
+                for name, dtype in first.dtypes.items():
+                    columns.setdefault(name, sqlite_type(dtype))
+            create_table(conn, table, columns)
+            names = list(columns)
+        else:
+            names = [row[1] for row in conn.execute(f'PRAGMA table_info({_quote(table)})')]
+
+        count = insert_frames(conn, table, frames, names, batch_rows)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return count
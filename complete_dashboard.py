@@ -1,163 +1,19 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import io
 from datetime import datetime
+from detailed_report import reconcile_result
+from excel_export import sheet_parts
+from streamlit_cache import uploads_handle, parsed_upload, session_results, show_result_page, workbook_download, CACHE_TTL, CACHE_ENTRIES
 
-def find_data_start(uploaded_file):
-    df = pd.read_excel(uploaded_file)
-    for i in range(len(df)):
-        test_df = pd.read_excel(uploaded_file, skiprows=i)
-        if len(test_df.columns) >= 5 and not test_df.empty:
-            if test_df.iloc[0].count() >= 5:
-                return i
-    return 0
-
-def comprehensive_reconciliation(purchase_df, gstr2b_df):
-    matched = []
-    mismatched = []
-    not_in_gstr2b = []
-    not_in_books = []
-    
-    for _, p_row in purchase_df.iterrows():
-        match_found = False
-        for _, g_row in gstr2b_df.iterrows():
-            if (str(p_row['gstin']).strip() == str(g_row['supplier_gstin']).strip() and
-                str(p_row['invoice_no']).strip() == str(g_row['invoice_no']).strip()):
-                
-                value_diff = float(p_row['taxable_value'] or 0) - float(g_row['taxable_value'] or 0)
-                igst_diff = float(p_row['igst'] or 0) - float(g_row['igst'] or 0)
-                cgst_diff = float(p_row['cgst'] or 0) - float(g_row['cgst'] or 0)
-                sgst_diff = float(p_row['sgst'] or 0) - float(g_row['sgst'] or 0)
-                cess_diff = float(p_row['cess'] or 0) - float(g_row['cess'] or 0)
-                
-                is_perfect_match = (abs(value_diff) < 0.01 and abs(igst_diff) < 0.01 and 
-                                  abs(cgst_diff) < 0.01 and abs(sgst_diff) < 0.01 and abs(cess_diff) < 0.01)
-                
-                record = {
-                    'GSTIN': p_row['gstin'],
-                    'Name of Party': p_row['party_name'],
-                    'State Name': p_row['state'],
-                    'A/C Invoice No': p_row['invoice_no'],
-                    'A/C Date': p_row['invoice_date'],
-                    'A/C Rate': p_row['rate'],
-                    'A/C Taxable Value': p_row['taxable_value'],
-                    'A/C IGST': p_row['igst'],
-                    'A/C CGST': p_row['cgst'],
-                    'A/C SGST': p_row['sgst'],
-                    'A/C CESS': p_row['cess'],
-                    'GSTR 2B Invoice No': g_row['invoice_no'],
-                    'GSTR 2B Date': g_row['invoice_date'],
-                    'GSTR 2B Rate': g_row['rate'],
-                    'GSTR 2B Taxable Value': g_row['taxable_value'],
-                    'GSTR 2B IGST': g_row['igst'],
-                    'GSTR 2B CGST': g_row['cgst'],
-                    'GSTR 2B SGST': g_row['sgst'],
-                    'GSTR 2B CESS': g_row['cess'],
-                    'Differnce Record Value': value_diff,
-                    'Differnce Record IGST': igst_diff,
-                    'Differnce Record CGST': cgst_diff,
-                    'Differnce Record SGST': sgst_diff,
-                    'Differnce Record CESS': cess_diff,
-                    'Status': 'Matched' if is_perfect_match else 'Mismatched',
-                    'Reason': 'Perfect Match' if is_perfect_match else 'Value Difference',
-                    'Accept / Reject': 'Accept' if is_perfect_match else 'Review Required',
-                    'Remark 1': '' if is_perfect_match else 'Check value differences',
-                    'ITC Claim Status': g_row.get('itc_availability', ''),
-                    'ITC Claim Month': '',
-                    'A/C Month': '',
-                    'GSTR 2B Month': '',
-                    'GSTR1 Filing Month': '',
-                    'GSTR1 Filing Date': g_row.get('filing_date', ''),
-                    'Remark 2': '',
-                    'Remark 3': '',
-                    'Eligibility For ITC Books': 'Yes',
-                    'Eligibility For ITC 2B': g_row.get('itc_availability', ''),
-                    'Section Name': '',
-                    'A/C Reverse Charge': 'No',
-                    'GSTR 2B Reverse Charge': g_row.get('reverse_charge', '')
-                }
-                
-                if is_perfect_match:
-                    matched.append(record)
-                else:
-                    mismatched.append(record)
-                
-                match_found = True
-                break
-        
-        if not match_found:
-            not_in_gstr2b.append({
-                'GSTIN': p_row['gstin'],
-                'Name of Party': p_row['party_name'],
-                'State Name': p_row['state'],
-                'A/C Invoice No': p_row['invoice_no'],
-                'A/C Date': p_row['invoice_date'],
-                'A/C Rate': p_row['rate'],
-                'A/C Taxable Value': p_row['taxable_value'],
-                'A/C IGST': p_row['igst'],
-                'A/C CGST': p_row['cgst'],
-                'A/C SGST': p_row['sgst'],
-                'A/C CESS': p_row['cess'],
-                'GSTR 2B Invoice No': '',
-                'GSTR 2B Date': '',
-                'GSTR 2B Rate': '',
-                'GSTR 2B Taxable Value': '',
-                'GSTR 2B IGST': '',
-                'GSTR 2B CGST': '',
-                'GSTR 2B SGST': '',
-                'GSTR 2B CESS': '',
-                'Status': 'Not in GSTR2B',
-                'Reason': 'Missing in GSTR2B',
-                'Accept / Reject': 'Reject',
-                'Remark 1': 'Invoice not found in GSTR2B',
-                'Eligibility For ITC Books': 'No',
-                'A/C Reverse Charge': 'No'
-            })
-    
-    for _, g_row in gstr2b_df.iterrows():
-        match_found = False
-        for _, p_row in purchase_df.iterrows():
-            if (str(p_row['gstin']).strip() == str(g_row['supplier_gstin']).strip() and
-                str(p_row['invoice_no']).strip() == str(g_row['invoice_no']).strip()):
-                match_found = True
-                break
-        
-        if not match_found:
-            not_in_books.append({
-                'GSTIN': g_row['supplier_gstin'],
-                'Name of Party': g_row['supplier_name'],
-                'State Name': '',
-                'A/C Invoice No': '',
-                'A/C Date': '',
-                'A/C Rate': '',
-                'A/C Taxable Value': '',
-                'A/C IGST': '',
-                'A/C CGST': '',
-                'A/C SGST': '',
-                'A/C CESS': '',
-                'GSTR 2B Invoice No': g_row['invoice_no'],
-                'GSTR 2B Date': g_row['invoice_date'],
-                'GSTR 2B Rate': g_row['rate'],
-                'GSTR 2B Taxable Value': g_row['taxable_value'],
-                'GSTR 2B IGST': g_row['igst'],
-                'GSTR 2B CGST': g_row['cgst'],
-                'GSTR 2B SGST': g_row['sgst'],
-                'GSTR 2B CESS': g_row['cess'],
-                'Status': 'Not in Books',
-                'Reason': 'Missing in Purchase Books',
-                'Accept / Reject': 'Review Required',
-                'Remark 1': 'Invoice not found in books',
-                'ITC Claim Status': g_row.get('itc_availability', ''),
-                'GSTR 2B Reverse Charge': g_row.get('reverse_charge', '')
-            })
-    
-    return {
-        'matched': pd.DataFrame(matched),
-        'mismatched': pd.DataFrame(mismatched),
-        'not_in_gstr2b': pd.DataFrame(not_in_gstr2b),
-        'not_in_books': pd.DataFrame(not_in_books)
-    }
+@st.cache_resource(ttl=CACHE_TTL, max_entries=CACHE_ENTRIES, show_spinner=False)
+def reconciled(handle, _purchase_file, _gstr2b_file):
+    """ReconciliationResult of an upload pair, shared across reruns (treat it as read-only)"""
+    if _purchase_file is None or _gstr2b_file is None:
+        raise LookupError("Results have expired, please process the files again")
+    purchase_df = parsed_upload(_purchase_file, 'purchase')
+    gstr2b_df = parsed_upload(_gstr2b_file, 'gstr2b')
+    return reconcile_result(purchase_df, gstr2b_df)
 
 def main():
     st.set_page_config(page_title="GST Reconciliation Dashboard", layout="wide")
@@ -177,86 +33,70 @@ def main():
         if st.button("🔄 Process & Reconcile", type="primary"):
             with st.spinner("Processing files and performing reconciliation..."):
                 try:
-                    purchase_skip = find_data_start(purchase_file)
-                    gstr2b_skip = find_data_start(gstr2b_file)
-                    
-                    purchase_df = pd.read_excel(purchase_file, skiprows=purchase_skip).dropna(how='all')
-                    gstr2b_df = pd.read_excel(gstr2b_file, skiprows=gstr2b_skip).dropna(how='all')
-                    
-                    purchase_df.columns = ['gstin', 'party_name', 'state', 'invoice_no', 'invoice_date', 
-                                          'rate', 'taxable_value', 'igst', 'cgst', 'sgst', 'cess', 'total_value']
-                    
-                    gstr2b_df.columns = ['supplier_gstin', 'supplier_name', 'invoice_no', 'invoice_type', 
-                                        'invoice_date', 'invoice_value', 'place_of_supply', 'reverse_charge',
-                                        'rate', 'taxable_value', 'igst', 'cgst', 'sgst', 'cess', 'period',
-                                        'filing_date', 'itc_availability', 'reason', 'tax_rate_percent', 
-                                        'source', 'irn_no', 'irn_date']
-                    
-                    results = comprehensive_reconciliation(purchase_df, gstr2b_df)
-                    st.session_state.results = results
+                    # Parsing and reconciliation are cached by file content, so
+                    # re-clicking with the same workbooks is instant; the session
+                    # only keeps the content handle
+                    handle = uploads_handle(purchase_file, gstr2b_file)
+                    reconciled(handle, purchase_file, gstr2b_file)
+                    st.session_state.results_handle = handle
                     st.success("✅ Reconciliation completed successfully!")
                     
                 except Exception as e:
                     st.error(f"❌ Error processing files: {str(e)}")
     
-    if 'results' in st.session_state:
-        results = st.session_state.results
-        
+    try:
+        results = session_results(reconciled, purchase_file, gstr2b_file)
+    except LookupError as e:
+        del st.session_state['results_handle']
+        st.info(str(e))
+        results = None
+    
+    if results is not None:
+        # Counts come from the result's status codes. Every tab body runs on
+        # each rerun, so the tabs derive only the page they show, and the
+        # download derives its rows block by block while writing
+        counts = {key: results.count(key) for key in results.keys()}
         col1, col2, col3, col4, col5 = st.columns(5)
         
         with col1:
-            st.metric("✅ Matched", len(results['matched']))
+            st.metric("✅ Matched", counts['matched'])
         with col2:
-            st.metric("⚠️ Mismatched", len(results['mismatched']))
+            st.metric("⚠️ Mismatched", counts['mismatched'])
         with col3:
-            st.metric("❌ Not in GSTR2B", len(results['not_in_gstr2b']))
+            st.metric("❌ Not in GSTR2B", counts['not_in_gstr2b'])
         with col4:
-            st.metric("📋 Not in Books", len(results['not_in_books']))
+            st.metric("📋 Not in Books", counts['not_in_books'])
         with col5:
-            total = len(results['matched']) + len(results['mismatched']) + len(results['not_in_gstr2b']) + len(results['not_in_books'])
+            total = sum(counts.values())
             st.metric("📊 Total Records", total)
         
         # One-click comprehensive Excel download
         st.subheader("📤 Complete Report Download")
         if st.button("🔽 Download Complete Excel Report (5 Sheets)", type="primary"):
-            output = io.BytesIO()
-            
+            # Categories over Excel's row limit continue on further sheets (Matched_2, ...)
+            categories = [('Matched', 'Matched', 'matched'), ('Mismatched', 'Mismatched', 'mismatched'),
+                          ('Not in GSTR2B', 'Not_in_GSTR2B', 'not_in_gstr2b'), ('Not in Books', 'Not_in_Books', 'not_in_books')]
             summary_data = {
-                'Category': ['Matched', 'Mismatched', 'Not in GSTR2B', 'Not in Books', 'Total'],
-                'Count': [len(results['matched']), len(results['mismatched']), len(results['not_in_gstr2b']), len(results['not_in_books']), total],
-                'Percentage': [
-                    f"{len(results['matched'])/total*100:.1f}%" if total > 0 else "0%",
-                    f"{len(results['mismatched'])/total*100:.1f}%" if total > 0 else "0%",
-                    f"{len(results['not_in_gstr2b'])/total*100:.1f}%" if total > 0 else "0%",
-                    f"{len(results['not_in_books'])/total*100:.1f}%" if total > 0 else "0%",
-                    "100%"
-                ]
+                'Category': [name for name, _, _ in categories] + ['Total'],
+                'Count': [counts[key] for _, _, key in categories] + [total],
+                'Percentage': [f"{counts[key]/total*100:.1f}%" if total > 0 else "0%" for _, _, key in categories] + ["100%"],
+                'Sheets': [', '.join(part[0] for part in sheet_parts(sheet_name, counts[key]))
+                           if counts[key] else '' for _, sheet_name, key in categories] + ['']
             }
             
-            with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                pd.DataFrame(summary_data).to_excel(writer, sheet_name='Summary', index=False)
-                
-                if not results['matched'].empty:
-                    results['matched'].to_excel(writer, sheet_name='Matched', index=False)
-                if not results['mismatched'].empty:
-                    results['mismatched'].to_excel(writer, sheet_name='Mismatched', index=False)
-                if not results['not_in_gstr2b'].empty:
-                    results['not_in_gstr2b'].to_excel(writer, sheet_name='Not_in_GSTR2B', index=False)
-                if not results['not_in_books'].empty:
-                    results['not_in_books'].to_excel(writer, sheet_name='Not_in_Books', index=False)
+            sheets = [('Summary', pd.DataFrame(summary_data))]
+            sheets += [results.export_sheet(sheet_name, key) for _, sheet_name, key in categories if counts[key]]
             
-            st.download_button(
-                label="📥 Download Complete Report",
-                data=output.getvalue(),
-                file_name=f"GST_Reconciliation_Complete_Report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            workbook_download(
+                "📥 Download Complete Report", sheets,
+                f"GST_Reconciliation_Complete_Report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
             )
         
         # Chart
         if total > 0:
             chart_data = pd.DataFrame({
                 'Category': ['Matched', 'Mismatched', 'Not in GSTR2B', 'Not in Books'],
-                'Count': [len(results['matched']), len(results['mismatched']), len(results['not_in_gstr2b']), len(results['not_in_books'])]
+                'Count': [counts['matched'], counts['mismatched'], counts['not_in_gstr2b'], counts['not_in_books']]
             })
             
             fig = px.pie(chart_data, values='Count', names='Category', 
@@ -267,30 +107,30 @@ def main():
         tab1, tab2, tab3, tab4 = st.tabs(["✅ Matched", "⚠️ Mismatched", "❌ Not in GSTR2B", "📋 Not in Books"])
         
         with tab1:
-            st.subheader(f"Matched Records ({len(results['matched'])})")
-            if not results['matched'].empty:
-                st.dataframe(results['matched'], use_container_width=True)
+            st.subheader(f"Matched Records ({counts['matched']})")
+            if counts['matched']:
+                show_result_page(results, 'matched', 'matched')
             else:
                 st.info("No perfectly matched records found")
         
         with tab2:
-            st.subheader(f"Mismatched Records ({len(results['mismatched'])})")
-            if not results['mismatched'].empty:
-                st.dataframe(results['mismatched'], use_container_width=True)
+            st.subheader(f"Mismatched Records ({counts['mismatched']})")
+            if counts['mismatched']:
+                show_result_page(results, 'mismatched', 'mismatched')
             else:
                 st.info("No mismatched records found")
         
         with tab3:
-            st.subheader(f"Not in GSTR2B ({len(results['not_in_gstr2b'])})")
-            if not results['not_in_gstr2b'].empty:
-                st.dataframe(results['not_in_gstr2b'], use_container_width=True)
+            st.subheader(f"Not in GSTR2B ({counts['not_in_gstr2b']})")
+            if counts['not_in_gstr2b']:
+                show_result_page(results, 'not_in_gstr2b', 'not_in_gstr2b')
             else:
                 st.info("All purchase records found in GSTR2B")
         
         with tab4:
-            st.subheader(f"Not in Books ({len(results['not_in_books'])})")
-            if not results['not_in_books'].empty:
-                st.dataframe(results['not_in_books'], use_container_width=True)
+            st.subheader(f"Not in Books ({counts['not_in_books']})")
+            if counts['not_in_books']:
+                show_result_page(results, 'not_in_books', 'not_in_books')
             else:
                 st.info("All GSTR2B records found in books")
 
@@ -1,60 +1,155 @@
+import json
+import os
+import queue
 import sqlite3
-import pandas as pd
-from flask import Flask, render_template, jsonify
+from flask import Flask, render_template, jsonify, request, g
+from incremental import RESULTS_DB, RESULT_TABLES
+from results_store import latest_run, run_counts, run_summary, page_run, PAGE_ROWS
 
 app = Flask(__name__)
 
-def get_reconciliation_data():
-    conn = sqlite3.connect('reconciliation_results.db')
-    
-    try:
-        matched_df = pd.read_sql_query("SELECT * FROM matched", conn)
-    except:
-        matched_df = pd.DataFrame()
-    
-    try:
-        not_in_gstr2b_df = pd.read_sql_query("SELECT * FROM not_in_gstr2b", conn)
-    except:
-        not_in_gstr2b_df = pd.DataFrame()
-    
-    try:
-        not_in_books_df = pd.read_sql_query("SELECT * FROM not_in_books", conn)
-    except:
-        not_in_books_df = pd.DataFrame()
+# Reads only: a large page cache and memory-mapped I/O instead of read() calls
+READ_PRAGMAS = [
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA cache_size=-32768',
+    'PRAGMA temp_store=MEMORY'
+]
+
+# Read-only connections shared by all requests. The development server runs
+# every request on a new thread, so connections are pooled rather than kept
+# per thread; each slot holds (connection, inode of the file it opened) or
+# (None, None) until first used
+POOL_SIZE = 4
+POOL_WAIT_SECONDS = 10
+_pool = queue.Queue()
+for _ in range(POOL_SIZE):
+    _pool.put((None, None))
+
+def open_readonly(path):
+    """Read-only sqlite3 connection to path with the READ_PRAGMAS applied, usable from any thread"""
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True, check_same_thread=False)
+    for pragma in READ_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+def get_db():
+    """A pooled results connection, checked out for the app context.
+
+    Raises sqlite3.OperationalError when the results database does not
+    exist yet or no connection frees up within POOL_WAIT_SECONDS. The
+    connection is reopened when the file is replaced.
+    """
+    if 'db' not in g:
+        try:
+            conn, opened_inode = _pool.get(timeout=POOL_WAIT_SECONDS)
+        except queue.Empty:
+            raise sqlite3.OperationalError('all database connections are busy')
+        try:
+            inode = os.stat(RESULTS_DB).st_ino
+        except OSError:
+            inode = None
+        if conn is None or opened_inode != inode:
+            if conn is not None:
+                conn.close()
+            try:
+                conn = open_readonly(RESULTS_DB)
+            except sqlite3.Error:
+                _pool.put((None, None))
+                raise
+        g.db = conn
+        g.db_inode = inode
+    return g.db
+
+@app.teardown_appcontext
+def release_db(exception):
+    # Back to the pool for the next request, without a read transaction
+    # left holding an old snapshot of the database
+    conn = g.pop('db', None)
+    if conn is not None:
+        if conn.in_transaction:
+            conn.rollback()
+        _pool.put((conn, g.pop('db_inode', None)))
+
+# Last /api/summary response, with the database file state and run it was built from
+_summary_cache = {'files': None, 'run_id': None, 'response': None}
+
+def _db_files_state():
+    # With WAL, new runs land in the -wal file until a checkpoint, so watch both
+    state = []
+    for path in (RESULTS_DB, RESULTS_DB + '-wal'):
+        try:
+            stat = os.stat(path)
+            state.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            state.append(None)
+    return tuple(state)
+
+def summary_response():
+    """Counts, taxable value and tax per category of the latest run, cached until the database changes"""
+    files = _db_files_state()
+    if files == _summary_cache['files']:
+        return _summary_cache['response']
     
-    conn.close()
+    run_id = latest_run(get_db()) if files[0] is not None else None
+    # The file changed but no new run completed: the cached run is still current
+    if run_id is None or run_id != _summary_cache['run_id']:
+        response = {'run_id': run_id}
+        if run_id is None:
+            totals = {status: {'count': 0, 'taxable_value': 0.0, 'tax': 0.0} for status in RESULT_TABLES}
+        else:
+            run_id, totals = run_summary(get_db(), run_id)
+        for status, total in totals.items():
+            response[status] = total['count']
+        response['totals'] = totals
+        _summary_cache['run_id'] = run_id
+        _summary_cache['response'] = response
     
-    return {
-        'matched': matched_df,
-        'not_in_gstr2b': not_in_gstr2b_df,
-        'not_in_books': not_in_books_df
-    }
+    _summary_cache['files'] = files
+    return _summary_cache['response']
 
 @app.route('/')
 def dashboard():
-    data = get_reconciliation_data()
+    # Only the counts are needed here; the tables fetch their rows page by page
+    try:
+        counts = run_counts(get_db())
+    except (ValueError, sqlite3.OperationalError):
+        # Nothing reconciled yet
+        counts = {status: 0 for status in RESULT_TABLES}
     
     summary = {
-        'matched_count': len(data['matched']),
-        'not_in_gstr2b_count': len(data['not_in_gstr2b']),
-        'not_in_books_count': len(data['not_in_books']),
-        'total_records': len(data['matched']) + len(data['not_in_gstr2b']) + len(data['not_in_books'])
+        'matched_count': counts['matched'],
+        'not_in_gstr2b_count': counts['not_in_gstr2b'],
+        'not_in_books_count': counts['not_in_books'],
+        'total_records': sum(counts.values())
     }
     
-    return render_template('dashboard.html', 
-                         summary=summary,
-                         matched=data['matched'].to_html(classes='table table-striped', table_id='matched-table'),
-                         not_in_gstr2b=data['not_in_gstr2b'].to_html(classes='table table-striped', table_id='not-gstr2b-table'),
-                         not_in_books=data['not_in_books'].to_html(classes='table table-striped', table_id='not-books-table'))
+    return render_template('dashboard.html', summary=summary, page_rows=PAGE_ROWS)
+
+@app.route('/api/records/<category>')
+def api_records(category):
+    """One page of a result category: ?limit=&offset=&after=&gstin=&sort=&run="""
+    args = request.args
+    try:
+        after = args.get('after')
+        columns, rows, next_page = page_run(
+            get_db(), category,
+            run_id=args.get('run', type=int),
+            limit=args.get('limit', PAGE_ROWS, type=int),
+            offset=args.get('offset', 0, type=int),
+            after=json.loads(after) if after else None,
+            gstin=args.get('gstin'),
+            sort=args.get('sort')
+        )
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+    except sqlite3.OperationalError as e:
+        return jsonify({'error': f'Results not available: {e}'}), 503
+    
+    return jsonify({'category': category, 'columns': columns, 'rows': rows, 'next': next_page})
 
 @app.route('/api/summary')
 def api_summary():
-    data = get_reconciliation_data()
-    return jsonify({
-        'matched': len(data['matched']),
-        'not_in_gstr2b': len(data['not_in_gstr2b']),
-        'not_in_books': len(data['not_in_books'])
-    })
+    return jsonify(summary_response())
 
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
\ No newline at end of file
@@ -0,0 +1,259 @@
+import numpy as np
+import pandas as pd
+from reconciliation_engine import match_invoices, amount_differences, perfect_match_mask, split_probable
+
+REPORT_COLUMNS = [
+    'GSTIN', 'Name of Party', 'State Name',
+    'A/C Invoice No', 'A/C Date', 'A/C Rate', 'A/C Taxable Value',
+    'A/C IGST', 'A/C CGST', 'A/C SGST', 'A/C CESS',
+    'GSTR 2B Invoice No', 'GSTR 2B Date', 'GSTR 2B Rate', 'GSTR 2B Taxable Value',
+    'GSTR 2B IGST', 'GSTR 2B CGST', 'GSTR 2B SGST', 'GSTR 2B CESS',
+    'Differnce Record Value', 'Differnce Record IGST', 'Differnce Record CGST',
+    'Differnce Record SGST', 'Differnce Record CESS',
+    'Status', 'Reason', 'Accept / Reject', 'Remark 1',
+    'ITC Claim Status', 'ITC Claim Month', 'A/C Month', 'GSTR 2B Month',
+    'GSTR1 Filing Month', 'GSTR1 Filing Date', 'Remark 2', 'Remark 3',
+    'Eligibility For ITC Books', 'Eligibility For ITC 2B', 'Section Name',
+    'A/C Reverse Charge', 'GSTR 2B Reverse Charge'
+]
+
+# Report column -> source column, per side of the reconciliation
+PURCHASE_FIELDS = {
+    'A/C Invoice No': 'invoice_no',
+    'A/C Date': 'invoice_date',
+    'A/C Rate': 'rate',
+    'A/C Taxable Value': 'taxable_value',
+    'A/C IGST': 'igst',
+    'A/C CGST': 'cgst',
+    'A/C SGST': 'sgst',
+    'A/C CESS': 'cess'
+}
+
+GSTR2B_FIELDS = {
+    'GSTR 2B Invoice No': 'invoice_no',
+    'GSTR 2B Date': 'invoice_date',
+    'GSTR 2B Rate': 'rate',
+    'GSTR 2B Taxable Value': 'taxable_value',
+    'GSTR 2B IGST': 'igst',
+    'GSTR 2B CGST': 'cgst',
+    'GSTR 2B SGST': 'sgst',
+    'GSTR 2B CESS': 'cess'
+}
+
+DIFFERENCE_FIELDS = {
+    'Differnce Record Value': 'taxable_value',
+    'Differnce Record IGST': 'igst',
+    'Differnce Record CGST': 'cgst',
+    'Differnce Record SGST': 'sgst',
+    'Differnce Record CESS': 'cess'
+}
+
+
+def _column(rows, col, default=''):
+    """Values of rows[col] as an array, or the default when the column is absent"""
+    return rows[col].to_numpy() if col in rows.columns else default
+
+
+def _frame(columns, length):
+    # Scalars broadcast to every row; unset report columns stay blank
+    data = {}
+    for col in REPORT_COLUMNS:
+        value = columns.get(col, '')
+        data[col] = np.full(length, value, dtype=object) if np.isscalar(value) else value
+    return pd.DataFrame(data, columns=REPORT_COLUMNS)
+
+
+def pair_report(p_rows, g_rows):
+    """Report rows for matched invoice pairs plus the perfect-match mask"""
+    diffs = amount_differences(p_rows, g_rows)
+    perfect = perfect_match_mask(diffs)
+
+    columns = {
+        'GSTIN': p_rows['gstin'].to_numpy(),
+        'Name of Party': p_rows['party_name'].to_numpy(),
+        'State Name': p_rows['state'].to_numpy(),
+        'Status': np.where(perfect, 'Matched', 'Mismatched'),
+        'Reason': np.where(perfect, 'Perfect Match', 'Value Difference'),
+        'Accept / Reject': np.where(perfect, 'Accept', 'Review Required'),
+        'Remark 1': np.where(perfect, '', 'Check value differences'),
+        'ITC Claim Status': _column(g_rows, 'itc_availability'),
+        'GSTR1 Filing Date': _column(g_rows, 'filing_date'),
+        'Eligibility For ITC Books': 'Yes',
+        'Eligibility For ITC 2B': _column(g_rows, 'itc_availability'),
+        'A/C Reverse Charge': 'No',
+        'GSTR 2B Reverse Charge': _column(g_rows, 'reverse_charge')
+    }
+    columns.update({name: p_rows[src].to_numpy() for name, src in PURCHASE_FIELDS.items()})
+    columns.update({name: g_rows[src].to_numpy() for name, src in GSTR2B_FIELDS.items()})
+    columns.update({name: diffs[src] for name, src in DIFFERENCE_FIELDS.items()})
+
+    return _frame(columns, len(p_rows)), perfect
+
+
+def probable_report(p_rows, g_rows):
+    """Report rows for invoice pairs found by tolerance matching"""
+    frame, _ = pair_report(p_rows, g_rows)
+    frame['Status'] = 'Probable Match'
+    frame['Reason'] = 'Invoice No Difference'
+    frame['Accept / Reject'] = 'Review Required'
+    frame['Remark 1'] = 'Value and date within tolerance, check invoice no'
+    return frame
+
+
+def not_in_gstr2b_report(p_rows):
+    """Report rows for purchase invoices missing from GSTR2B"""
+    columns = {
+        'GSTIN': p_rows['gstin'].to_numpy(),
+        'Name of Party': p_rows['party_name'].to_numpy(),
+        'State Name': p_rows['state'].to_numpy(),
+        'Status': 'Not in GSTR2B',
+        'Reason': 'Missing in GSTR2B',
+        'Accept / Reject': 'Reject',
+        'Remark 1': 'Invoice not found in GSTR2B',
+        'ITC Claim Status': 'Not Available',
+        'Eligibility For ITC Books': 'No',
+        'Eligibility For ITC 2B': 'No',
+        'A/C Reverse Charge': 'No'
+    }
+    columns.update({name: p_rows[src].to_numpy() for name, src in PURCHASE_FIELDS.items()})
+    return _frame(columns, len(p_rows))
+
+
+def not_in_books_report(g_rows):
+    """Report rows for GSTR2B invoices missing from the purchase books"""
+    columns = {
+        'GSTIN': g_rows['supplier_gstin'].to_numpy(),
+        'Name of Party': g_rows['supplier_name'].to_numpy(),
+        'Status': 'Not in Books',
+        'Reason': 'Missing in Purchase Books',
+        'Accept / Reject': 'Review Required',
+        'Remark 1': 'Invoice not found in books',
+        'ITC Claim Status': _column(g_rows, 'itc_availability'),
+        'GSTR1 Filing Date': _column(g_rows, 'filing_date'),
+        'Eligibility For ITC Books': 'No',
+        'Eligibility For ITC 2B': _column(g_rows, 'itc_availability'),
+        'GSTR 2B Reverse Charge': _column(g_rows, 'reverse_charge')
+    }
+    columns.update({name: g_rows[src].to_numpy() for name, src in GSTR2B_FIELDS.items()})
+    return _frame(columns, len(g_rows))
+
+
+# Status code of every ReconciliationResult entry
+MATCHED, MISMATCHED, PROBABLE, NOT_IN_GSTR2B, NOT_IN_BOOKS = range(5)
+
+# Category -> status codes it covers
+CATEGORY_STATUSES = {
+    'matched': (MATCHED,),
+    'mismatched': (MISMATCHED,),
+    'probable': (PROBABLE,),
+    'not_in_gstr2b': (NOT_IN_GSTR2B,),
+    'not_in_books': (NOT_IN_BOOKS,)
+}
+
+
+class ReconciliationResult:
+    """Outcome of a reconciliation as compact arrays over the source frames.
+
+    Each entry is a purchase position, a GSTR2B position (-1 for the side
+    that is missing) and a status code, held as int32 / int8 arrays, so a
+    result costs a few bytes per row however wide the report is. Report
+    frames are derived from the source rows only when a category is read
+    with result[category] (or frame()), and are not kept.
+
+    categories maps each category to the status codes it covers; columns
+    optionally narrows a category to some report columns, so every screen
+    can keep its own layout.
+    """
+
+    def __init__(self, purchase_df, gstr2b_df, purchase_pos, gstr2b_pos, status, categories=None, columns=None):
+        self.purchase_df = purchase_df
+        self.gstr2b_df = gstr2b_df
+        self.purchase_pos = np.asarray(purchase_pos, dtype=np.int32)
+        self.gstr2b_pos = np.asarray(gstr2b_pos, dtype=np.int32)
+        self.status = np.asarray(status, dtype=np.int8)
+        self.categories = dict(categories or CATEGORY_STATUSES)
+        self.columns = dict(columns or {})
+
+    def __contains__(self, category):
+        return category in self.categories
+
+    def keys(self):
+        return self.categories.keys()
+
+    def entries(self, category):
+        """Entry numbers of a category, in reconciliation order"""
+        return np.flatnonzero(np.isin(self.status, self.categories[category]))
+
+    def count(self, category):
+        """Number of rows in a category, without deriving any column"""
+        return int(np.isin(self.status, self.categories[category]).sum())
+
+    def frame(self, category, columns=None, rows=None):
+        """Report frame of a category, built from the source rows on each call.
+
+        rows selects some of the category's rows: a slice or an array of row numbers.
+        """
+        entries = self.entries(category)
+        if rows is not None:
+            entries = entries[rows]
+        return self._entries_frame(category, entries, columns)
+
+    __getitem__ = frame
+
+    def export_sheet(self, sheet_name, category, columns=None):
+        """(sheet name, row count, get_rows) of a category for export_workbook.
+
+        Rows are derived a block at a time as the sheet is written, so the
+        category's report frame never exists as a whole.
+        """
+        entries = self.entries(category)
+        return sheet_name, len(entries), lambda start, stop: self._entries_frame(category, entries[start:stop], columns)
+
+    def _entries_frame(self, category, entries, columns=None):
+        statuses = set(self.categories[category])
+        if statuses <= {MATCHED, MISMATCHED, PROBABLE}:
+            p_rows = self.purchase_df.iloc[self.purchase_pos[entries]]
+            g_rows = self.gstr2b_df.iloc[self.gstr2b_pos[entries]]
+            frame = probable_report(p_rows, g_rows) if statuses == {PROBABLE} else pair_report(p_rows, g_rows)[0]
+        elif statuses == {NOT_IN_GSTR2B}:
+            frame = not_in_gstr2b_report(self.purchase_df.iloc[self.purchase_pos[entries]])
+        elif statuses == {NOT_IN_BOOKS}:
+            frame = not_in_books_report(self.gstr2b_df.iloc[self.gstr2b_pos[entries]])
+        else:
+            raise ValueError(f'Category {category} mixes paired and one-sided rows')
+
+        columns = columns or self.columns.get(category)
+        return frame[columns] if columns else frame
+
+
+def reconcile_result(purchase_df, gstr2b_df, tolerance=False, categories=None, columns=None, progress=None):
+    """Reconcile into a ReconciliationResult; see ReconciliationResult for categories / columns.
+
+    With tolerance=True unmatched invoices are also paired on amount and date
+    (see match_with_tolerance) and reported as PROBABLE. progress(text) is
+    called before each stage; an exception it raises stops the run.
+    """
+    progress = progress or (lambda text: None)
+    progress(f"Matching {len(purchase_df):,} purchase rows with {len(gstr2b_df):,} GSTR2B rows...")
+    result = match_invoices(purchase_df, gstr2b_df)
+    p_pos, g_pos = result['matched']
+    progress(f"Comparing amounts of {len(p_pos):,} matched invoices...")
+    perfect = perfect_match_mask(amount_differences(purchase_df.iloc[p_pos], gstr2b_df.iloc[g_pos]))
+    parts = [(p_pos, g_pos, np.where(perfect, MATCHED, MISMATCHED))]
+
+    if tolerance:
+        progress(f"Pairing {len(result['not_in_gstr2b']):,} unmatched invoices within tolerance...")
+        result.update(split_probable(purchase_df, gstr2b_df, result['not_in_gstr2b'], result['not_in_books']))
+        prob_p, prob_g = result['probable']
+        parts.append((prob_p, prob_g, np.full(len(prob_p), PROBABLE)))
+    elif categories is None:
+        categories = {name: codes for name, codes in CATEGORY_STATUSES.items() if name != 'probable'}
+
+    # -1 marks the side a one-sided entry is missing
+    not_in_gstr2b = np.asarray(result['not_in_gstr2b'], dtype=np.int64)
+    not_in_books = np.asarray(result['not_in_books'], dtype=np.int64)
+    parts.append((not_in_gstr2b, np.full(len(not_in_gstr2b), -1), np.full(len(not_in_gstr2b), NOT_IN_GSTR2B)))
+    parts.append((np.full(len(not_in_books), -1), not_in_books, np.full(len(not_in_books), NOT_IN_BOOKS)))
+    purchase_pos, gstr2b_pos, status = (np.concatenate(values) for values in zip(*parts))
+
+    return ReconciliationResult(purchase_df, gstr2b_df, purchase_pos, gstr2b_pos, status, categories, columns)
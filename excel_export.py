@@ -0,0 +1,112 @@
+import math
+import numpy as np
+import pandas as pd
+import xlsxwriter
+
+# Rows converted to Python values at a time; only one block is held per sheet
+EXPORT_BLOCK_ROWS = 10000
+
+# Excel's row limit; the first row of every sheet is the header
+EXCEL_MAX_ROWS = 1048576
+SHEET_DATA_ROWS = EXCEL_MAX_ROWS - 1
+
+# Matches the header style of DataFrame.to_excel
+HEADER_FORMAT = {'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'}
+
+WORKBOOK_OPTIONS = {
+    # Each row is flushed to a temp file as soon as the next one starts
+    'constant_memory': True,
+    'default_date_format': 'yyyy-mm-dd'
+}
+
+
+def cell_values(values):
+    """Python values of a column block for write_row, blanks (NaN / NaT / None) and infinities as None"""
+    if values.dtype.kind == 'M':
+        values = pd.Series(values).astype(object).to_numpy()
+    if values.dtype.kind == 'f':
+        # xlsxwriter rejects inf (e.g. a rate over a zero taxable value)
+        blank = ~np.isfinite(values)
+    else:
+        blank = pd.isna(values)
+        if values.dtype == object:
+            blank |= np.fromiter((isinstance(value, float) and math.isinf(value) for value in values),
+                                 dtype=bool, count=len(values))
+    return [None if is_blank else value for value, is_blank in zip(values.tolist(), blank.tolist())]
+
+
+def sheet_parts(sheet_name, n_rows, rows_per_sheet=SHEET_DATA_ROWS):
+    """(sheet name, first row, end row) of every sheet n_rows rows need.
+
+    Rows beyond one sheet go to continuation sheets sheet_name_2,
+    sheet_name_3, ...; no rows still get one (header only) sheet.
+    """
+    parts = []
+    for number, start in enumerate(range(0, max(n_rows, 1), rows_per_sheet), 1):
+        name = sheet_name if number == 1 else f'{sheet_name}_{number}'
+        parts.append((name, start, min(start + rows_per_sheet, n_rows)))
+    return parts
+
+
+def write_rows(workbook, sheet_name, get_rows, start, stop, header_format=None, progress=None):
+    """Write rows start:stop to a new worksheet, fetching them a block at a time.
+
+    get_rows(first, end) returns those rows as a DataFrame; only one block
+    is held at a time, and the header comes from an empty slice. progress
+    (sheet_name, rows written) is called after every block.
+    """
+    worksheet = workbook.add_worksheet(sheet_name)
+    worksheet.write_row(0, 0, [str(col) for col in get_rows(start, start).columns], header_format)
+
+    for block_start in range(start, stop, EXPORT_BLOCK_ROWS):
+        block_stop = min(block_start + EXPORT_BLOCK_ROWS, stop)
+        df = get_rows(block_start, block_stop)
+        block = [cell_values(df.iloc[:, i].to_numpy()) for i in range(df.shape[1])]
+        for row_number, row in enumerate(zip(*block), block_start - start + 1):
+            worksheet.write_row(row_number, 0, row)
+        if progress:
+            progress(sheet_name, block_stop - start)
+    return worksheet
+
+
+def frame_getter(df):
+    """get_rows over an in-memory DataFrame"""
+    return lambda start, stop: df.iloc[start:stop]
+
+
+def write_frame(workbook, sheet_name, df, header_format=None, start=0, stop=None, progress=None):
+    """Write rows start:stop of df to a new worksheet row by row, see write_rows"""
+    stop = len(df) if stop is None else stop
+    return write_rows(workbook, sheet_name, frame_getter(df), start, stop, header_format, progress)
+
+
+def export_workbook(target, sheets, rows_per_sheet=SHEET_DATA_ROWS, progress=None):
+    """Write sheets to target in constant memory.
+
+    Each sheet is (sheet name, DataFrame) or, for rows derived on demand,
+    (sheet name, row count, get_rows) as taken by write_rows, so no whole
+    frame needs to exist. target is an .xlsx path or a binary file object.
+    Rows are streamed in order (xlsxwriter's constant_memory mode), so
+    memory stays flat however many rows are exported. A sheet longer than
+    Excel's row limit is split over continuation sheets (see sheet_parts),
+    planned before anything is written. progress is passed on to
+    write_rows; an exception it raises stops the export. Returns
+    {sheet name: [names of its parts]}.
+    """
+    plan = []
+    for sheet in sheets:
+        if len(sheet) == 2:
+            sheet_name, df = sheet
+            sheet = (sheet_name, len(df), frame_getter(df))
+        sheet_name, n_rows, get_rows = sheet
+        plan.append((sheet_name, get_rows, sheet_parts(sheet_name, n_rows, rows_per_sheet)))
+
+    workbook = xlsxwriter.Workbook(target, WORKBOOK_OPTIONS)
+    try:
+        header_format = workbook.add_format(HEADER_FORMAT)
+        for sheet_name, get_rows, parts in plan:
+            for part_name, start, stop in parts:
+                write_rows(workbook, part_name, get_rows, start, stop, header_format, progress)
+    finally:
+        workbook.close()
+    return {sheet_name: [part[0] for part in parts] for sheet_name, get_rows, parts in plan}
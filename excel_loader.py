@@ -0,0 +1,228 @@
+from itertools import chain, islice
+import numpy as np
+import openpyxl
+import pandas as pd
+
+MIN_DATA_COLUMNS = 5
+
+# Rows parsed when only the header is needed (interactive column mapping)
+HEADER_SCAN_ROWS = 200
+
+# Data rows per DataFrame yielded by the streaming reader
+CHUNK_ROWS = 50000
+
+PURCHASE_COLUMNS = ['gstin', 'party_name', 'state', 'invoice_no', 'invoice_date',
+                    'rate', 'taxable_value', 'igst', 'cgst', 'sgst', 'cess', 'total_value']
+
+GSTR2B_COLUMNS = ['supplier_gstin', 'supplier_name', 'invoice_no', 'invoice_type',
+                  'invoice_date', 'invoice_value', 'place_of_supply', 'reverse_charge',
+                  'rate', 'taxable_value', 'igst', 'cgst', 'sgst', 'cess', 'period',
+                  'filing_date', 'itc_availability', 'reason', 'tax_rate_percent',
+                  'source', 'irn_no', 'irn_date']
+
+
+def read_sheet(file, nrows=None):
+    """Parse the sheet once with no header; every sheet row stays a frame row"""
+    # dtype=object keeps header cells exactly as typed (2024, not 2024.0)
+    return pd.read_excel(file, header=None, dtype=object, nrows=nrows)
+
+
+def find_data_start(sheet, min_columns=MIN_DATA_COLUMNS):
+    """Locate the table in an already parsed sheet.
+
+    Returns the skiprows value the old per-row read_excel scan settled on:
+    the first row whose following row has at least min_columns filled cells.
+    Saved mappings store this value, so the meaning must not change.
+    """
+    if sheet.shape[1] < min_columns:
+        return 0
+    filled = sheet.notna().sum(axis=1).to_numpy()
+    candidates = (filled[1:] >= min_columns).nonzero()[0]
+    return int(candidates[0]) if len(candidates) else 0
+
+
+def header_names(values):
+    """Column names pandas would give this header row: blanks become
+    'Unnamed: n' and repeated names get .1, .2 suffixes"""
+    names = [f'Unnamed: {i}' if pd.isna(value) else value for i, value in enumerate(values)]
+    counts = {}
+    for i, name in enumerate(names):
+        count = counts.get(name, 0)
+        while count > 0:
+            counts[name] = count + 1
+            name = f'{name}.{count}'
+            count = counts.get(name, 0)
+        names[i] = name
+        counts[name] = count + 1
+    return names
+
+
+def table_from_sheet(sheet, skip_rows):
+    """Same frame as pd.read_excel(file, skiprows=skip_rows), cut from the parsed sheet"""
+    if skip_rows >= len(sheet):
+        return pd.DataFrame()
+    df = sheet.iloc[skip_rows + 1:].reset_index(drop=True)
+    df.columns = header_names(sheet.iloc[skip_rows].tolist())
+    return convert_types(df)
+
+
+def convert_types(df, numeric_columns=None):
+    """Give an all-object frame the dtypes read_excel would have inferred.
+
+    numeric_columns limits numeric conversion to those column positions, so
+    later chunks of a stream follow the decisions made on the first one.
+    """
+    if df.empty:
+        return df
+    # Column by column: infer_objects on the whole frame gives up on a
+    # block as soon as one column in it is mixed
+    for i in range(df.shape[1]):
+        column = df.iloc[:, i]
+        converted = None
+        if numeric_columns is None or i in numeric_columns:
+            try:
+                # read_excel also turns all-numeric text columns into numbers
+                converted = pd.to_numeric(column)
+            except (ValueError, TypeError):
+                pass
+        df.isetitem(i, column.infer_objects() if converted is None else converted)
+    return df
+
+
+def read_table(file, min_columns=MIN_DATA_COLUMNS):
+    """Read a register once, find where its table starts and return (skip_rows, df)"""
+    sheet = read_sheet(file)
+    skip_rows = find_data_start(sheet, min_columns)
+    return skip_rows, table_from_sheet(sheet, skip_rows)
+
+
+def load_register(file, columns, skip_rows=None):
+    """Parse a register into a frame with the standard column names.
+
+    skip_rows=None locates the table like read_table; fully blank rows are
+    dropped either way.
+    """
+    if skip_rows is None:
+        _, df = read_table(file)
+    else:
+        df = pd.read_excel(file, skiprows=skip_rows)
+    df = df.dropna(how='all')
+    df.columns = columns
+    return df
+
+
+def _row_width(row):
+    width = len(row)
+    while width and row[width - 1] is None:
+        width -= 1
+    return width
+
+
+def _cell_value(value):
+    # Same cell conversion as pandas' openpyxl reader: 1234.0 is read as 1234
+    if type(value) is float and value.is_integer():
+        return int(value)
+    return value
+
+
+class ExcelChunkReader:
+    """Stream a register through openpyxl's read-only parser.
+
+    Only the first scan_rows rows are held up front (as .head, shaped like
+    read_sheet(nrows=scan_rows)) so the header can be located; chunks()
+    then yields the data chunk_size rows at a time.
+    """
+
+    def __init__(self, file, chunk_size=CHUNK_ROWS, scan_rows=HEADER_SCAN_ROWS):
+        self.chunk_size = chunk_size
+        self.workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+        sheet = self.workbook.worksheets[0]
+        sheet.reset_dimensions()
+        self._rows = sheet.iter_rows(values_only=True)
+        self._head_rows = list(islice(self._rows, scan_rows))
+        self.head = pd.DataFrame(self._head_rows, dtype=object)
+        self._numeric_columns = None
+        # Column position -> dtype of the first chunk with a value in it
+        self._dtypes = {}
+
+    def chunks(self, skip_rows=None, columns=None):
+        """Yield typed DataFrames of at most chunk_size non-empty rows.
+
+        skip_rows has the read_excel meaning (defaults to find_data_start on
+        the head). columns renames positionally like assigning df.columns;
+        otherwise the header row's names are used. At least one frame, maybe
+        empty, is always yielded so writers can recreate their table.
+        """
+        if skip_rows is None:
+            skip_rows = find_data_start(self.head)
+
+        try:
+            rows = chain(self._head_rows, self._rows)
+            header = next(islice(rows, skip_rows, None), None) or ()
+            if columns is None:
+                # Like read_excel, the table is as wide as its widest row
+                width = max((_row_width(row) for row in self._head_rows[skip_rows:]), default=0)
+                header = list(header[:width]) + [None] * (width - len(header))
+                columns = header_names(header)
+            width = len(columns)
+
+            batch = []
+            yielded = False
+            for row in rows:
+                values = [_cell_value(v) for v in row[:width]]
+                if len(values) < width:
+                    values.extend([None] * (width - len(values)))
+                batch.append(values)
+                if len(batch) >= self.chunk_size:
+                    yield self._frame(batch, columns)
+                    batch = []
+                    yielded = True
+            if batch or not yielded:
+                yield self._frame(batch, columns)
+        finally:
+            self.close()
+
+    def _frame(self, batch, columns):
+        df = pd.DataFrame(batch, columns=range(len(columns)), dtype=object)
+        df = df.dropna(how='all').reset_index(drop=True)
+        # Blank cells are None from openpyxl but NaN from read_excel
+        df = df.where(df.notna(), np.nan)
+        df.columns = columns
+        df = convert_types(df, self._numeric_columns)
+        if self._numeric_columns is None and len(df):
+            self._numeric_columns = {
+                i for i, dtype in enumerate(df.dtypes) if pd.api.types.is_numeric_dtype(dtype)
+            }
+        for i, has_values in enumerate(df.notna().any().tolist()):
+            if has_values:
+                self._dtypes.setdefault(i, df.dtypes.iloc[i])
+            elif i in self._dtypes:
+                # A column blank in this chunk takes the type it had so far
+                # (NaT for dates), so concatenated chunks keep that type
+                try:
+                    df.isetitem(i, df.iloc[:, i].astype(self._dtypes[i]))
+                except (ValueError, TypeError):
+                    pass
+        return df
+
+    def close(self):
+        self.workbook.close()
+
+
+def iter_table_chunks(file, skip_rows=None, columns=None, chunk_size=CHUNK_ROWS):
+    """Stream a register as DataFrame chunks, see ExcelChunkReader.chunks"""
+    return ExcelChunkReader(file, chunk_size).chunks(skip_rows, columns)
+
+
+def concat_chunks(chunks):
+    """One frame of streamed chunks, typed like read_excel would type the whole table.
+
+    Chunks read before a column's first value have it blank (float NaN), so
+    concatenating them with later dates or text gives object; those columns
+    are inferred again over all their rows.
+    """
+    df = pd.concat(list(chunks), ignore_index=True)
+    for i, dtype in enumerate(df.dtypes.tolist()):
+        if dtype == object:
+            df.isetitem(i, df.iloc[:, i].infer_objects())
+    return df
@@ -1,68 +1,27 @@
 import pandas as pd
 import sqlite3
+from incremental import reconcile_incremental, build_results, RESULTS_DB, RESULTS_LAYOUT
+from results_store import snapshot_run, read_run
+from parse_cache import cached_register
 
-# Read and clean data
-purchase_df = pd.read_excel('purchase.xlsx', skiprows=6)
-purchase_df = purchase_df.dropna(how='all')
-purchase_df.columns = ['gstin', 'party_name', 'state', 'invoice_no', 'invoice_date', 
-                      'rate', 'taxable_value', 'igst', 'cgst', 'sgst', 'cess', 'total_value']
-
-gstr2b_df = pd.read_excel('gstr2b.xlsx', skiprows=6)
-gstr2b_df = gstr2b_df.dropna(how='all')
-gstr2b_df.columns = ['supplier_gstin', 'supplier_name', 'invoice_no', 'invoice_type', 
-                    'invoice_date', 'invoice_value', 'place_of_supply', 'reverse_charge',
-                    'rate', 'taxable_value', 'igst', 'cgst', 'sgst', 'cess', 'period',
-                    'filing_date', 'itc_availability', 'reason', 'tax_rate_percent', 
-                    'source', 'irn_no', 'irn_date']
+# Read and clean data (reparsed only when the workbook or its mapping changed)
+purchase_df = cached_register('purchase.xlsx', 'purchase', skip_rows=6)
+gstr2b_df = cached_register('gstr2b.xlsx', 'gstr2b', skip_rows=6)
 
 print(f"Purchase records: {len(purchase_df)}")
 print(f"GSTR2B records: {len(gstr2b_df)}")
 
-# Perform reconciliation
-matched = []
-not_in_gstr2b = []
-not_in_books = []
-
-# Find matches
-for _, p_row in purchase_df.iterrows():
-    match_found = False
-    for _, g_row in gstr2b_df.iterrows():
-        if (str(p_row['gstin']).strip() == str(g_row['supplier_gstin']).strip() and
-            str(p_row['invoice_no']).strip() == str(g_row['invoice_no']).strip()):
-            matched.append({
-                'gstin': p_row['gstin'],
-                'party_name': p_row['party_name'],
-                'invoice_no': p_row['invoice_no'],
-                'purchase_value': p_row['taxable_value'],
-                'gstr2b_value': g_row['taxable_value']
-            })
-            match_found = True
-            break
-    
-    if not match_found:
-        not_in_gstr2b.append({
-            'gstin': p_row['gstin'],
-            'party_name': p_row['party_name'],
-            'invoice_no': p_row['invoice_no'],
-            'taxable_value': p_row['taxable_value']
-        })
+# Perform reconciliation, patching the stored results for changed keys only
+rematched = reconcile_incremental(purchase_df, gstr2b_df, build_results, RESULTS_LAYOUT)
+run_id = snapshot_run('final_reconciliation')
+print(f"Keys rematched: {rematched}")
+print(f"Results saved to reconciliation_results.db as run {run_id}")
 
-# Find GSTR2B records not in purchase
-for _, g_row in gstr2b_df.iterrows():
-    match_found = False
-    for _, p_row in purchase_df.iterrows():
-        if (str(p_row['gstin']).strip() == str(g_row['supplier_gstin']).strip() and
-            str(p_row['invoice_no']).strip() == str(g_row['invoice_no']).strip()):
-            match_found = True
-            break
-    
-    if not match_found:
-        not_in_books.append({
-            'supplier_gstin': g_row['supplier_gstin'],
-            'supplier_name': g_row['supplier_name'],
-            'invoice_no': g_row['invoice_no'],
-            'taxable_value': g_row['taxable_value']
-        })
+conn = sqlite3.connect(RESULTS_DB)
+matched = read_run(conn, 'matched', run_id)
+not_in_gstr2b = read_run(conn, 'not_in_gstr2b', run_id)
+not_in_books = read_run(conn, 'not_in_books', run_id)
+conn.close()
 
 # Results
 print(f"\n=== RECONCILIATION RESULTS ===")
@@ -70,39 +29,26 @@ print(f"Matched: {len(matched)}")
 print(f"Not in GSTR2B: {len(not_in_gstr2b)}")
 print(f"Not in Books: {len(not_in_books)}")
 
-# Save results to database
-conn = sqlite3.connect('reconciliation_results.db')
-
-if matched:
-    pd.DataFrame(matched).to_sql('matched', conn, if_exists='replace', index=False)
-if not_in_gstr2b:
-    pd.DataFrame(not_in_gstr2b).to_sql('not_in_gstr2b', conn, if_exists='replace', index=False)
-if not_in_books:
-    pd.DataFrame(not_in_books).to_sql('not_in_books', conn, if_exists='replace', index=False)
-
-conn.close()
-print("Results saved to reconciliation_results.db")
-
 # Export to Excel
 with pd.ExcelWriter('GST_Reconciliation_Report.xlsx') as writer:
-    if matched:
-        pd.DataFrame(matched).to_excel(writer, sheet_name='Matched', index=False)
-    if not_in_gstr2b:
-        pd.DataFrame(not_in_gstr2b).to_excel(writer, sheet_name='Not_in_GSTR2B', index=False)
-    if not_in_books:
-        pd.DataFrame(not_in_books).to_excel(writer, sheet_name='Not_in_Books', index=False)
+    if not matched.empty:
+        matched.to_excel(writer, sheet_name='Matched', index=False)
+    if not not_in_gstr2b.empty:
+        not_in_gstr2b.to_excel(writer, sheet_name='Not_in_GSTR2B', index=False)
+    if not not_in_books.empty:
+        not_in_books.to_excel(writer, sheet_name='Not_in_Books', index=False)
 
 print("Excel report saved as GST_Reconciliation_Report.xlsx")
 
 # Show samples
-if matched:
+if not matched.empty:
     print("\nMatched Sample:")
-    print(pd.DataFrame(matched).head(3))
+    print(matched.head(3))
 
-if not_in_gstr2b:
+if not not_in_gstr2b.empty:
     print("\nNot in GSTR2B Sample:")
-    print(pd.DataFrame(not_in_gstr2b).head(3))
+    print(not_in_gstr2b.head(3))
 
-if not_in_books:
+if not not_in_books.empty:
     print("\nNot in Books Sample:")
-    print(pd.DataFrame(not_in_books).head(3))
\ No newline at end of file
+    print(not_in_books.head(3))
\ No newline at end of file
@@ -1,8 +1,134 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
+import os
+import queue
+import threading
 import pandas as pd
 import sqlite3
 from datetime import datetime
+from excel_loader import read_table, ExcelChunkReader, concat_chunks, PURCHASE_COLUMNS, GSTR2B_COLUMNS
+from excel_export import export_workbook
+from detailed_report import reconcile_result, MATCHED, MISMATCHED, NOT_IN_GSTR2B, NOT_IN_BOOKS
+from result_index import ResultIndex, SEARCH_FIELDS
+from gstr2b_json import iter_gstr2b_json
+from purchase_register import iter_purchase_register
+
+# The Matched tab lists every paired invoice; Status tells exact matches apart
+GUI_CATEGORIES = {
+    'matched': (MATCHED, MISMATCHED),
+    'not_in_gstr2b': (NOT_IN_GSTR2B,),
+    'not_in_books': (NOT_IN_BOOKS,)
+}
+
+# Columns shown for the one-sided categories
+GUI_COLUMNS = {
+    'not_in_gstr2b': ['GSTIN', 'Name of Party', 'State Name', 'A/C Invoice No', 'A/C Date',
+                      'A/C Taxable Value', 'Status', 'Reason'],
+    'not_in_books': ['GSTIN', 'Name of Party', 'GSTR 2B Invoice No', 'GSTR 2B Date',
+                     'GSTR 2B Taxable Value', 'Status', 'Reason']
+}
+
+# Milliseconds between checks of the worker's progress queue
+POLL_MS = 100
+
+# Rows parsed between progress updates (and chances to cancel)
+PARSE_CHUNK_ROWS = 10000
+
+class Cancelled(Exception):
+    """Raised on the worker thread once the user cancels"""
+
+class VirtualTable:
+    """Treeview over one category of a ReconciliationResult.
+    
+    Only as many Tk items exist as rows fit on screen. Scrolling derives
+    the newly visible rows from the result's arrays (frame(rows=...)) and
+    rewrites those items, so opening a tab costs the same for 100 rows as
+    for 100k.
+    """
+    
+    # Rows moved per mouse wheel notch
+    WHEEL_ROWS = 3
+    
+    def __init__(self, parent, results, category):
+        self.results = results
+        self.category = category
+        self.total = results.count(category)
+        # Category row numbers shown (a filter's matches), None for all rows
+        self.rows = None
+        self.first = 0
+        self.visible = 1
+        
+        columns = list(results.frame(category, rows=slice(0)).columns)
+        
+        # Scrollbars are packed first so the tree never squeezes them out
+        self.v_scrollbar = ttk.Scrollbar(parent, orient=tk.VERTICAL, command=self.yview)
+        self.v_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        h_scrollbar = ttk.Scrollbar(parent, orient=tk.HORIZONTAL)
+        h_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
+        
+        self.tree = ttk.Treeview(parent, columns=columns, show="headings")
+        self.tree.pack(fill=tk.BOTH, expand=True)
+        for col in columns:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=100, stretch=False)
+        h_scrollbar.configure(command=self.tree.xview)
+        self.tree.configure(xscrollcommand=h_scrollbar.set)
+        
+        self.row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        self.tree.bind("<Configure>", self.resize)
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll(-self.WHEEL_ROWS if e.delta > 0 else self.WHEEL_ROWS))
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-self.WHEEL_ROWS))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(self.WHEEL_ROWS))
+        self.tree.bind("<Prior>", lambda e: self.scroll(-self.visible))
+        self.tree.bind("<Next>", lambda e: self.scroll(self.visible))
+        self.show(0)
+    
+    def set_rows(self, rows):
+        """Show only these category row numbers (None for all) from the top"""
+        self.rows = rows
+        self.total = self.results.count(self.category) if rows is None else len(rows)
+        self.show(0)
+    
+    def resize(self, event):
+        # The heading takes about one row
+        visible = max(1, event.height // self.row_height - 1)
+        if visible != self.visible:
+            self.visible = visible
+            self.show(self.first)
+    
+    def yview(self, *args):
+        """Scrollbar command: ('moveto', fraction) or ('scroll', n, 'units' / 'pages')"""
+        if args[0] == 'moveto':
+            self.show(round(float(args[1]) * self.total))
+        elif args[0] == 'scroll':
+            step = self.visible if args[2] == 'pages' else 1
+            self.scroll(int(args[1]) * step)
+    
+    def scroll(self, rows):
+        self.show(self.first + rows)
+        return "break"
+    
+    def show(self, first):
+        """Fill the Tk items with rows first:first + visible"""
+        self.first = max(0, min(first, self.total - self.visible))
+        stop = min(self.first + self.visible, self.total)
+        rows = slice(self.first, stop) if self.rows is None else self.rows[self.first:stop]
+        frame = self.results.frame(self.category, rows=rows)
+        rows = frame.astype(object).where(frame.notna(), '').to_numpy().tolist()
+        
+        items = self.tree.get_children()
+        for item in items[len(rows):]:
+            self.tree.delete(item)
+        for i, values in enumerate(rows):
+            if i < len(items):
+                self.tree.item(items[i], values=values)
+            else:
+                self.tree.insert("", tk.END, values=values)
+        
+        if self.total:
+            self.v_scrollbar.set(self.first / self.total, stop / self.total)
+        else:
+            self.v_scrollbar.set(0, 1)
 
 class GSTReconciliationGUI:
     def __init__(self, root):
@@ -13,6 +139,7 @@ class GSTReconciliationGUI:
         self.purchase_file = None
         self.gstr2b_file = None
         self.results = None
+        self.indexes = None
         
         self.setup_gui()
     
@@ -67,8 +194,8 @@ class GSTReconciliationGUI:
     
     def select_purchase_file(self):
         file_path = filedialog.askopenfilename(
-            title="Select Purchase Excel File",
-            filetypes=[("Excel files", "*.xlsx *.xls")]
+            title="Select Purchase Register",
+            filetypes=[("Excel files", "*.xlsx *.xls"), ("Tally XML export", "*.xml"), ("CSV export", "*.csv")]
         )
         if file_path:
             self.purchase_file = file_path
@@ -77,8 +204,8 @@ class GSTReconciliationGUI:
     
     def select_gstr2b_file(self):
         file_path = filedialog.askopenfilename(
-            title="Select GSTR2B Excel File",
-            filetypes=[("Excel files", "*.xlsx *.xls")]
+            title="Select GSTR2B Excel or JSON File",
+            filetypes=[("Excel files", "*.xlsx *.xls"), ("GSTR-2B JSON", "*.json")]
         )
         if file_path:
             self.gstr2b_file = file_path
@@ -89,150 +216,134 @@ class GSTReconciliationGUI:
         if self.purchase_file and self.gstr2b_file:
             self.process_btn.config(state="normal")
     
-    def find_data_start(self, file_path):
-        df = pd.read_excel(file_path)
-        for i in range(len(df)):
-            test_df = pd.read_excel(file_path, skiprows=i)
-            if len(test_df.columns) >= 5 and not test_df.empty:
-                if test_df.iloc[0].count() >= 5:
-                    return i
-        return 0
-    
     def process_files(self):
+        self.run_in_background("Processing...", self.reconcile_files, self.reconciliation_done)
+    
+    def reconcile_files(self, report):
+        """Worker: parse both registers and reconcile them"""
+        purchase_df = self.read_register(self.purchase_file, "Purchase", PURCHASE_COLUMNS, report)
+        gstr2b_df = self.read_register(self.gstr2b_file, "GSTR2B", GSTR2B_COLUMNS, report)
+        
+        # Perform reconciliation with detailed columns; every stage reports
+        # (and so can be cancelled) before it starts
+        results = self.detailed_reconciliation(purchase_df, gstr2b_df, report)
+        indexes = {}
+        for category in results.keys():
+            report(f"Indexing {results.count(category):,} {category.replace('_', ' ')} rows for search...")
+            indexes[category] = ResultIndex(results, category)
+        return results, indexes
+    
+    def read_register(self, file_path, label, columns, report):
+        """Worker: parse a register with the standard column names, reporting rows parsed"""
+        if file_path.lower().endswith('.json'):
+            # Portal GSTR-2B download, streamed straight into the GSTR2B columns
+            chunks = iter_gstr2b_json(file_path, PARSE_CHUNK_ROWS)
+        elif file_path.lower().endswith(('.xml', '.csv')):
+            # Accounting system exports, streamed without an xlsx round trip
+            chunks = iter_purchase_register(file_path, chunk_size=PARSE_CHUNK_ROWS)
+        elif not file_path.lower().endswith(('.xlsx', '.xlsm')):
+            # openpyxl cannot stream .xls, so it is parsed in one go
+            report(f"Reading {label} file...")
+            _, df = read_table(file_path)
+            df = df.dropna(how='all')
+            df.columns = columns
+            return df
+        else:
+            chunks = ExcelChunkReader(file_path, PARSE_CHUNK_ROWS).chunks()
+        
+        frames = []
+        rows = 0
         try:
-            # Show progress
-            progress_window = tk.Toplevel(self.root)
-            progress_window.title("Processing...")
-            progress_window.geometry("300x100")
-            ttk.Label(progress_window, text="Processing files...").pack(pady=20)
-            progress_bar = ttk.Progressbar(progress_window, mode='indeterminate')
-            progress_bar.pack(pady=10)
-            progress_bar.start()
-            self.root.update()
-            
-            # Read files
-            purchase_skip = self.find_data_start(self.purchase_file)
-            gstr2b_skip = self.find_data_start(self.gstr2b_file)
-            
-            purchase_df = pd.read_excel(self.purchase_file, skiprows=purchase_skip).dropna(how='all')
-            gstr2b_df = pd.read_excel(self.gstr2b_file, skiprows=gstr2b_skip).dropna(how='all')
-            
-            # Standardize column names
-            purchase_df.columns = ['gstin', 'party_name', 'state', 'invoice_no', 'invoice_date', 
-                                  'rate', 'taxable_value', 'igst', 'cgst', 'sgst', 'cess', 'total_value']
-            
-            gstr2b_df.columns = ['supplier_gstin', 'supplier_name', 'invoice_no', 'invoice_type', 
-                                'invoice_date', 'invoice_value', 'place_of_supply', 'reverse_charge',
-                                'rate', 'taxable_value', 'igst', 'cgst', 'sgst', 'cess', 'period',
-                                'filing_date', 'itc_availability', 'reason', 'tax_rate_percent', 
-                                'source', 'irn_no', 'irn_date']
-            
-            # Perform reconciliation with detailed columns
-            self.results = self.detailed_reconciliation(purchase_df, gstr2b_df)
-            
-            progress_window.destroy()
-            self.display_results()
-            
-        except Exception as e:
-            if 'progress_window' in locals():
-                progress_window.destroy()
-            messagebox.showerror("Error", f"Error processing files: {str(e)}")
+            for chunk in chunks:
+                frames.append(chunk)
+                rows += len(chunk)
+                report(f"{label}: {rows:,} rows parsed")
+        finally:
+            chunks.close()
+        df = concat_chunks(frames)
+        df.columns = columns
+        return df
+    
+    def reconciliation_done(self, outcome):
+        self.results, self.indexes = outcome
+        self.display_results()
+    
+    def run_in_background(self, title, task, on_done, on_cancel=None, error_text="Error processing files"):
+        """Run task(report) on a worker thread behind a progress window.
+        
+        The worker never touches Tk: report(text) queues a progress event
+        (and raises Cancelled once Cancel is pressed), and the main loop
+        polls the queue every POLL_MS. on_done(result) then runs on the
+        main thread; on_cancel() runs if the task was cancelled.
+        """
+        progress_window = tk.Toplevel(self.root)
+        progress_window.title(title)
+        progress_window.geometry("360x140")
+        progress_window.transient(self.root)
+        status_label = ttk.Label(progress_window, text="Starting...")
+        status_label.pack(pady=(20, 5))
+        progress_bar = ttk.Progressbar(progress_window, mode='indeterminate', length=300)
+        progress_bar.pack(pady=5)
+        progress_bar.start()
+        
+        cancel_event = threading.Event()
+        cancel_btn = ttk.Button(progress_window, text="Cancel")
+        
+        def cancel():
+            cancel_event.set()
+            status_label.config(text="Cancelling...")
+            cancel_btn.config(state="disabled")
+        
+        cancel_btn.config(command=cancel)
+        cancel_btn.pack(pady=5)
+        progress_window.protocol("WM_DELETE_WINDOW", cancel)
+        # The main window keeps redrawing but takes no input meanwhile; a grab
+        # on a window not yet mapped fails with TclError on some platforms
+        progress_window.wait_visibility()
+        progress_window.grab_set()
+        
+        events = queue.Queue()
+        
+        def report(text):
+            if cancel_event.is_set():
+                raise Cancelled()
+            events.put(('progress', text))
+        
+        def work():
+            try:
+                events.put(('done', task(report)))
+            except Cancelled:
+                events.put(('cancelled', None))
+            except Exception as e:
+                events.put(('error', e))
+        
+        def poll():
+            try:
+                while True:
+                    kind, value = events.get_nowait()
+                    if kind == 'progress':
+                        status_label.config(text=value)
+                        continue
+                    progress_window.grab_release()
+                    progress_window.destroy()
+                    if kind == 'done':
+                        on_done(value)
+                    elif kind == 'cancelled':
+                        if on_cancel:
+                            on_cancel()
+                    else:
+                        messagebox.showerror("Error", f"{error_text}: {str(value)}")
+                    return
+            except queue.Empty:
+                self.root.after(POLL_MS, poll)
+        
+        threading.Thread(target=work, daemon=True).start()
+        self.root.after(POLL_MS, poll)
     
-    def detailed_reconciliation(self, purchase_df, gstr2b_df):
-        matched = []
-        not_in_gstr2b = []
-        not_in_books = []
-        
-        # Create detailed matched records
-        for _, p_row in purchase_df.iterrows():
-            match_found = False
-            for _, g_row in gstr2b_df.iterrows():
-                if (str(p_row['gstin']).strip() == str(g_row['supplier_gstin']).strip() and
-                    str(p_row['invoice_no']).strip() == str(g_row['invoice_no']).strip()):
-                    
-                    matched.append({
-                        'GSTIN': p_row['gstin'],
-                        'Name of Party': p_row['party_name'],
-                        'State Name': p_row['state'],
-                        'A/C Invoice No': p_row['invoice_no'],
-                        'A/C Date': p_row['invoice_date'],
-                        'A/C Rate': p_row['rate'],
-                        'A/C Taxable Value': p_row['taxable_value'],
-                        'A/C IGST': p_row['igst'],
-                        'A/C CGST': p_row['cgst'],
-                        'A/C SGST': p_row['sgst'],
-                        'A/C CESS': p_row['cess'],
-                        'GSTR 2B Invoice No': g_row['invoice_no'],
-                        'GSTR 2B Date': g_row['invoice_date'],
-                        'GSTR 2B Rate': g_row['rate'],
-                        'GSTR 2B Taxable Value': g_row['taxable_value'],
-                        'GSTR 2B IGST': g_row['igst'],
-                        'GSTR 2B CGST': g_row['cgst'],
-                        'GSTR 2B SGST': g_row['sgst'],
-                        'GSTR 2B CESS': g_row['cess'],
-                        'Difference Record Value': float(p_row['taxable_value'] or 0) - float(g_row['taxable_value'] or 0),
-                        'Difference Record IGST': float(p_row['igst'] or 0) - float(g_row['igst'] or 0),
-                        'Difference Record CGST': float(p_row['cgst'] or 0) - float(g_row['cgst'] or 0),
-                        'Difference Record SGST': float(p_row['sgst'] or 0) - float(g_row['sgst'] or 0),
-                        'Difference Record CESS': float(p_row['cess'] or 0) - float(g_row['cess'] or 0),
-                        'Status': 'Matched',
-                        'Reason': 'Perfect Match',
-                        'Accept / Reject': 'Accept',
-                        'Remark 1': '',
-                        'ITC Claim Status': g_row['itc_availability'],
-                        'ITC Claim Month': '',
-                        'A/C Month': '',
-                        'GSTR 2B Month': '',
-                        'GSTR1 Filing Month': '',
-                        'GSTR1 Filing Date': '',
-                        'Remark 2': '',
-                        'Remark 3': '',
-                        'Eligibility For ITC Books': 'Yes',
-                        'Eligibility For ITC 2B': g_row['itc_availability'],
-                        'Section Name': '',
-                        'A/C Reverse Charge': 'No',
-                        'GSTR 2B Reverse Charge': g_row['reverse_charge']
-                    })
-                    match_found = True
-                    break
-            
-            if not match_found:
-                not_in_gstr2b.append({
-                    'GSTIN': p_row['gstin'],
-                    'Name of Party': p_row['party_name'],
-                    'State Name': p_row['state'],
-                    'A/C Invoice No': p_row['invoice_no'],
-                    'A/C Date': p_row['invoice_date'],
-                    'A/C Taxable Value': p_row['taxable_value'],
-                    'Status': 'Not in GSTR2B',
-                    'Reason': 'Missing in GSTR2B'
-                })
-        
-        # Find GSTR2B records not in purchase
-        for _, g_row in gstr2b_df.iterrows():
-            match_found = False
-            for _, p_row in purchase_df.iterrows():
-                if (str(p_row['gstin']).strip() == str(g_row['supplier_gstin']).strip() and
-                    str(p_row['invoice_no']).strip() == str(g_row['invoice_no']).strip()):
-                    match_found = True
-                    break
-            
-            if not match_found:
-                not_in_books.append({
-                    'GSTIN': g_row['supplier_gstin'],
-                    'Name of Party': g_row['supplier_name'],
-                    'GSTR 2B Invoice No': g_row['invoice_no'],
-                    'GSTR 2B Date': g_row['invoice_date'],
-                    'GSTR 2B Taxable Value': g_row['taxable_value'],
-                    'Status': 'Not in Books',
-                    'Reason': 'Missing in Purchase Books'
-                })
-        
-        return {
-            'matched': pd.DataFrame(matched),
-            'not_in_gstr2b': pd.DataFrame(not_in_gstr2b),
-            'not_in_books': pd.DataFrame(not_in_books)
-        }
+    def detailed_reconciliation(self, purchase_df, gstr2b_df, report=None):
+        """ReconciliationResult over the two frames; tab tables are derived from it when shown"""
+        return reconcile_result(purchase_df, gstr2b_df, categories=GUI_CATEGORIES, columns=GUI_COLUMNS,
+                                progress=report)
     
     def display_results(self):
         # Clear existing tabs
@@ -243,65 +354,78 @@ class GSTReconciliationGUI:
         for widget in self.summary_frame.winfo_children():
             widget.destroy()
         
-        matched_count = len(self.results['matched'])
-        not_gstr2b_count = len(self.results['not_in_gstr2b'])
-        not_books_count = len(self.results['not_in_books'])
+        matched_count = self.results.count('matched')
+        not_gstr2b_count = self.results.count('not_in_gstr2b')
+        not_books_count = self.results.count('not_in_books')
         
         ttk.Label(self.summary_frame, text=f"✅ Matched: {matched_count}", foreground="green").grid(row=0, column=0, padx=10)
         ttk.Label(self.summary_frame, text=f"❌ Not in GSTR2B: {not_gstr2b_count}", foreground="red").grid(row=0, column=1, padx=10)
         ttk.Label(self.summary_frame, text=f"⚠️ Not in Books: {not_books_count}", foreground="orange").grid(row=0, column=2, padx=10)
         
         # Create tabs with data
-        self.create_data_tab("✅ Matched", self.results['matched'])
-        self.create_data_tab("❌ Not in GSTR2B", self.results['not_in_gstr2b'])
-        self.create_data_tab("⚠️ Not in Books", self.results['not_in_books'])
+        self.create_data_tab("✅ Matched", 'matched')
+        self.create_data_tab("❌ Not in GSTR2B", 'not_in_gstr2b')
+        self.create_data_tab("⚠️ Not in Books", 'not_in_books')
         
         # Export button
         export_btn = ttk.Button(self.summary_frame, text="📤 Export to Excel", command=self.export_results)
         export_btn.grid(row=0, column=3, padx=10)
     
-    def create_data_tab(self, title, df):
+    def create_data_tab(self, title, category):
         tab_frame = ttk.Frame(self.notebook)
         self.notebook.add(tab_frame, text=title)
         
-        # Create treeview
-        tree = ttk.Treeview(tab_frame)
-        tree.pack(fill=tk.BOTH, expand=True)
-        
-        if not df.empty:
-            # Configure columns
-            tree["columns"] = list(df.columns)
-            tree["show"] = "headings"
-            
-            for col in df.columns:
-                tree.heading(col, text=col)
-                tree.column(col, width=100)
-            
-            # Insert data
-            for _, row in df.iterrows():
-                tree.insert("", tk.END, values=list(row))
-        
-        # Add scrollbars
-        v_scrollbar = ttk.Scrollbar(tab_frame, orient=tk.VERTICAL, command=tree.yview)
-        v_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        tree.configure(yscrollcommand=v_scrollbar.set)
-        
-        h_scrollbar = ttk.Scrollbar(tab_frame, orient=tk.HORIZONTAL, command=tree.xview)
-        h_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
-        tree.configure(xscrollcommand=h_scrollbar.set)
+        # Filter bar: each keystroke is a lookup in the tab's prebuilt ResultIndex
+        filter_frame = ttk.Frame(tab_frame)
+        filter_frame.pack(side=tk.TOP, fill=tk.X, pady=(0, 5))
+        table_frame = ttk.Frame(tab_frame)
+        table_frame.pack(fill=tk.BOTH, expand=True)
+        table = VirtualTable(table_frame, self.results, category)
+        index = self.indexes[category]
+        
+        field = tk.StringVar(value=SEARCH_FIELDS[0])
+        text = tk.StringVar()
+        ttk.Label(filter_frame, text="🔍 Filter:").pack(side=tk.LEFT)
+        ttk.Combobox(filter_frame, textvariable=field, values=SEARCH_FIELDS, state="readonly", width=12).pack(side=tk.LEFT, padx=5)
+        ttk.Entry(filter_frame, textvariable=text, width=30).pack(side=tk.LEFT)
+        ttk.Button(filter_frame, text="Clear", command=lambda: text.set("")).pack(side=tk.LEFT, padx=5)
+        count_label = ttk.Label(filter_frame, text=f"{table.total:,} rows")
+        count_label.pack(side=tk.LEFT, padx=10)
+        
+        def apply_filter(*_):
+            rows = index.search(field.get(), text.get())
+            table.set_rows(rows)
+            count_label.config(text=f"{table.total:,} rows" if rows is None
+                               else f"{table.total:,} of {self.results.count(category):,} rows")
+        
+        field.trace_add("write", apply_filter)
+        text.trace_add("write", apply_filter)
     
     def export_results(self):
-        if self.results:
+        if self.results is not None:
             file_path = filedialog.asksaveasfilename(
                 defaultextension=".xlsx",
                 filetypes=[("Excel files", "*.xlsx")]
             )
             if file_path:
-                with pd.ExcelWriter(file_path) as writer:
-                    self.results['matched'].to_excel(writer, sheet_name='Matched', index=False)
-                    self.results['not_in_gstr2b'].to_excel(writer, sheet_name='Not_in_GSTR2B', index=False)
-                    self.results['not_in_books'].to_excel(writer, sheet_name='Not_in_Books', index=False)
-                messagebox.showinfo("Success", f"Results exported to {file_path}")
+                results = self.results
+                
+                def export(report):
+                    # Report rows are derived a block at a time as each sheet is written
+                    sheets = [results.export_sheet('Matched', 'matched'),
+                              results.export_sheet('Not_in_GSTR2B', 'not_in_gstr2b'),
+                              results.export_sheet('Not_in_Books', 'not_in_books')]
+                    export_workbook(file_path, sheets,
+                                    progress=lambda part, rows: report(f"{part}: {rows:,} rows written"))
+                
+                def cancelled():
+                    # Drop the partly written workbook
+                    if os.path.exists(file_path):
+                        os.remove(file_path)
+                
+                self.run_in_background("Exporting...", export,
+                                       lambda _: messagebox.showinfo("Success", f"Results exported to {file_path}"),
+                                       cancelled, "Error exporting results")
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -3,26 +3,17 @@ import sqlite3
 import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
+from reconciliation_engine import match_invoices, to_amount
+from parse_cache import cached_register
 
 class GSTReconciliation:
     def __init__(self):
         self.setup_databases()
     
     def setup_databases(self):
-        # Read and process purchase data
-        purchase_df = pd.read_excel('purchase.xlsx', skiprows=6)
-        purchase_df = purchase_df.dropna(how='all')
-        purchase_df.columns = ['gstin', 'party_name', 'state', 'invoice_no', 'invoice_date', 
-                              'rate', 'taxable_value', 'igst', 'cgst', 'sgst', 'cess', 'total_value']
-        
-        # Read and process gstr2b data
-        gstr2b_df = pd.read_excel('gstr2b.xlsx', skiprows=6)
-        gstr2b_df = gstr2b_df.dropna(how='all')
-        gstr2b_df.columns = ['supplier_gstin', 'supplier_name', 'invoice_no', 'invoice_type', 
-                            'invoice_date', 'invoice_value', 'place_of_supply', 'reverse_charge',
-                            'rate', 'taxable_value', 'igst', 'cgst', 'sgst', 'cess', 'period',
-                            'filing_date', 'itc_availability', 'reason', 'tax_rate_percent', 
-                            'source', 'irn_no', 'irn_date']
+        # Read and process purchase and gstr2b data (cached until the files change)
+        purchase_df = cached_register('purchase.xlsx', 'purchase', skip_rows=6)
+        gstr2b_df = cached_register('gstr2b.xlsx', 'gstr2b', skip_rows=6)
         
         # Save to databases
         conn = sqlite3.connect('gst_data.db')
@@ -35,59 +26,33 @@ class GSTReconciliation:
     
     def perform_reconciliation(self):
         # Match on GSTIN and Invoice Number
-        matched = []
-        unmatched_purchase = []
-        unmatched_gstr2b = []
+        result = match_invoices(self.purchase_df, self.gstr2b_df)
+        p_rows = self.purchase_df.iloc[result['matched'][0]]
+        g_rows = self.gstr2b_df.iloc[result['matched'][1]]
         
-        for _, purchase_row in self.purchase_df.iterrows():
-            match_found = False
-            for _, gstr2b_row in self.gstr2b_df.iterrows():
-                if (str(purchase_row['gstin']).strip() == str(gstr2b_row['supplier_gstin']).strip() and
-                    str(purchase_row['invoice_no']).strip() == str(gstr2b_row['invoice_no']).strip()):
-                    
-                    matched.append({
-                        'gstin': purchase_row['gstin'],
-                        'party_name': purchase_row['party_name'],
-                        'invoice_no': purchase_row['invoice_no'],
-                        'purchase_value': purchase_row['taxable_value'],
-                        'gstr2b_value': gstr2b_row['taxable_value'],
-                        'difference': float(purchase_row['taxable_value'] or 0) - float(gstr2b_row['taxable_value'] or 0),
-                        'status': 'Matched'
-                    })
-                    match_found = True
-                    break
-            
-            if not match_found:
-                unmatched_purchase.append({
-                    'gstin': purchase_row['gstin'],
-                    'party_name': purchase_row['party_name'],
-                    'invoice_no': purchase_row['invoice_no'],
-                    'taxable_value': purchase_row['taxable_value'],
-                    'status': 'Not in GSTR2B'
-                })
+        matched = pd.DataFrame({
+            'gstin': p_rows['gstin'].values,
+            'party_name': p_rows['party_name'].values,
+            'invoice_no': p_rows['invoice_no'].values,
+            'purchase_value': p_rows['taxable_value'].values,
+            'gstr2b_value': g_rows['taxable_value'].values,
+            'difference': to_amount(p_rows['taxable_value']) - to_amount(g_rows['taxable_value']),
+            'status': 'Matched'
+        })
         
-        # Find GSTR2B entries not in purchase
-        for _, gstr2b_row in self.gstr2b_df.iterrows():
-            match_found = False
-            for _, purchase_row in self.purchase_df.iterrows():
-                if (str(purchase_row['gstin']).strip() == str(gstr2b_row['supplier_gstin']).strip() and
-                    str(purchase_row['invoice_no']).strip() == str(gstr2b_row['invoice_no']).strip()):
-                    match_found = True
-                    break
-            
-            if not match_found:
-                unmatched_gstr2b.append({
-                    'supplier_gstin': gstr2b_row['supplier_gstin'],
-                    'supplier_name': gstr2b_row['supplier_name'],
-                    'invoice_no': gstr2b_row['invoice_no'],
-                    'taxable_value': gstr2b_row['taxable_value'],
-                    'status': 'Not in Books'
-                })
+        unmatched_purchase = self.purchase_df.iloc[result['not_in_gstr2b']][
+            ['gstin', 'party_name', 'invoice_no', 'taxable_value']].reset_index(drop=True)
+        unmatched_purchase['status'] = 'Not in GSTR2B'
+        
+        # GSTR2B entries not in purchase
+        unmatched_gstr2b = self.gstr2b_df.iloc[result['not_in_books']][
+            ['supplier_gstin', 'supplier_name', 'invoice_no', 'taxable_value']].reset_index(drop=True)
+        unmatched_gstr2b['status'] = 'Not in Books'
         
         return {
-            'matched': pd.DataFrame(matched),
-            'not_in_gstr2b': pd.DataFrame(unmatched_purchase),
-            'not_in_books': pd.DataFrame(unmatched_gstr2b)
+            'matched': matched,
+            'not_in_gstr2b': unmatched_purchase,
+            'not_in_books': unmatched_gstr2b
         }
 
 def main():
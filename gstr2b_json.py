@@ -0,0 +1,266 @@
+import json
+import sys
+import pandas as pd
+from excel_loader import concat_chunks, CHUNK_ROWS, GSTR2B_COLUMNS
+from reconciliation_engine import add_match_keys
+from master_db import GSTR2B_STANDARD_SCHEMA
+from bulk_loader import connect, bulk_load
+
+# Characters read from the file at a time
+READ_CHARS = 1 << 16
+
+# Objects passed through on the way to the B2B invoices: the portal
+# download nests them under data -> docdata -> b2b
+WRAPPER_KEYS = ('data', 'docdata')
+B2B_KEY = 'b2b'
+
+# GSTR2B column -> portal JSON field, per level of b2b -> supplier -> inv -> items
+SUPPLIER_FIELDS = {
+    'supplier_gstin': 'ctin',
+    'supplier_name': 'trdnm',
+    'period': 'supprd',
+    'filing_date': 'supfildt'
+}
+
+INVOICE_FIELDS = {
+    'invoice_no': 'inum',
+    'invoice_type': 'typ',
+    'invoice_date': 'dt',
+    'invoice_value': 'val',
+    'place_of_supply': 'pos',
+    'reverse_charge': 'rev',
+    'itc_availability': 'itcavl',
+    'reason': 'rsn',
+    'tax_rate_percent': 'diffprcnt',
+    'source': 'srctyp',
+    'irn_no': 'irn',
+    'irn_date': 'irngendate'
+}
+
+# Items name the tax heads igst / cgst / ...; itm_det style items (as in
+# GSTR-2A) use iamt / camt / ..., the first name present is used
+ITEM_FIELDS = {
+    'rate': ('rt',),
+    'taxable_value': ('txval',),
+    'igst': ('igst', 'iamt'),
+    'cgst': ('cgst', 'camt'),
+    'sgst': ('sgst', 'samt'),
+    'cess': ('cess', 'csamt')
+}
+
+# Portal codes spelled out as in the portal's Excel download
+YES_NO = {'Y': 'Yes', 'N': 'No'}
+INVOICE_TYPES = {
+    'R': 'Regular',
+    'SEWP': 'SEZ supplies with payment',
+    'SEWOP': 'SEZ supplies without payment',
+    'DE': 'Deemed Exp',
+    'CBW': 'Intra-State Supplies attracting IGST'
+}
+CODES = {'invoice_type': INVOICE_TYPES, 'reverse_charge': YES_NO, 'itc_availability': YES_NO}
+
+# The portal leaves out tax heads that do not apply to an item
+AMOUNT_COLUMNS = ['taxable_value', 'igst', 'cgst', 'sgst', 'cess']
+
+
+class JsonStream:
+    """Pull parser over a JSON text file.
+
+    Containers are walked with members() / items(); a value the caller
+    wants is decoded with value() (json's C decoder, on just that value)
+    and anything else is skipped with skip() without being built. Only the
+    value being decoded and one read block are held, never the document.
+    """
+
+    def __init__(self, file, read_chars=READ_CHARS):
+        self.file = file
+        self.read_chars = read_chars
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        # Read at least as much as is pending, so retrying a long value stays linear
+        chunk = self.file.read(max(self.read_chars, len(self.buffer) - self.pos))
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        self.eof = not chunk
+
+    def peek(self):
+        """Next non-blank character ('' at the end of the file)"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buffer) or self.eof:
+                return self.buffer[self.pos:self.pos + 1]
+            self._fill()
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f'Expected {char!r} in JSON but found {found or "end of file"!r}')
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A number running into the end of the buffer may continue in the next block
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def members(self):
+        """Yield the keys of the next object; the caller consumes each value"""
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            yield key
+            if self.peek() == ',':
+                self.pos += 1
+            else:
+                self.expect('}')
+                return
+
+    def items(self):
+        """Yield once per element of the next array; the caller consumes each element"""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield
+            if self.peek() == ',':
+                self.pos += 1
+            else:
+                self.expect(']')
+                return
+
+    def skip(self):
+        """Step over the next value without building it"""
+        char = self.peek()
+        if char == '{':
+            for _ in self.members():
+                self.skip()
+        elif char == '[':
+            for _ in self.items():
+                self.skip()
+        else:
+            self.value()
+
+
+def _code(column, value):
+    return CODES[column].get(value, value) if column in CODES else value
+
+
+def invoice_rows(invoice):
+    """GSTR2B rows (one per rate item) of one portal invoice, without the supplier columns"""
+    row = {column: _code(column, invoice.get(field)) for column, field in INVOICE_FIELDS.items()}
+    if row['tax_rate_percent'] is not None:
+        # diffprcnt is a fraction (0.65); the Excel download shows a percentage
+        row['tax_rate_percent'] = row['tax_rate_percent'] * 100
+    rows = []
+    for item in invoice.get('items') or [{}]:
+        item = item.get('itm_det', item)
+        item_row = dict(row)
+        for column, fields in ITEM_FIELDS.items():
+            value = next((item[field] for field in fields if field in item), None)
+            item_row[column] = 0.0 if value is None and column in AMOUNT_COLUMNS else value
+        rows.append(item_row)
+    return rows
+
+
+def _supplier_rows(stream):
+    # Supplier fields usually come before inv; rows are only held back until they are known
+    supplier = {}
+    pending = []
+    for key in stream.members():
+        if key == 'inv':
+            for _ in stream.items():
+                rows = invoice_rows(stream.value())
+                if 'ctin' in supplier:
+                    columns = _supplier_columns(supplier)
+                    for row in rows:
+                        yield {**row, **columns}
+                else:
+                    pending.extend(rows)
+        else:
+            supplier[key] = stream.value()
+    columns = _supplier_columns(supplier)
+    for row in pending:
+        yield {**row, **columns}
+
+
+def _supplier_columns(supplier):
+    return {column: supplier.get(field) for column, field in SUPPLIER_FIELDS.items()}
+
+
+def _b2b_rows(stream):
+    for key in stream.members():
+        if key in WRAPPER_KEYS and stream.peek() == '{':
+            yield from _b2b_rows(stream)
+        elif key == B2B_KEY:
+            for _ in stream.items():
+                yield from _supplier_rows(stream)
+        else:
+            stream.skip()
+
+
+def iter_gstr2b_json(path, chunk_size=CHUNK_ROWS):
+    """Stream a portal GSTR-2B JSON download as DataFrames of GSTR2B_COLUMNS.
+
+    Rows are the B2B invoices, one per rate item, like the portal's Excel
+    download. The file is parsed incrementally: at most chunk_size rows
+    and one invoice are held at a time. At least one frame, maybe empty,
+    is always yielded. Other sections (cdnr, b2ba, ...) are skipped.
+    """
+    with open(path, encoding='utf-8-sig') as f:
+        batch = []
+        yielded = False
+        for row in _b2b_rows(JsonStream(f)):
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                yield pd.DataFrame.from_records(batch, columns=GSTR2B_COLUMNS)
+                batch = []
+                yielded = True
+        if batch or not yielded:
+            yield pd.DataFrame.from_records(batch, columns=GSTR2B_COLUMNS)
+
+
+def read_gstr2b_json(path):
+    """A portal GSTR-2B JSON download as one frame of GSTR2B_COLUMNS"""
+    return concat_chunks(iter_gstr2b_json(path))
+
+
+def load_gstr2b_json(path, db_path='gstr2b_standard.db', table='gstr2b_data', chunk_size=CHUNK_ROWS):
+    """Load a portal GSTR-2B JSON download into the standard GSTR2B table, like the mapping tools do"""
+
+    def standardized():
+        for df in iter_gstr2b_json(path, chunk_size):
+            df = df[list(GSTR2B_STANDARD_SCHEMA)].copy()
+            # Canonical matching keys, computed once per row at load time
+            yield add_match_keys(df, 'supplier_gstin')
+
+    conn = connect(db_path)
+    try:
+        return bulk_load(conn, table, standardized(), GSTR2B_STANDARD_SCHEMA)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else 'gstr2b.json'
+    print(f"\n📂 Loading GSTR-2B JSON {path}...")
+    count = load_gstr2b_json(path)
+    print(f"✅ GSTR2B: {count} records stored in gstr2b_standard.db")
@@ -0,0 +1,198 @@
+import sqlite3
+import numpy as np
+import pandas as pd
+from reconciliation_engine import match_invoices, to_amount, tax_amount, add_match_keys, GSTIN_KEY, INVOICE_KEY
+from bulk_loader import insert_frames
+
+RESULTS_DB = 'reconciliation_results.db'
+RESULT_TABLES = ['matched', 'not_in_gstr2b', 'not_in_books']
+KEY_COLUMNS = [GSTIN_KEY, INVOICE_KEY]
+
+# Per-key content hash and outcome of the last run, plus which result
+# layout (set of tables/columns) that run wrote
+STATE_TABLE = 'reconciliation_state'
+META_TABLE = 'reconciliation_meta'
+
+# Bump when the hashing or the match keys change so stored state is not trusted any more
+STATE_VERSION = 2
+
+
+def with_match_keys(df, gstin_col):
+    """df with the canonical key columns, computed on a copy if they are missing"""
+    if GSTIN_KEY in df.columns and INVOICE_KEY in df.columns:
+        return df
+    return add_match_keys(df.copy(), gstin_col)
+
+
+# Layout of the tables build_results returns; change it with their columns
+RESULTS_LAYOUT = 'build_results_v1'
+
+
+def build_results(purchase_df, gstr2b_df):
+    """Result tables (one per RESULT_TABLES name) for the given rows, carrying the match key columns"""
+    purchase_df = with_match_keys(purchase_df, 'gstin')
+    gstr2b_df = with_match_keys(gstr2b_df, 'supplier_gstin')
+    result = match_invoices(purchase_df, gstr2b_df)
+    p_rows = purchase_df.iloc[result['matched'][0]]
+    g_rows = gstr2b_df.iloc[result['matched'][1]]
+
+    matched = pd.DataFrame({
+        'gstin': p_rows['gstin'].values,
+        'party_name': p_rows['party_name'].values,
+        'invoice_no': p_rows['invoice_no'].values,
+        'purchase_value': p_rows['taxable_value'].values,
+        'gstr2b_value': g_rows['taxable_value'].values,
+        'difference': to_amount(p_rows['taxable_value']) - to_amount(g_rows['taxable_value']),
+        'tax': tax_amount(p_rows),
+        GSTIN_KEY: p_rows[GSTIN_KEY].values,
+        INVOICE_KEY: p_rows[INVOICE_KEY].values
+    })
+
+    p_missing = purchase_df.iloc[result['not_in_gstr2b']]
+    not_in_gstr2b = p_missing[['gstin', 'party_name', 'invoice_no', 'taxable_value'] + KEY_COLUMNS].assign(
+        tax=tax_amount(p_missing)).reset_index(drop=True)
+    g_missing = gstr2b_df.iloc[result['not_in_books']]
+    not_in_books = g_missing[['supplier_gstin', 'supplier_name', 'invoice_no', 'taxable_value'] + KEY_COLUMNS].assign(
+        tax=tax_amount(g_missing)).reset_index(drop=True)
+
+    return {'matched': matched, 'not_in_gstr2b': not_in_gstr2b, 'not_in_books': not_in_books}
+
+
+def row_hashes(df):
+    """64-bit content hash of every row, ignoring the derived key columns"""
+    data = df.drop(columns=KEY_COLUMNS, errors='ignore')
+    return pd.util.hash_pandas_object(data, index=False).to_numpy()
+
+
+def key_state(purchase_df, gstr2b_df):
+    """One row per (GSTIN key, invoice key) with a hash and the outcome it produces.
+
+    A key's result depends only on the rows of both registers carrying it,
+    in order (the first GSTR2B row wins), so the hash covers exactly those.
+    """
+    sides = []
+    for is_purchase, df in ((True, purchase_df), (False, gstr2b_df)):
+        sides.append(pd.DataFrame({
+            GSTIN_KEY: df[GSTIN_KEY].to_numpy(),
+            INVOICE_KEY: df[INVOICE_KEY].to_numpy(),
+            'is_purchase': is_purchase,
+            'row_hash': row_hashes(df)
+        }))
+    rows = pd.concat(sides, ignore_index=True)
+
+    # Mix each row hash with its position within the key so the order counts,
+    # then add the mixed hashes up per key in two exact 32-bit halves
+    rows['position'] = rows.groupby(KEY_COLUMNS, sort=False).cumcount()
+    mixed = pd.util.hash_pandas_object(rows[['is_purchase', 'position', 'row_hash']], index=False).to_numpy()
+    rows['hash_low'] = (mixed & 0xFFFFFFFF).astype(np.int64)
+    rows['hash_high'] = (mixed >> 32).astype(np.int64)
+
+    state = rows.groupby(KEY_COLUMNS, sort=False).agg(
+        hash_low=('hash_low', 'sum'),
+        hash_high=('hash_high', 'sum'),
+        purchase_rows=('is_purchase', 'sum'),
+        rows=('is_purchase', 'size')
+    ).reset_index()
+    state['key_hash'] = pd.util.hash_pandas_object(
+        state[['hash_low', 'hash_high', 'purchase_rows', 'rows']], index=False).astype(str).to_numpy()
+
+    in_books = (state['purchase_rows'] > 0).to_numpy()
+    in_gstr2b = (state['rows'] > state['purchase_rows']).to_numpy()
+    state['outcome'] = np.select([in_books & in_gstr2b, in_books], ['matched', 'not_in_gstr2b'], 'not_in_books')
+    return state[KEY_COLUMNS + ['key_hash', 'outcome']]
+
+
+def _table_columns(conn, table):
+    return [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+
+
+def stored_state(conn, layout):
+    """Key state of the last run, or None when the stored results cannot be patched"""
+    if not _table_columns(conn, STATE_TABLE) or not _table_columns(conn, META_TABLE):
+        return None
+    meta = dict(conn.execute(f'SELECT name, value FROM {META_TABLE}').fetchall())
+    if meta.get('layout') != layout or meta.get('version') != str(STATE_VERSION):
+        return None
+    # Another script may have replaced a result table with one lacking the keys
+    for table in RESULT_TABLES:
+        if not set(KEY_COLUMNS) <= set(_table_columns(conn, table)):
+            return None
+    return pd.read_sql_query(f'SELECT {GSTIN_KEY}, {INVOICE_KEY}, key_hash FROM {STATE_TABLE}', conn)
+
+
+def _rows_with_keys(df, keys):
+    index = pd.MultiIndex.from_arrays([df[GSTIN_KEY], df[INVOICE_KEY]])
+    return df[index.isin(keys)]
+
+
+def _write_full(conn, results, state, layout):
+    for table in RESULT_TABLES:
+        results[table].to_sql(table, conn, if_exists='replace', index=False)
+        conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_keys ON {table} ({GSTIN_KEY}, {INVOICE_KEY})')
+    state.to_sql(STATE_TABLE, conn, if_exists='replace', index=False)
+    conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS idx_{STATE_TABLE}_keys ON {STATE_TABLE} ({GSTIN_KEY}, {INVOICE_KEY})')
+    conn.execute(f'DROP TABLE IF EXISTS {META_TABLE}')
+    conn.execute(f'CREATE TABLE {META_TABLE} (name TEXT PRIMARY KEY, value TEXT)')
+    conn.executemany(f'INSERT INTO {META_TABLE} VALUES (?, ?)', [('layout', layout), ('version', str(STATE_VERSION))])
+    conn.commit()
+
+
+def _patch(conn, results, state, changed):
+    # Deletes and inserts share one transaction, so a failure part way
+    # leaves the previous results in place rather than rows missing
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute('BEGIN')
+    try:
+        conn.execute(f'CREATE TEMP TABLE IF NOT EXISTS changed_keys ({GSTIN_KEY} TEXT, {INVOICE_KEY} TEXT)')
+        conn.execute('DELETE FROM changed_keys')
+        conn.executemany('INSERT INTO changed_keys VALUES (?, ?)', changed.itertuples(index=False, name=None))
+        for table in RESULT_TABLES + [STATE_TABLE]:
+            conn.execute(
+                f'DELETE FROM {table} WHERE ({GSTIN_KEY}, {INVOICE_KEY}) IN '
+                f'(SELECT {GSTIN_KEY}, {INVOICE_KEY} FROM changed_keys)'
+            )
+        for table in RESULT_TABLES:
+            insert_frames(conn, table, [results[table]])
+        insert_frames(conn, STATE_TABLE, [state])
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+def reconcile_incremental(purchase_df, gstr2b_df, build_results, layout, db_path=RESULTS_DB):
+    """Bring the result tables in db_path up to date, rematching only changed keys.
+
+    build_results(purchase_df, gstr2b_df) returns a frame per RESULT_TABLES
+    name, each carrying the GSTIN / invoice key columns. layout names the
+    shape of those frames; when it differs from the stored one, or there is
+    no usable state, every table is rebuilt. Keys whose rows were inserted,
+    changed or deleted since the last run have their result rows deleted
+    and only their rows are matched again. Returns the number of keys
+    rematched.
+    """
+    purchase_df = with_match_keys(purchase_df, 'gstin')
+    gstr2b_df = with_match_keys(gstr2b_df, 'supplier_gstin')
+    state = key_state(purchase_df, gstr2b_df)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        previous = stored_state(conn, layout)
+        if previous is None:
+            _write_full(conn, build_results(purchase_df, gstr2b_df), state, layout)
+            return len(state)
+
+        # Keys that are new, gone, or whose rows hash differently
+        merged = state.merge(previous, on=KEY_COLUMNS, how='outer', suffixes=('', '_old'))
+        changed = merged.loc[merged['key_hash'] != merged['key_hash_old'], KEY_COLUMNS]
+        if changed.empty:
+            return 0
+
+        keys = pd.MultiIndex.from_frame(changed)
+        results = build_results(_rows_with_keys(purchase_df, keys), _rows_with_keys(gstr2b_df, keys))
+        _patch(conn, results, _rows_with_keys(state, keys), changed)
+        return len(changed)
+    finally:
+        conn.close()
+
@@ -1,6 +1,15 @@
 import pandas as pd
 import sqlite3
 import os
+from reconciliation_engine import add_match_keys
+from incremental import reconcile_incremental, build_results, RESULTS_DB, RESULTS_LAYOUT
+from results_store import snapshot_run, run_counts, read_run
+from excel_loader import iter_table_chunks, PURCHASE_COLUMNS, GSTR2B_COLUMNS
+from purchase_register import iter_purchase_register, PURCHASE_FILES
+from master_db import (create_indexes, reconcile_in_sqlite, MASTER_DB,
+                       PURCHASE_TABLE, GSTR2B_TABLE, PURCHASE_SCHEMA, GSTR2B_SCHEMA)
+from bulk_loader import connect, bulk_load
+from excel_export import export_workbook
 
 def main_menu():
     print("\n" + "="*50)
@@ -8,128 +17,98 @@ def main_menu():
     print("="*50)
     print("1. Process Excel Files & Create Databases")
     print("2. Run GST Reconciliation")
-    print("3. View Reconciliation Results")
-    print("4. Export Results to Excel")
-    print("5. Start Web Dashboard")
-    print("6. Exit")
+    print("3. Run GST Reconciliation in SQLite (large datasets)")
+    print("4. View Reconciliation Results")
+    print("5. Export Results to Excel")
+    print("6. Start Web Dashboard")
+    print("7. Exit")
     print("="*50)
     
-    choice = input("Enter your choice (1-6): ")
+    choice = input("Enter your choice (1-7): ")
     return choice
 
 def process_excel_files():
     print("\n📊 Processing Excel Files...")
     
-    # Read and clean purchase data
-    purchase_df = pd.read_excel('purchase.xlsx', skiprows=6)
-    purchase_df = purchase_df.dropna(how='all')
-    purchase_df.columns = ['gstin', 'party_name', 'state', 'invoice_no', 'invoice_date', 
-                          'rate', 'taxable_value', 'igst', 'cgst', 'sgst', 'cess', 'total_value']
-    
-    # Read and clean gstr2b data
-    gstr2b_df = pd.read_excel('gstr2b.xlsx', skiprows=6)
-    gstr2b_df = gstr2b_df.dropna(how='all')
-    gstr2b_df.columns = ['supplier_gstin', 'supplier_name', 'invoice_no', 'invoice_type', 
-                        'invoice_date', 'invoice_value', 'place_of_supply', 'reverse_charge',
-                        'rate', 'taxable_value', 'igst', 'cgst', 'sgst', 'cess', 'period',
-                        'filing_date', 'itc_availability', 'reason', 'tax_rate_percent', 
-                        'source', 'irn_no', 'irn_date']
-    
-    # Save to databases
-    conn = sqlite3.connect('gst_master.db')
-    purchase_df.to_sql('purchase_data', conn, if_exists='replace', index=False)
-    gstr2b_df.to_sql('gstr2b_data', conn, if_exists='replace', index=False)
+    # Stream both registers into typed tables chunk by chunk, with the
+    # canonical matching keys computed once and stored alongside
+    conn = connect(MASTER_DB)
+    # Tally XML / CSV exports are read directly when there is no purchase.xlsx
+    purchase_file = next((name for name in PURCHASE_FILES if os.path.exists(name)), PURCHASE_FILES[0])
+    if purchase_file == 'purchase.xlsx':
+        purchase_chunks = iter_table_chunks(purchase_file, skip_rows=6, columns=PURCHASE_COLUMNS)
+    else:
+        print(f"📂 Reading purchase register from {purchase_file}")
+        purchase_chunks = iter_purchase_register(purchase_file)
+    purchase_count = bulk_load(
+        conn, PURCHASE_TABLE, (add_match_keys(chunk, 'gstin') for chunk in purchase_chunks), PURCHASE_SCHEMA)
+    gstr2b_chunks = iter_table_chunks('gstr2b.xlsx', skip_rows=6, columns=GSTR2B_COLUMNS)
+    gstr2b_count = bulk_load(
+        conn, GSTR2B_TABLE, (add_match_keys(chunk, 'supplier_gstin') for chunk in gstr2b_chunks), GSTR2B_SCHEMA)
+    create_indexes(conn, PURCHASE_TABLE)
+    create_indexes(conn, GSTR2B_TABLE)
+    conn.commit()
     conn.close()
     
-    print(f"✅ Purchase records processed: {len(purchase_df)}")
-    print(f"✅ GSTR2B records processed: {len(gstr2b_df)}")
+    print(f"✅ Purchase records processed: {purchase_count}")
+    print(f"✅ GSTR2B records processed: {gstr2b_count}")
     print("✅ Databases created successfully!")
 
 def run_reconciliation():
     print("\n🔄 Running GST Reconciliation...")
     
-    conn = sqlite3.connect('gst_master.db')
-    purchase_df = pd.read_sql_query("SELECT * FROM purchase_data", conn)
-    gstr2b_df = pd.read_sql_query("SELECT * FROM gstr2b_data", conn)
+    conn = sqlite3.connect(MASTER_DB)
+    purchase_df = pd.read_sql_query(f"SELECT * FROM {PURCHASE_TABLE}", conn)
+    gstr2b_df = pd.read_sql_query(f"SELECT * FROM {GSTR2B_TABLE}", conn)
     conn.close()
     
-    matched = []
-    not_in_gstr2b = []
-    not_in_books = []
+    # Only keys whose rows changed since the last run are matched again
+    rematched = reconcile_incremental(purchase_df, gstr2b_df, build_results, RESULTS_LAYOUT)
+    run_id = snapshot_run('main')
     
-    # Find matches
-    for _, p_row in purchase_df.iterrows():
-        match_found = False
-        for _, g_row in gstr2b_df.iterrows():
-            if (str(p_row['gstin']).strip() == str(g_row['supplier_gstin']).strip() and
-                str(p_row['invoice_no']).strip() == str(g_row['invoice_no']).strip()):
-                matched.append({
-                    'gstin': p_row['gstin'],
-                    'party_name': p_row['party_name'],
-                    'invoice_no': p_row['invoice_no'],
-                    'purchase_value': p_row['taxable_value'],
-                    'gstr2b_value': g_row['taxable_value'],
-                    'difference': float(p_row['taxable_value'] or 0) - float(g_row['taxable_value'] or 0)
-                })
-                match_found = True
-                break
-        
-        if not match_found:
-            not_in_gstr2b.append({
-                'gstin': p_row['gstin'],
-                'party_name': p_row['party_name'],
-                'invoice_no': p_row['invoice_no'],
-                'taxable_value': p_row['taxable_value']
-            })
+    conn = sqlite3.connect(RESULTS_DB)
+    counts = run_counts(conn, run_id)
+    conn.close()
     
-    # Find GSTR2B records not in purchase
-    for _, g_row in gstr2b_df.iterrows():
-        match_found = False
-        for _, p_row in purchase_df.iterrows():
-            if (str(p_row['gstin']).strip() == str(g_row['supplier_gstin']).strip() and
-                str(p_row['invoice_no']).strip() == str(g_row['invoice_no']).strip()):
-                match_found = True
-                break
-        
-        if not match_found:
-            not_in_books.append({
-                'supplier_gstin': g_row['supplier_gstin'],
-                'supplier_name': g_row['supplier_name'],
-                'invoice_no': g_row['invoice_no'],
-                'taxable_value': g_row['taxable_value']
-            })
+    print(f"🔁 Keys rematched: {rematched} (run {run_id})")
+    print(f"✅ Matched Records: {counts['matched']}")
+    print(f"❌ Not in GSTR2B: {counts['not_in_gstr2b']}")
+    print(f"⚠️ Not in Books: {counts['not_in_books']}")
+    print("✅ Reconciliation completed!")
+
+def run_sql_reconciliation():
+    print("\n🔄 Running GST Reconciliation inside SQLite...")
     
-    # Save results
-    conn = sqlite3.connect('reconciliation_results.db')
-    if matched:
-        pd.DataFrame(matched).to_sql('matched', conn, if_exists='replace', index=False)
-    if not_in_gstr2b:
-        pd.DataFrame(not_in_gstr2b).to_sql('not_in_gstr2b', conn, if_exists='replace', index=False)
-    if not_in_books:
-        pd.DataFrame(not_in_books).to_sql('not_in_books', conn, if_exists='replace', index=False)
-    conn.close()
+    try:
+        counts = reconcile_in_sqlite()
+        run_id = snapshot_run('main_sqlite')
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        print("Please process the Excel files first!")
+        return
     
-    print(f"✅ Matched Records: {len(matched)}")
-    print(f"❌ Not in GSTR2B: {len(not_in_gstr2b)}")
-    print(f"⚠️ Not in Books: {len(not_in_books)}")
+    print(f"🗂️ Stored as run {run_id}")
+    print(f"✅ Matched Records: {counts['matched']}")
+    print(f"❌ Not in GSTR2B: {counts['not_in_gstr2b']}")
+    print(f"⚠️ Not in Books: {counts['not_in_books']}")
     print("✅ Reconciliation completed!")
 
 def view_results():
     print("\n📋 Reconciliation Results:")
     
     try:
-        conn = sqlite3.connect('reconciliation_results.db')
+        conn = sqlite3.connect(RESULTS_DB)
         
         print("\n✅ MATCHED RECORDS:")
-        matched_df = pd.read_sql_query("SELECT * FROM matched LIMIT 5", conn)
+        matched_df = read_run(conn, 'matched', limit=5)
         print(matched_df.to_string(index=False))
         
         print("\n❌ NOT IN GSTR2B:")
-        not_gstr2b_df = pd.read_sql_query("SELECT * FROM not_in_gstr2b LIMIT 5", conn)
+        not_gstr2b_df = read_run(conn, 'not_in_gstr2b', limit=5)
         print(not_gstr2b_df.to_string(index=False))
         
         print("\n⚠️ NOT IN BOOKS:")
-        not_books_df = pd.read_sql_query("SELECT * FROM not_in_books LIMIT 5", conn)
+        not_books_df = read_run(conn, 'not_in_books', limit=5)
         print(not_books_df.to_string(index=False))
         
         conn.close()
@@ -141,19 +120,22 @@ def export_results():
     print("\n📤 Exporting Results to Excel...")
     
     try:
-        conn = sqlite3.connect('reconciliation_results.db')
+        conn = sqlite3.connect(RESULTS_DB)
+        
+        matched_df = read_run(conn, 'matched')
+        not_gstr2b_df = read_run(conn, 'not_in_gstr2b')
+        not_books_df = read_run(conn, 'not_in_books')
         
-        with pd.ExcelWriter('GST_Reconciliation_Report.xlsx') as writer:
-            matched_df = pd.read_sql_query("SELECT * FROM matched", conn)
-            not_gstr2b_df = pd.read_sql_query("SELECT * FROM not_in_gstr2b", conn)
-            not_books_df = pd.read_sql_query("SELECT * FROM not_in_books", conn)
-            
-            matched_df.to_excel(writer, sheet_name='Matched', index=False)
-            not_gstr2b_df.to_excel(writer, sheet_name='Not_in_GSTR2B', index=False)
-            not_books_df.to_excel(writer, sheet_name='Not_in_Books', index=False)
+        # Streamed in constant memory; a category over Excel's row limit
+        # continues on further sheets (Matched_2, ...)
+        parts = export_workbook('GST_Reconciliation_Report.xlsx', [
+            ('Matched', matched_df), ('Not_in_GSTR2B', not_gstr2b_df), ('Not_in_Books', not_books_df)])
         
         conn.close()
         print("✅ Excel report saved as 'GST_Reconciliation_Report.xlsx'")
+        for sheet_name, names in parts.items():
+            if len(names) > 1:
+                print(f"   {sheet_name} continues on: {', '.join(names[1:])}")
     except Exception as e:
         print(f"❌ Error: {e}")
 
@@ -176,12 +158,14 @@ def main():
         elif choice == '2':
             run_reconciliation()
         elif choice == '3':
-            view_results()
+            run_sql_reconciliation()
         elif choice == '4':
-            export_results()
+            view_results()
         elif choice == '5':
-            start_dashboard()
+            export_results()
         elif choice == '6':
+            start_dashboard()
+        elif choice == '7':
             print("\n👋 Thank you for using GST Reconciliation System!")
             break
         else:
@@ -1,35 +1,26 @@
 import pandas as pd
-import sqlite3
 import json
 import os
+from excel_loader import read_sheet, find_data_start, table_from_sheet, HEADER_SCAN_ROWS
+from master_db import PURCHASE_STANDARD_SCHEMA, GSTR2B_STANDARD_SCHEMA
+from bulk_loader import connect, bulk_load
+from reconciliation_engine import add_match_keys
 
 class ExcelMappingTool:
     def __init__(self):
-        self.purchase_standard_columns = [
-            'gstin', 'party_name', 'state', 'invoice_no', 'invoice_date', 
-            'rate', 'taxable_value', 'igst', 'cgst', 'sgst', 'cess'
-        ]
-        self.gstr2b_standard_columns = [
-            'supplier_gstin', 'supplier_name', 'invoice_no', 'invoice_type', 
-            'invoice_date', 'invoice_value', 'place_of_supply', 'rate', 
-            'taxable_value', 'igst', 'cgst', 'sgst', 'cess', 'itc_availability'
-        ]
+        self.purchase_standard_columns = list(PURCHASE_STANDARD_SCHEMA)
+        self.gstr2b_standard_columns = list(GSTR2B_STANDARD_SCHEMA)
         
-    def find_main_table(self, file_path):
+    def find_main_table(self, sheet):
         """Find main table by checking rows with min 5 columns"""
-        df = pd.read_excel(file_path)
-        for i in range(len(df)):
-            test_df = pd.read_excel(file_path, skiprows=i)
-            if len(test_df.columns) >= 5 and not test_df.empty:
-                non_null_count = test_df.iloc[0].count()
-                if non_null_count >= 5:
-                    return i
-        return 0
+        return find_data_start(sheet)
     
     def create_mapping(self, file_path, db_type):
         """Create column mapping for Excel to database"""
-        skip_rows = self.find_main_table(file_path)
-        df = pd.read_excel(file_path, skiprows=skip_rows)
+        # Only the header is needed here, so parse just the top of the sheet
+        sheet = read_sheet(file_path, nrows=HEADER_SCAN_ROWS)
+        skip_rows = self.find_main_table(sheet)
+        df = table_from_sheet(sheet, skip_rows)
         
         print(f"\nFound columns in {db_type} Excel:")
         for i, col in enumerate(df.columns):
@@ -79,10 +70,12 @@ class ExcelMappingTool:
         
         return mapped_df
     
-    def create_database(self, df, db_name, table_name):
-        """Create database with standardized data"""
-        conn = sqlite3.connect(f'{db_name}.db')
-        df.to_sql(table_name, conn, if_exists='replace', index=False)
+    def create_database(self, df, db_name, table_name, schema=None, gstin_col='gstin'):
+        """Create database with standardized data, using the declared column types"""
+        # Canonical matching keys, computed once per row at load time
+        add_match_keys(df, gstin_col)
+        conn = connect(f'{db_name}.db')
+        bulk_load(conn, table_name, [df], schema)
         conn.close()
         print(f"Database {db_name}.db created with {len(df)} records")
 
@@ -101,7 +94,7 @@ def main():
         print("Loaded existing purchase mapping")
     
     purchase_df = tool.apply_mapping('purchase.xlsx', purchase_mapping, purchase_skip, tool.purchase_standard_columns)
-    tool.create_database(purchase_df, 'purchase_standard', 'purchase_data')
+    tool.create_database(purchase_df, 'purchase_standard', 'purchase_data', PURCHASE_STANDARD_SCHEMA)
     
     # Process GSTR2B Excel
     print("\n=== GSTR2B EXCEL PROCESSING ===")
@@ -115,7 +108,7 @@ def main():
         print("Loaded existing gstr2b mapping")
     
     gstr2b_df = tool.apply_mapping('gstr2b.xlsx', gstr2b_mapping, gstr2b_skip, tool.gstr2b_standard_columns)
-    tool.create_database(gstr2b_df, 'gstr2b_standard', 'gstr2b_data')
+    tool.create_database(gstr2b_df, 'gstr2b_standard', 'gstr2b_data', GSTR2B_STANDARD_SCHEMA, 'supplier_gstin')
     
     print("\n=== PROCESSING COMPLETE ===")
 
@@ -0,0 +1,182 @@
+import sqlite3
+from reconciliation_engine import GSTIN_KEY, INVOICE_KEY, TAX_COLUMNS
+from incremental import RESULTS_DB, RESULT_TABLES, STATE_TABLE, META_TABLE
+
+MASTER_DB = 'gst_master.db'
+PURCHASE_TABLE = 'purchase_data'
+GSTR2B_TABLE = 'gstr2b_data'
+
+# Column -> declared type, in table order
+PURCHASE_SCHEMA = {
+    'gstin': 'TEXT',
+    'party_name': 'TEXT',
+    'state': 'TEXT',
+    'invoice_no': 'TEXT',
+    'invoice_date': 'DATE',
+    'rate': 'REAL',
+    'taxable_value': 'REAL',
+    'igst': 'REAL',
+    'cgst': 'REAL',
+    'sgst': 'REAL',
+    'cess': 'REAL',
+    'total_value': 'REAL',
+    GSTIN_KEY: 'TEXT',
+    INVOICE_KEY: 'TEXT'
+}
+
+GSTR2B_SCHEMA = {
+    'supplier_gstin': 'TEXT',
+    'supplier_name': 'TEXT',
+    'invoice_no': 'TEXT',
+    'invoice_type': 'TEXT',
+    'invoice_date': 'DATE',
+    'invoice_value': 'REAL',
+    'place_of_supply': 'TEXT',
+    'reverse_charge': 'TEXT',
+    'rate': 'REAL',
+    'taxable_value': 'REAL',
+    'igst': 'REAL',
+    'cgst': 'REAL',
+    'sgst': 'REAL',
+    'cess': 'REAL',
+    'period': 'TEXT',
+    'filing_date': 'DATE',
+    'itc_availability': 'TEXT',
+    'reason': 'TEXT',
+    'tax_rate_percent': 'REAL',
+    'source': 'TEXT',
+    'irn_no': 'TEXT',
+    'irn_date': 'DATE',
+    GSTIN_KEY: 'TEXT',
+    INVOICE_KEY: 'TEXT'
+}
+
+# Declared types of the mapped *_standard.db tables (mapping tools)
+PURCHASE_STANDARD_SCHEMA = {
+    'gstin': 'TEXT',
+    'party_name': 'TEXT',
+    'state': 'TEXT',
+    'invoice_no': 'TEXT',
+    'invoice_date': 'DATE',
+    'rate': 'REAL',
+    'taxable_value': 'REAL',
+    'igst': 'REAL',
+    'cgst': 'REAL',
+    'sgst': 'REAL',
+    'cess': 'REAL'
+}
+
+GSTR2B_STANDARD_SCHEMA = {
+    'supplier_gstin': 'TEXT',
+    'supplier_name': 'TEXT',
+    'invoice_no': 'TEXT',
+    'invoice_type': 'TEXT',
+    'invoice_date': 'DATE',
+    'invoice_value': 'REAL',
+    'place_of_supply': 'TEXT',
+    'rate': 'REAL',
+    'taxable_value': 'REAL',
+    'igst': 'REAL',
+    'cgst': 'REAL',
+    'sgst': 'REAL',
+    'cess': 'REAL',
+    'itc_availability': 'TEXT'
+}
+
+# Extra columns of a multi-period GSTR2B load
+PERIOD_SCHEMA = {
+    'return_period': 'TEXT',
+    'source_file': 'TEXT'
+}
+
+# Indexed column groups per table; groups whose columns are absent are skipped
+INDEXES = {
+    PURCHASE_TABLE: [('gstin', 'invoice_no'), (GSTIN_KEY, INVOICE_KEY)],
+    GSTR2B_TABLE: [('supplier_gstin', 'invoice_no'), (GSTIN_KEY, INVOICE_KEY), ('return_period',)]
+}
+
+# Results in incremental.build_results' layout. Each purchase row pairs
+# with the first GSTR2B row of its key: MIN(rowid) under the key index is
+# one seek
+FIRST_GSTR2B_ROW = (
+    f'SELECT MIN(rowid) FROM {GSTR2B_TABLE} '
+    f'WHERE {GSTIN_KEY} = p.{GSTIN_KEY} AND {INVOICE_KEY} = p.{INVOICE_KEY}'
+)
+
+def _tax(alias):
+    return ' + '.join(f'COALESCE({alias}.{col}, 0)' for col in TAX_COLUMNS)
+
+
+RESULT_QUERIES = {
+    'matched': f'''
+        SELECT p.gstin, p.party_name, p.invoice_no,
+               p.taxable_value AS purchase_value, g.taxable_value AS gstr2b_value,
+               p.taxable_value - g.taxable_value AS difference, {_tax('p')} AS tax,
+               p.{GSTIN_KEY}, p.{INVOICE_KEY}
+        FROM {PURCHASE_TABLE} p
+        JOIN {GSTR2B_TABLE} g ON g.rowid = ({FIRST_GSTR2B_ROW})
+        ORDER BY p.rowid''',
+    'not_in_gstr2b': f'''
+        SELECT p.gstin, p.party_name, p.invoice_no, p.taxable_value, {_tax('p')} AS tax,
+               p.{GSTIN_KEY}, p.{INVOICE_KEY}
+        FROM {PURCHASE_TABLE} p
+        WHERE NOT EXISTS (
+            SELECT 1 FROM {GSTR2B_TABLE} g
+            WHERE g.{GSTIN_KEY} = p.{GSTIN_KEY} AND g.{INVOICE_KEY} = p.{INVOICE_KEY})
+        ORDER BY p.rowid''',
+    'not_in_books': f'''
+        SELECT g.supplier_gstin, g.supplier_name, g.invoice_no, g.taxable_value, {_tax('g')} AS tax,
+               g.{GSTIN_KEY}, g.{INVOICE_KEY}
+        FROM {GSTR2B_TABLE} g
+        WHERE NOT EXISTS (
+            SELECT 1 FROM {PURCHASE_TABLE} p
+            WHERE p.{GSTIN_KEY} = g.{GSTIN_KEY} AND p.{INVOICE_KEY} = g.{INVOICE_KEY})
+        ORDER BY g.rowid'''
+}
+
+
+def table_columns(conn, table):
+    """Column names of table, empty when it does not exist"""
+    return [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+
+
+def create_indexes(conn, table):
+    """Create the INDEXES for table (building them once after a bulk load is cheaper)"""
+    existing = set(table_columns(conn, table))
+    for columns in INDEXES.get(table, []):
+        if set(columns) <= existing:
+            name = f"idx_{table}_{'_'.join(columns)}"
+            conn.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({", ".join(columns)})')
+    conn.execute(f'ANALYZE {table}')
+
+
+def reconcile_in_sqlite(db_path=MASTER_DB, results_db=RESULTS_DB):
+    """Reconcile the stored registers with indexed joins and anti-joins inside SQLite.
+
+    No rows are pulled into Python, so registers larger than memory work.
+    Results replace the tables in results_db (same layout as
+    incremental.build_results) and the incremental state there is dropped so
+    the next incremental run starts from scratch. Returns row counts.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        for table in (PURCHASE_TABLE, GSTR2B_TABLE):
+            if not {GSTIN_KEY, INVOICE_KEY} <= set(table_columns(conn, table)):
+                raise ValueError(f'{table} has no match key columns, process the Excel files again')
+            create_indexes(conn, table)
+
+        conn.execute('ATTACH DATABASE ? AS results', (results_db,))
+        for table in RESULT_TABLES:
+            conn.execute(f'DROP TABLE IF EXISTS results.{table}')
+            conn.execute(f'CREATE TABLE results.{table} AS {RESULT_QUERIES[table]}')
+            conn.execute(f'CREATE INDEX results.idx_{table}_keys ON {table} ({GSTIN_KEY}, {INVOICE_KEY})')
+        conn.execute(f'DROP TABLE IF EXISTS results.{STATE_TABLE}')
+        conn.execute(f'DROP TABLE IF EXISTS results.{META_TABLE}')
+        conn.commit()
+
+        counts = {table: conn.execute(f'SELECT COUNT(*) FROM results.{table}').fetchone()[0]
+                  for table in RESULT_TABLES}
+        conn.execute('DETACH DATABASE results')
+        return counts
+    finally:
+        conn.close()
@@ -0,0 +1,107 @@
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from excel_loader import iter_table_chunks, concat_chunks, load_register, GSTR2B_COLUMNS
+from gstr2b_json import read_gstr2b_json
+from reconciliation_engine import add_match_keys
+from master_db import create_indexes, MASTER_DB, GSTR2B_TABLE, GSTR2B_SCHEMA, PERIOD_SCHEMA
+from bulk_loader import connect, bulk_load
+
+EXCEL_EXTENSIONS = ('.xlsx', '.xls')
+
+# Legacy workbooks openpyxl cannot stream; they are parsed in one go
+LEGACY_EXCEL_EXTENSIONS = ('.xls',)
+
+# Portal GSTR-2B downloads, read without an Excel conversion
+JSON_EXTENSIONS = ('.json',)
+
+MONTHS = ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
+
+# 042024 / 04-2024, 2024-04 / 202404, Apr-2024 / April_24
+PERIOD_PATTERNS = [
+    (re.compile(r'(?<!\d)(0[1-9]|1[0-2])[-_ ]?(20\d{2})(?!\d)'), lambda m: (m.group(1), m.group(2))),
+    (re.compile(r'(?<!\d)(20\d{2})[-_ ]?(0[1-9]|1[0-2])(?!\d)'), lambda m: (m.group(2), m.group(1))),
+    (re.compile(r'(?<![a-z])(' + '|'.join(MONTHS) + r')[a-z]*[-_ ]?((?:20)?\d{2})(?!\d)', re.IGNORECASE),
+     lambda m: (f"{MONTHS.index(m.group(1).lower()[:3]) + 1:02d}", '20' + m.group(2)[-2:])),
+]
+
+
+def period_from_filename(path):
+    """Return period (MMYYYY, the GSTR2B convention) found in a file name, or None"""
+    name = os.path.splitext(os.path.basename(path))[0]
+    for pattern, parts in PERIOD_PATTERNS:
+        match = pattern.search(name)
+        if match:
+            month, year = parts(match)
+            return f'{month}{year}'
+    return None
+
+
+def period_files(directory):
+    """Monthly 2B files (workbooks or portal JSON) in directory as (period, path), oldest period first"""
+    files = []
+    for name in os.listdir(directory):
+        if name.lower().endswith(EXCEL_EXTENSIONS + JSON_EXTENSIONS) and not name.startswith('~$'):
+            path = os.path.join(directory, name)
+            # Unrecognised names fall back to the file name as their period
+            period = period_from_filename(path) or os.path.splitext(name)[0]
+            files.append((period, path))
+    # MMYYYY sorts by year first, then month
+    return sorted(files, key=lambda item: (item[0][2:] + item[0][:2], item[1]))
+
+
+def load_period_file(period, path, skip_rows=6):
+    """Parse one monthly 2B file and tag every row with its period (runs in a worker process)"""
+    if path.lower().endswith(JSON_EXTENSIONS):
+        df = read_gstr2b_json(path)
+    elif path.lower().endswith(LEGACY_EXCEL_EXTENSIONS):
+        df = load_register(path, GSTR2B_COLUMNS, skip_rows).reset_index(drop=True)
+    else:
+        df = concat_chunks(iter_table_chunks(path, skip_rows=skip_rows, columns=GSTR2B_COLUMNS))
+    df['return_period'] = period
+    df['source_file'] = os.path.basename(path)
+    return add_match_keys(df, 'supplier_gstin')
+
+
+def load_periods(directory, db_path=MASTER_DB, table=GSTR2B_TABLE, workers=None, skip_rows=6):
+    """Parse every monthly 2B file in directory in a process pool into one table.
+
+    Files are parsed concurrently but written in period order into the typed
+    gstr2b table (plus return_period / source_file), so the stored
+    row order (and therefore which duplicate wins a match) does not depend on
+    which worker finishes first. Returns {period: row count}.
+    """
+    files = period_files(directory)
+    if not files:
+        raise FileNotFoundError(f'No GSTR2B files found in {directory}')
+    workers = workers or min(len(files), os.cpu_count() or 1)
+
+    counts = {}
+    conn = connect(db_path)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            frames = executor.map(load_period_file, *zip(*files), [skip_rows] * len(files))
+            
+            def counted():
+                for (period, _), df in zip(files, frames):
+                    counts[period] = counts.get(period, 0) + len(df)
+                    yield df
+            
+            bulk_load(conn, table, counted(), {**GSTR2B_SCHEMA, **PERIOD_SCHEMA})
+
+        create_indexes(conn, table)
+        conn.commit()
+    finally:
+        conn.close()
+    return counts
+
+
+if __name__ == "__main__":
+    directory = sys.argv[1] if len(sys.argv) > 1 else 'gstr2b'
+    print(f"\n📂 Loading monthly GSTR2B files from {directory}...")
+    counts = load_periods(directory)
+    for period, count in counts.items():
+        print(f"   {period}: {count} records")
+    print(f"✅ {sum(counts.values())} GSTR2B records from {len(counts)} periods stored in gst_master.db")
@@ -0,0 +1,166 @@
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+from excel_loader import load_register, PURCHASE_COLUMNS, GSTR2B_COLUMNS
+
+try:
+    import pyarrow  # noqa: F401 - optional, enables Parquet entries
+    HAS_PARQUET = True
+except ImportError:
+    HAS_PARQUET = False
+
+# Next to this module rather than in the working directory, so a run never
+# unpickles entries from a folder it happens to be started in
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.parse_cache')
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Bump when parsing changes so entries written by older code are not reused
+CACHE_VERSION = 3
+
+REGISTER_COLUMNS = {
+    'purchase': PURCHASE_COLUMNS,
+    'gstr2b': GSTR2B_COLUMNS
+}
+
+HASH_BLOCK = 1024 * 1024
+
+
+def file_digest(file):
+    """SHA-256 of a workbook given as a path or an uploaded file object"""
+    digest = hashlib.sha256()
+    if hasattr(file, 'getvalue'):
+        digest.update(file.getvalue())
+        return digest.hexdigest()
+    if hasattr(file, 'read'):
+        position = file.tell()
+        for block in iter(lambda: file.read(HASH_BLOCK), b''):
+            digest.update(block)
+        file.seek(position)
+        return digest.hexdigest()
+    with open(file, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_key(file, kind, skip_rows=None):
+    """Key over the file content, the saved column mapping and the parse options"""
+    mapping_file = f'{kind}_mapping.json'
+    mapping = ''
+    if os.path.exists(mapping_file):
+        with open(mapping_file, 'r') as f:
+            mapping = f.read()
+    options = json.dumps([CACHE_VERSION, kind, skip_rows])
+    return hashlib.sha256('\n'.join([file_digest(file), mapping, options]).encode()).hexdigest()
+
+
+def _entry_paths(key, cache_dir):
+    return os.path.join(cache_dir, f'{key}.parquet'), os.path.join(cache_dir, f'{key}.pkl')
+
+
+def _text_or_number(value):
+    return isinstance(value, (str, int, float, np.number)) and not isinstance(value, (bool, np.bool_))
+
+
+def text_columns(df):
+    """df with its text and text/number columns (invoice numbers, say) as text, blanks kept.
+
+    Other object columns are inferred first, so blanks among dates or
+    amounts do not turn them into text; whatever is still mixed after that
+    (dates next to numbers, say) is left as it is.
+    """
+    df = df.copy()
+    for i, dtype in enumerate(df.dtypes.tolist()):
+        if dtype != object:
+            continue
+        column = df.iloc[:, i].infer_objects()
+        if column.dtype == object and column.dropna().map(_text_or_number).all():
+            column = column.astype(str).where(column.notna())
+        df.isetitem(i, column)
+    return df
+
+
+def load_entry(key, cache_dir=CACHE_DIR):
+    """Cached frame for key, or None. A hit marks the entry as recently used."""
+    parquet_path, pickle_path = _entry_paths(key, cache_dir)
+    try:
+        if HAS_PARQUET and os.path.exists(parquet_path):
+            df = pd.read_parquet(parquet_path)
+            os.utime(parquet_path)
+            return df
+        if os.path.exists(pickle_path):
+            df = pd.read_pickle(pickle_path)
+            os.utime(pickle_path)
+            return df
+    except Exception:
+        # A truncated or unreadable entry is just a miss; it gets rewritten
+        pass
+    return None
+
+
+def store_entry(key, df, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+    """Write df under key, then evict least recently used entries over max_bytes"""
+    os.makedirs(cache_dir, exist_ok=True)
+    parquet_path, pickle_path = _entry_paths(key, cache_dir)
+    # Parquet only when every column has a real dtype (see text_columns):
+    # it would coerce what is left of a mixed column, so those are pickled
+    # and read back exactly as they were parsed
+    parquet = HAS_PARQUET and object not in df.dtypes.tolist()
+    path = parquet_path if parquet else pickle_path
+    
+    # Write to a temporary name and rename, so readers never see half a file
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    if parquet:
+        df.to_parquet(temp_path)
+    else:
+        df.to_pickle(temp_path)
+    os.replace(temp_path, path)
+    evict(cache_dir, max_bytes)
+
+
+def evict(cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+    """Delete the least recently used entries until the cache fits in max_bytes"""
+    entries = []
+    for name in os.listdir(cache_dir):
+        if not name.endswith(('.parquet', '.pkl')):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def cached_register(file, kind, skip_rows=None, cache_dir=CACHE_DIR):
+    """Normalized purchase / GSTR2B frame, parsed only when the file or its mapping changed.
+
+    kind is 'purchase' or 'gstr2b'; skip_rows is passed to load_register.
+    With pyarrow, text / number columns (invoice numbers, say) come back as
+    text and the other columns with the same dtypes, whether the entry was
+    just parsed or read back.
+    """
+    key = cache_key(file, kind, skip_rows)
+    df = load_entry(key, cache_dir)
+    if df is None:
+        df = load_register(file, REGISTER_COLUMNS[kind], skip_rows)
+        if HAS_PARQUET:
+            df = text_columns(df)
+        try:
+            store_entry(key, df, cache_dir)
+        except (OSError, ValueError, TypeError):
+            # The cache only saves time; failing to write it must not fail the run
+            pass
+    return df
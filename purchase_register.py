@@ -0,0 +1,260 @@
+import csv
+import re
+import sys
+import xml.etree.ElementTree as ET
+from itertools import islice
+import pandas as pd
+from excel_loader import iter_table_chunks, CHUNK_ROWS, HEADER_SCAN_ROWS, MIN_DATA_COLUMNS, PURCHASE_COLUMNS
+from reconciliation_engine import add_match_keys
+from master_db import PURCHASE_STANDARD_SCHEMA
+from bulk_loader import connect, bulk_load
+
+# Purchase register files main looks for, in order of preference
+PURCHASE_FILES = ['purchase.xlsx', 'purchase.csv', 'purchase.xml']
+
+# Characters decoded from an XML export at a time
+READ_CHARS = 1 << 16
+
+# Purchase columns kept as text in CSV exports (numeric-looking invoice
+# numbers and GSTINs must not become numbers)
+TEXT_COLUMNS = ['gstin', 'party_name', 'state', 'invoice_no']
+AMOUNT_COLUMNS = ['rate', 'taxable_value', 'igst', 'cgst', 'sgst', 'cess', 'total_value']
+
+# Tally writes control characters as character references, which XML 1.0
+# forbids and the parser rejects
+INVALID_CHAR_REF = re.compile(r'&#(?:[xX]0*(?:[0-8bBcCeEfF]|1[0-9a-fA-F])|0*(?:[0-8]|1[124-9]|2[0-9]|3[01]));')
+
+# Tally voucher layout: ledger lines and item lines directly under a VOUCHER
+VOUCHER_TAG = 'VOUCHER'
+
+# Voucher types (VCHTYPE, compared case-insensitively) read as purchase
+# invoices; add custom purchase types such as 'Purchase GST' here. Order
+# vouchers are not accounting entries and are skipped even if listed
+PURCHASE_VOUCHER_TYPES = ('Purchase',)
+ORDER_VOUCHER_KEYWORD = 'ORDER'
+LEDGER_TAGS = ('ALLLEDGERENTRIES.LIST', 'LEDGERENTRIES.LIST')
+INVENTORY_TAGS = ('ALLINVENTORYENTRIES.LIST', 'INVENTORYENTRIES.LIST')
+
+# Tax head -> words in a ledger name that mark it, checked in this order;
+# other ledgers besides the party and round off count as taxable value
+TAX_LEDGER_KEYWORDS = {
+    'cess': ['CESS'],
+    'igst': ['IGST', 'INTEGRATED'],
+    'cgst': ['CGST', 'CENTRAL TAX'],
+    'sgst': ['SGST', 'UTGST', 'STATE TAX']
+}
+ROUND_OFF_KEYWORDS = ['ROUND']
+
+
+def _amount(text):
+    """Value of a Tally amount; foreign currency amounts ('$10 @ ... = -830.00') use the converted part"""
+    if not text:
+        return 0.0
+    text = re.sub(r'[^0-9.\-]', '', text.split('=')[-1])
+    try:
+        return float(text)
+    except ValueError:
+        return 0.0
+
+
+def _text(elem, *tags):
+    # First non-blank child text among tags
+    for tag in tags:
+        value = elem.findtext(tag)
+        if value and value.strip():
+            return value.strip()
+    return None
+
+
+def _ledger_head(name):
+    name = (name or '').upper()
+    for head, keywords in TAX_LEDGER_KEYWORDS.items():
+        if any(keyword in name for keyword in keywords):
+            return head
+    if any(keyword in name for keyword in ROUND_OFF_KEYWORDS):
+        return 'round_off'
+    return 'taxable_value'
+
+
+def voucher_row(voucher, voucher_types=PURCHASE_VOUCHER_TYPES):
+    """Purchase row of a Tally voucher of one of voucher_types, or None for other (or cancelled) vouchers"""
+    voucher_type = (voucher.get('VCHTYPE') or _text(voucher, 'VOUCHERTYPENAME') or '').strip().upper()
+    if voucher_type not in {name.upper() for name in voucher_types} or ORDER_VOUCHER_KEYWORD in voucher_type:
+        return None
+    if any(voucher.findtext(tag) == 'Yes' for tag in ('ISCANCELLED', 'ISOPTIONAL')):
+        return None
+
+    party = _text(voucher, 'PARTYLEDGERNAME', 'PARTYNAME')
+    amounts = {'taxable_value': 0.0, 'igst': 0.0, 'cgst': 0.0, 'sgst': 0.0, 'cess': 0.0}
+    total_value = None
+    for entry in voucher:
+        if entry.tag in INVENTORY_TAGS:
+            # Item lines carry the taxable value; their nested ledger allocations repeat it
+            amounts['taxable_value'] += abs(_amount(entry.findtext('AMOUNT')))
+        elif entry.tag in LEDGER_TAGS:
+            name = entry.findtext('LEDGERNAME')
+            amount = abs(_amount(entry.findtext('AMOUNT')))
+            if entry.findtext('ISPARTYLEDGER') == 'Yes' or (name and name == party):
+                total_value = amount
+                continue
+            head = _ledger_head(name)
+            if head != 'round_off':
+                amounts[head] += amount
+
+    tax = amounts['igst'] + amounts['cgst'] + amounts['sgst']
+    return {
+        'gstin': _text(voucher, 'PARTYGSTIN', 'GSTREGISTRATIONNUMBER'),
+        'party_name': party,
+        'state': _text(voucher, 'STATENAME', 'PLACEOFSUPPLY'),
+        # REFERENCE is the supplier's invoice number; VOUCHERNUMBER is only the books' own
+        'invoice_no': _text(voucher, 'REFERENCE', 'VOUCHERNUMBER'),
+        'invoice_date': _text(voucher, 'REFERENCEDATE', 'DATE'),
+        'rate': round(tax / amounts['taxable_value'] * 100, 2) if amounts['taxable_value'] else None,
+        **amounts,
+        'total_value': total_value if total_value is not None else sum(amounts.values())
+    }
+
+
+class _CleanXml:
+    """Text file wrapper that drops the character references XML 1.0 forbids"""
+
+    def __init__(self, file):
+        self.file = file
+        self.tail = ''
+
+    def read(self, size=READ_CHARS):
+        while True:
+            chunk = self.file.read(size)
+            text = self.tail + chunk
+            # A reference cut at the block end is completed by the next read
+            cut = text.rfind('&')
+            if chunk and cut >= 0 and ';' not in text[cut:]:
+                text, self.tail = text[:cut], text[cut:]
+            else:
+                self.tail = ''
+            if text or not chunk:
+                return INVALID_CHAR_REF.sub('', text)
+
+
+def _xml_encoding(path):
+    # Tally writes UTF-16 (with a byte order mark) or plain 8-bit text
+    with open(path, 'rb') as f:
+        start = f.read(3)
+    if start[:2] in (b'\xff\xfe', b'\xfe\xff'):
+        return 'utf-16'
+    return 'utf-8-sig' if start == b'\xef\xbb\xbf' else 'utf-8'
+
+
+def _voucher_rows(path, voucher_types):
+    with open(path, encoding=_xml_encoding(path), errors='replace') as f:
+        stack = []
+        open_vouchers = 0
+        for event, elem in ET.iterparse(_CleanXml(f), events=('start', 'end')):
+            if event == 'start':
+                stack.append(elem)
+                open_vouchers += elem.tag == VOUCHER_TAG
+                continue
+            stack.pop()
+            if elem.tag == VOUCHER_TAG:
+                open_vouchers -= 1
+                row = voucher_row(elem, voucher_types)
+                if row is not None:
+                    yield row
+            # Finished elements outside a voucher (including vouchers
+            # themselves) are dropped, so the tree never grows
+            if stack and not open_vouchers:
+                stack[-1].remove(elem)
+
+
+def _chunks(rows, chunk_size):
+    while True:
+        batch = list(islice(rows, chunk_size))
+        if not batch:
+            return
+        yield batch
+
+
+def iter_tally_xml(path, chunk_size=CHUNK_ROWS, voucher_types=PURCHASE_VOUCHER_TYPES):
+    """Stream the purchase vouchers of a Tally XML export as DataFrames of PURCHASE_COLUMNS.
+
+    One row per voucher of voucher_types (see PURCHASE_VOUCHER_TYPES):
+    supplier invoice number and date from its reference, taxable value from
+    item lines and non-tax ledgers, tax heads from ledgers named after them
+    (TAX_LEDGER_KEYWORDS). The file is parsed incrementally; at most one
+    voucher and chunk_size rows are held. At least one frame, maybe empty,
+    is always yielded.
+    """
+    yielded = False
+    for batch in _chunks(_voucher_rows(path, voucher_types), chunk_size):
+        df = pd.DataFrame.from_records(batch, columns=PURCHASE_COLUMNS)
+        df['invoice_date'] = pd.to_datetime(df['invoice_date'], format='%Y%m%d', errors='coerce')
+        yield df
+        yielded = True
+    if not yielded:
+        yield pd.DataFrame(columns=PURCHASE_COLUMNS)
+
+
+def csv_header_row(path, encoding='utf-8-sig', min_columns=MIN_DATA_COLUMNS):
+    """Row number of a CSV export's header: the first row with min_columns filled cells"""
+    with open(path, newline='', encoding=encoding) as f:
+        for number, row in enumerate(islice(csv.reader(f), HEADER_SCAN_ROWS)):
+            if sum(1 for cell in row if cell.strip()) >= min_columns:
+                return number
+    return 0
+
+
+def iter_purchase_csv(path, skip_rows=None, columns=PURCHASE_COLUMNS, chunk_size=CHUNK_ROWS, encoding='utf-8-sig'):
+    """Stream a CSV purchase register as DataFrames, columns renamed positionally.
+
+    skip_rows has the read_excel meaning (rows before the header); None
+    locates the header with csv_header_row. Fully blank rows are dropped
+    and amounts with thousands separators are read as numbers.
+    """
+    if skip_rows is None:
+        skip_rows = csv_header_row(path, encoding)
+    reader = pd.read_csv(path, skiprows=skip_rows + 1, header=None, names=columns,
+                         usecols=range(len(columns)), dtype={col: str for col in TEXT_COLUMNS if col in columns},
+                         thousands=',', encoding=encoding, chunksize=chunk_size)
+    yielded = False
+    for df in reader:
+        df = df.dropna(how='all').reset_index(drop=True)
+        for col in AMOUNT_COLUMNS:
+            if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
+                df[col] = pd.to_numeric(df[col].str.replace(',', '', regex=False), errors='coerce')
+        yield df
+        yielded = True
+    if not yielded:
+        yield pd.DataFrame(columns=columns)
+
+
+def iter_purchase_register(path, skip_rows=None, chunk_size=CHUNK_ROWS):
+    """Stream a purchase register in PURCHASE_COLUMNS: Tally XML, CSV or Excel, by extension"""
+    name = path.lower()
+    if name.endswith('.xml'):
+        return iter_tally_xml(path, chunk_size)
+    if name.endswith('.csv'):
+        return iter_purchase_csv(path, skip_rows, chunk_size=chunk_size)
+    return iter_table_chunks(path, skip_rows, PURCHASE_COLUMNS, chunk_size)
+
+
+def load_purchase_register(path, db_path='purchase_standard.db', table='purchase_data', chunk_size=CHUNK_ROWS):
+    """Load a purchase register into the standard purchase table, like the mapping tools do"""
+
+    def standardized():
+        for df in iter_purchase_register(path, chunk_size=chunk_size):
+            df = df[list(PURCHASE_STANDARD_SCHEMA)].copy()
+            # Canonical matching keys, computed once per row at load time
+            yield add_match_keys(df, 'gstin')
+
+    conn = connect(db_path)
+    try:
+        return bulk_load(conn, table, standardized(), PURCHASE_STANDARD_SCHEMA)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else 'purchase.xml'
+    print(f"\n📂 Loading purchase register {path}...")
+    count = load_purchase_register(path)
+    print(f"✅ PURCHASE: {count} records stored in purchase_standard.db")
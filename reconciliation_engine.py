@@ -0,0 +1,252 @@
+from datetime import date
+import numpy as np
+import pandas as pd
+
+AMOUNT_COLUMNS = ['taxable_value', 'igst', 'cgst', 'sgst', 'cess']
+TAX_COLUMNS = ['igst', 'cgst', 'sgst', 'cess']
+MATCH_TOLERANCE = 0.01
+
+# Probable matches: taxable value within ±₹1 or 2% (whichever is wider)
+# and invoice date within ±1 day
+AMOUNT_TOLERANCE = 1.0
+PERCENT_TOLERANCE = 2.0
+DATE_TOLERANCE_DAYS = 1
+
+# Canonical key columns stored next to the raw data in the databases
+GSTIN_KEY = 'gstin_key'
+INVOICE_KEY = 'invoice_key'
+
+# Financial year suffix at the end of an invoice no, after a separator:
+# 24-25, 2024-25, 2024/2025. Only consecutive years from FY 2017-18 (GST)
+# up to the current one count, so "INV 12/13" stays apart from "INV1213"
+FINANCIAL_YEAR = r'(?<=[^A-Z0-9])(?:20)?(\d{2})[-/](?:20)?(\d{2})$'
+FIRST_FY_START = 17
+LAST_FY_START = date.today().year % 100
+
+
+def _text(series):
+    # Blank cells become '' rather than 'nan'
+    return series.where(series.notna(), '').map(str).str.strip().str.upper()
+
+
+def _financial_year(match):
+    start, end = match.group(1), match.group(2)
+    if not FIRST_FY_START <= int(start) <= LAST_FY_START or int(start) + 1 != int(end):
+        return match.group(0)
+    return start + '-' + end
+
+
+def canonical_gstin(series):
+    """GSTIN key: upper case with all whitespace removed"""
+    return _text(series).str.replace(r'\s+', '', regex=True)
+
+
+def canonical_invoice(series):
+    """Invoice no key that survives the usual formatting differences.
+
+    "1234.0" (Excel numeric cells) -> "1234", case is ignored, a financial
+    year suffix "/2024-25" or "/24-25" becomes "24-25", leading zeros are
+    dropped from every number and any run of separators, as well as
+    letter/digit boundaries, becomes a single "-": "INV/001/24-25" and
+    "inv-1/2024-25" are both "INV-1-24-25", while "A/45-46" ("A-45-46") and
+    "A4546" ("A-4546") stay apart.
+    """
+    text = _text(series).str.replace(r'^(\d+)\.0+$', r'\1', regex=True)
+    text = text.str.replace(FINANCIAL_YEAR, _financial_year, regex=True)
+    text = text.str.replace(r'(?<!\d)0+(?=\d)', '', regex=True)
+    text = text.str.replace(r'(?<=[A-Z])(?=\d)|(?<=\d)(?=[A-Z])', '-', regex=True)
+    return text.str.replace(r'[^A-Z0-9]+', '-', regex=True).str.strip('-')
+
+
+def add_match_keys(df, gstin_col):
+    """Add the canonical GSTIN / invoice key columns to df (in place) and return it"""
+    df[GSTIN_KEY] = canonical_gstin(df[gstin_col])
+    df[INVOICE_KEY] = canonical_invoice(df['invoice_no'])
+    return df
+
+
+def gstin_keys(df, gstin_col):
+    """GSTIN key array, taken from the stored key column when present"""
+    if GSTIN_KEY in df.columns:
+        return df[GSTIN_KEY].to_numpy()
+    return canonical_gstin(df[gstin_col]).to_numpy()
+
+
+def match_keys(df, gstin_col):
+    """(GSTIN key, invoice key) arrays, taken from the stored key columns when present"""
+    if INVOICE_KEY in df.columns:
+        invoice = df[INVOICE_KEY].to_numpy()
+    else:
+        invoice = canonical_invoice(df['invoice_no']).to_numpy()
+    return gstin_keys(df, gstin_col), invoice
+
+
+def invoice_keys(df, gstin_col):
+    """(GSTIN key, invoice key) for every row of df"""
+    return zip(*match_keys(df, gstin_col))
+
+
+def to_amount(series):
+    """Numeric view of an amount column, unparseable values become NaN"""
+    return pd.to_numeric(series, errors='coerce').astype(float).to_numpy()
+
+
+def tax_amount(df):
+    """Total tax (IGST + CGST + SGST + cess) of every row, blank amounts count as zero"""
+    total = np.zeros(len(df))
+    for col in TAX_COLUMNS:
+        if col in df.columns:
+            total += np.nan_to_num(to_amount(df[col]))
+    return total
+
+
+def to_date(series):
+    """Invoice dates as datetime64, unparseable values become NaT"""
+    return pd.to_datetime(series, errors='coerce', dayfirst=True, format='mixed').to_numpy()
+
+
+def match_invoices(purchase_df, gstr2b_df):
+    """Hash-join purchase rows to GSTR2B rows on the canonical (GSTIN, invoice no) keys.
+
+    Every purchase row is paired with the first GSTR2B row carrying the same
+    key, like the old nested scan did. All returned indices are positions
+    (usable with .iloc), not index labels.
+    """
+    gstr2b_keys = list(invoice_keys(gstr2b_df, 'supplier_gstin'))
+    gstr2b_index = {}
+    for pos, key in enumerate(gstr2b_keys):
+        gstr2b_index.setdefault(key, pos)
+
+    purchase_keys = set()
+    purchase_match = np.full(len(purchase_df), -1, dtype=np.int64)
+    for pos, key in enumerate(invoice_keys(purchase_df, 'gstin')):
+        purchase_keys.add(key)
+        purchase_match[pos] = gstr2b_index.get(key, -1)
+
+    in_books = np.fromiter(
+        (key in purchase_keys for key in gstr2b_keys),
+        dtype=bool, count=len(gstr2b_df)
+    )
+
+    found = purchase_match >= 0
+    return {
+        'purchase_match': purchase_match,
+        'matched': (np.flatnonzero(found), purchase_match[found]),
+        'not_in_gstr2b': np.flatnonzero(~found),
+        'not_in_books': np.flatnonzero(~in_books)
+    }
+
+
+def amount_differences(purchase_rows, gstr2b_rows):
+    """Purchase minus GSTR2B amount for each column in AMOUNT_COLUMNS, row aligned"""
+    return {
+        col: to_amount(purchase_rows[col]) - to_amount(gstr2b_rows[col])
+        for col in AMOUNT_COLUMNS
+    }
+
+
+def perfect_match_mask(diffs):
+    """True where every amount difference is within MATCH_TOLERANCE"""
+    perfect = None
+    for diff in diffs.values():
+        # NaN differences never count as a match, same as abs(nan) < 0.01
+        within = np.abs(diff) < MATCH_TOLERANCE
+        perfect = within if perfect is None else perfect & within
+    return perfect
+
+
+def match_with_tolerance(purchase_df, gstr2b_df, purchase_pos, gstr2b_pos,
+                         amount_tolerance=AMOUNT_TOLERANCE, percent_tolerance=PERCENT_TOLERANCE,
+                         date_tolerance_days=DATE_TOLERANCE_DAYS):
+    """Pair leftover invoices of the same GSTIN whose taxable value and date agree within tolerance.
+
+    purchase_pos / gstr2b_pos are the unmatched positions (e.g. not_in_gstr2b
+    and not_in_books). Per GSTIN the GSTR2B candidates are kept sorted by
+    taxable value, so each purchase row only looks at the slice inside its
+    amount window; the closest amount (then closest date) wins and every
+    GSTR2B row is used at most once. Returns (purchase_pos, gstr2b_pos).
+    """
+    purchase_pos = np.asarray(purchase_pos, dtype=np.int64)
+    gstr2b_pos = np.asarray(gstr2b_pos, dtype=np.int64)
+    p_rows = purchase_df.iloc[purchase_pos]
+    g_rows = gstr2b_df.iloc[gstr2b_pos]
+
+    p_gstin = gstin_keys(p_rows, 'gstin')
+    p_amount = to_amount(p_rows['taxable_value'])
+    p_date = to_date(p_rows['invoice_date'])
+    g_gstin = gstin_keys(g_rows, 'supplier_gstin')
+    g_amount = to_amount(g_rows['taxable_value'])
+    g_date = to_date(g_rows['invoice_date'])
+
+    window = np.timedelta64(date_tolerance_days, 'D')
+    tolerance = np.maximum(amount_tolerance, np.abs(p_amount) * percent_tolerance / 100)
+    used = np.zeros(len(g_rows), dtype=bool)
+    pairs_p = []
+    pairs_g = []
+
+    candidates = pd.Series(np.arange(len(g_rows))).groupby(g_gstin).indices
+    for gstin, p_idx in pd.Series(np.arange(len(p_rows))).groupby(p_gstin).indices.items():
+        # Rows without a GSTIN never pair up on tolerance
+        if not gstin or gstin not in candidates:
+            continue
+        g_idx = candidates[gstin]
+        g_idx = g_idx[~np.isnan(g_amount[g_idx])]
+        g_idx = g_idx[np.argsort(g_amount[g_idx], kind='stable')]
+        amounts = g_amount[g_idx]
+
+        lo = np.searchsorted(amounts, p_amount[p_idx] - tolerance[p_idx], side='left')
+        hi = np.searchsorted(amounts, p_amount[p_idx] + tolerance[p_idx], side='right')
+        for i, start, stop in zip(p_idx, lo, hi):
+            window_idx = g_idx[start:stop]
+            window_idx = window_idx[~used[window_idx]]
+            if not len(window_idx):
+                continue
+            day_gap = np.abs(g_date[window_idx] - p_date[i])
+            # NaT gaps compare False, so undated invoices never qualify
+            window_idx = window_idx[day_gap <= window]
+            if not len(window_idx):
+                continue
+            best = min(window_idx, key=lambda j: (abs(g_amount[j] - p_amount[i]), abs(g_date[j] - p_date[i])))
+            used[best] = True
+            pairs_p.append(i)
+            pairs_g.append(best)
+
+    pairs_p = np.asarray(pairs_p, dtype=np.int64)
+    pairs_g = np.asarray(pairs_g, dtype=np.int64)
+    return purchase_pos[pairs_p], gstr2b_pos[pairs_g]
+
+
+def reconcile(purchase_df, gstr2b_df, tolerance=False):
+    """Match invoices and split the pairs into perfect matches and mismatches.
+
+    Returns positional indices: 'matched' and 'mismatched' are
+    (purchase_pos, gstr2b_pos) pairs, 'not_in_gstr2b' holds purchase positions
+    and 'not_in_books' GSTR2B positions. With tolerance=True the leftovers
+    also go through match_with_tolerance and its pairs come back as
+    'probable' instead of as not_in_gstr2b / not_in_books.
+    """
+    result = match_invoices(purchase_df, gstr2b_df)
+    p_pos, g_pos = result['matched']
+
+    diffs = amount_differences(purchase_df.iloc[p_pos], gstr2b_df.iloc[g_pos])
+    perfect = perfect_match_mask(diffs)
+
+    reconciled = {
+        'matched': (p_pos[perfect], g_pos[perfect]),
+        'mismatched': (p_pos[~perfect], g_pos[~perfect]),
+        'not_in_gstr2b': result['not_in_gstr2b'],
+        'not_in_books': result['not_in_books']
+    }
+    if tolerance:
+        reconciled.update(split_probable(purchase_df, gstr2b_df, result['not_in_gstr2b'], result['not_in_books']))
+    return reconciled
+
+
+def split_probable(purchase_df, gstr2b_df, not_in_gstr2b, not_in_books):
+    """Run tolerance matching on the leftovers and take the pairs out of them"""
+    probable = match_with_tolerance(purchase_df, gstr2b_df, not_in_gstr2b, not_in_books)
+    return {
+        'probable': probable,
+        'not_in_gstr2b': np.setdiff1d(not_in_gstr2b, probable[0]),
+        'not_in_books': np.setdiff1d(not_in_books, probable[1])
+    }
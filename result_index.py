@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+# Fields a ResultIndex searches, in the order the GUI offers them
+SEARCH_FIELDS = ['GSTIN', 'Invoice No', 'Party']
+
+# Party names are split into words for the token index
+TOKEN_PATTERN = r'\w+'
+
+# Sorts after any character that can follow a prefix
+PREFIX_END = '\uffff'
+
+
+def _normalized(values):
+    """Search keys of values: text, stripped and upper-cased, blanks as ''"""
+    keys = pd.Series(values, dtype=object).fillna('').astype(str).str.strip().str.upper()
+    return keys.to_numpy(dtype=object)
+
+
+def _side_values(column, positions):
+    return column.to_numpy()[positions]
+
+
+def _prefix_rows(keys, key_rows, prefix):
+    # keys is sorted, so every key starting with prefix is one contiguous run
+    lo = np.searchsorted(keys, prefix, 'left')
+    hi = np.searchsorted(keys, prefix + PREFIX_END, 'right')
+    return np.unique(key_rows[lo:hi])
+
+
+def _sorted_keys(keys, key_rows):
+    order = np.argsort(keys, kind='stable')
+    return keys[order], key_rows[order]
+
+
+class ResultIndex:
+    """Search indexes over one category of a ReconciliationResult.
+
+    Built once from the source columns, so a search never scans the rows:
+    - GSTIN: hash map of GSTIN -> rows, for exact lookups
+    - Invoice No: invoice numbers of both sides, sorted, for prefix search
+    - Party: words of the party names, sorted, so every typed word matches
+      the start of a word in the name
+
+    Rows are the category's row numbers, as taken by frame(rows=...).
+    """
+
+    def __init__(self, results, category):
+        entries = results.entries(category)
+        p_pos = results.purchase_pos[entries]
+        g_pos = results.gstr2b_pos[entries]
+        has_p = p_pos >= 0
+        has_g = g_pos >= 0
+        rows = np.arange(len(entries))
+        purchase_df, gstr2b_df = results.purchase_df, results.gstr2b_df
+
+        # GSTIN and party name come from the books side when there is one,
+        # like the report's GSTIN / Name of Party columns
+        gstins = np.empty(len(entries), dtype=object)
+        gstins[has_p] = _normalized(_side_values(purchase_df['gstin'], p_pos[has_p]))
+        gstins[~has_p] = _normalized(_side_values(gstr2b_df['supplier_gstin'], g_pos[~has_p]))
+        self.gstins = pd.Series(rows).groupby(gstins).indices if len(rows) else {}
+
+        invoices = np.concatenate([_normalized(_side_values(purchase_df['invoice_no'], p_pos[has_p])),
+                                   _normalized(_side_values(gstr2b_df['invoice_no'], g_pos[has_g]))])
+        self.invoice_keys, self.invoice_rows = _sorted_keys(invoices, np.concatenate([rows[has_p], rows[has_g]]))
+
+        names = np.empty(len(entries), dtype=object)
+        names[has_p] = _side_values(purchase_df['party_name'], p_pos[has_p])
+        names[~has_p] = _side_values(gstr2b_df['supplier_name'], g_pos[~has_p])
+        tokens = pd.Series(_normalized(names)).str.findall(TOKEN_PATTERN).explode().dropna()
+        self.token_keys, self.token_rows = _sorted_keys(tokens.to_numpy(dtype=object),
+                                                        tokens.index.to_numpy(dtype=np.int64))
+
+    def search(self, field, text):
+        """Sorted row numbers matching text in field, or None when text is blank (all rows)"""
+        text = text.strip().upper()
+        if not text:
+            return None
+        if field == 'GSTIN':
+            return self.gstins.get(text, np.empty(0, dtype=np.int64))
+        if field == 'Invoice No':
+            return _prefix_rows(self.invoice_keys, self.invoice_rows, text)
+        if field == 'Party':
+            matches = None
+            for word in pd.Series([text]).str.findall(TOKEN_PATTERN)[0]:
+                rows = _prefix_rows(self.token_keys, self.token_rows, word)
+                matches = rows if matches is None else np.intersect1d(matches, rows, assume_unique=True)
+            return matches if matches is not None else np.empty(0, dtype=np.int64)
+        raise ValueError(f'Unknown search field: {field}')
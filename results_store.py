@@ -0,0 +1,263 @@
+from datetime import datetime
+import pandas as pd
+from reconciliation_engine import canonical_gstin, GSTIN_KEY, INVOICE_KEY
+from incremental import RESULTS_DB, RESULT_TABLES, KEY_COLUMNS
+from bulk_loader import connect, bulk_load
+
+# Every reconciliation run appends its rows under a new run_id; tables are
+# never dropped, so readers scanning an earlier run are not disturbed
+RUNS_TABLE = 'runs'
+RESULTS_TABLE = 'results'
+
+# Completed runs kept; older runs are deleted when a new one completes
+KEEP_RUNS = 20
+
+# Rows per page of page_run, and the most one page may hold
+PAGE_ROWS = 100
+MAX_PAGE_ROWS = 1000
+
+# Columns of each status, as read back by read_run
+RESULT_COLUMNS = {
+    'matched': ['gstin', 'party_name', 'invoice_no', 'purchase_value', 'gstr2b_value', 'difference', 'tax'],
+    'not_in_gstr2b': ['gstin', 'party_name', 'invoice_no', 'taxable_value', 'tax'],
+    'not_in_books': ['supplier_gstin', 'supplier_name', 'invoice_no', 'taxable_value', 'tax']
+}
+
+# GSTR2B side columns are stored in the purchase side's column
+STORED_AS = {'supplier_gstin': 'gstin', 'supplier_name': 'party_name'}
+
+RESULTS_SCHEMA = {
+    'run_id': 'INTEGER',
+    'status': 'TEXT',
+    'gstin': 'TEXT',
+    'party_name': 'TEXT',
+    'invoice_no': 'TEXT',
+    'purchase_value': 'REAL',
+    'gstr2b_value': 'REAL',
+    'difference': 'REAL',
+    'taxable_value': 'REAL',
+    'tax': 'REAL',
+    GSTIN_KEY: 'TEXT',
+    INVOICE_KEY: 'TEXT'
+}
+
+
+def create_store(conn):
+    """Create the runs and results tables if they do not exist yet"""
+    conn.execute(f'''CREATE TABLE IF NOT EXISTS {RUNS_TABLE} (
+        run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        source TEXT,
+        started_at TEXT,
+        completed_at TEXT,
+        {', '.join(f'{status} INTEGER' for status in RESULT_TABLES)})''')
+    columns = ', '.join(f'{name} {sql_type}' for name, sql_type in RESULTS_SCHEMA.items())
+    conn.execute(f'CREATE TABLE IF NOT EXISTS {RESULTS_TABLE} ({columns})')
+    # Stores written before a column was added get it as NULL for older runs
+    existing = {row[1] for row in conn.execute(f'PRAGMA table_info({RESULTS_TABLE})')}
+    for name, sql_type in RESULTS_SCHEMA.items():
+        if name not in existing:
+            conn.execute(f'ALTER TABLE {RESULTS_TABLE} ADD COLUMN {name} {sql_type}')
+    # Rows are read in GSTIN key order; stores indexed on the raw GSTIN get
+    # their missing keys filled in once, when the key index replaces it
+    indexes = {row[1] for row in conn.execute(f'PRAGMA index_list({RESULTS_TABLE})')}
+    if f'idx_{RESULTS_TABLE}_run_key' not in indexes:
+        fill_gstin_keys(conn)
+        conn.execute(f'DROP INDEX IF EXISTS idx_{RESULTS_TABLE}_run')
+        conn.execute(f'CREATE INDEX idx_{RESULTS_TABLE}_run_key ON {RESULTS_TABLE} (run_id, status, {GSTIN_KEY})')
+    conn.commit()
+
+
+def fill_gstin_keys(conn, run_id=None):
+    """Set the GSTIN key of stored rows that lack one (of run_id, or of every run)"""
+    run_filter = '' if run_id is None else 'run_id = ? AND '
+    run_params = () if run_id is None else (run_id,)
+    gstins = [row[0] for row in conn.execute(
+        f'SELECT DISTINCT gstin FROM {RESULTS_TABLE} WHERE {run_filter}{GSTIN_KEY} IS NULL', run_params)]
+    if gstins:
+        keys = canonical_gstin(pd.Series(gstins, dtype=object)).tolist()
+        conn.executemany(
+            f'UPDATE {RESULTS_TABLE} SET {GSTIN_KEY} = ? WHERE {run_filter}{GSTIN_KEY} IS NULL AND gstin IS ?',
+            [(key,) + run_params + (gstin,) for gstin, key in zip(gstins, keys)])
+
+
+def _now():
+    return datetime.now().isoformat(sep=' ', timespec='seconds')
+
+
+def _start_run(conn, source):
+    create_store(conn)
+    run_id = conn.execute(f'INSERT INTO {RUNS_TABLE} (source, started_at) VALUES (?, ?)',
+                          (source, _now())).lastrowid
+    conn.commit()
+    return run_id
+
+
+def _complete_run(conn, run_id, counts, keep):
+    # Readers only see a run once completed_at is set
+    assignments = ', '.join(f'{status} = ?' for status in RESULT_TABLES)
+    conn.execute(f'UPDATE {RUNS_TABLE} SET completed_at = ?, {assignments} WHERE run_id = ?',
+                 [_now()] + [counts.get(status, 0) for status in RESULT_TABLES] + [run_id])
+    prune_runs(conn, keep)
+    conn.commit()
+
+
+def save_run(results, source, db_path=RESULTS_DB, keep=KEEP_RUNS):
+    """Store {status: DataFrame} results as a new run and return its run_id"""
+    conn = connect(db_path)
+    try:
+        run_id = _start_run(conn, source)
+
+        def stored_frames():
+            for status in RESULT_TABLES:
+                df = results[status].rename(columns=STORED_AS)
+                yield df.assign(run_id=run_id, status=status, **{GSTIN_KEY: canonical_gstin(df['gstin'])})
+
+        bulk_load(conn, RESULTS_TABLE, stored_frames(), replace=False)
+        _complete_run(conn, run_id, {status: len(results[status]) for status in RESULT_TABLES}, keep)
+        return run_id
+    finally:
+        conn.close()
+
+
+def snapshot_run(source, db_path=RESULTS_DB, keep=KEEP_RUNS):
+    """Copy the working result tables (see incremental) into a new run and return its run_id"""
+    conn = connect(db_path)
+    try:
+        run_id = _start_run(conn, source)
+        counts = {}
+        for status in RESULT_TABLES:
+            present = {row[1] for row in conn.execute(f'PRAGMA table_info({status})')}
+            if not present:
+                raise ValueError(f'No {status} results in {db_path}, run the reconciliation first')
+            columns = [column for column in RESULT_COLUMNS[status] + KEY_COLUMNS if column in present]
+            targets = ', '.join(STORED_AS.get(column, column) for column in columns)
+            counts[status] = conn.execute(
+                f'INSERT INTO {RESULTS_TABLE} (run_id, status, {targets}) '
+                f'SELECT ?, ?, {", ".join(columns)} FROM {status}', (run_id, status)).rowcount
+        # Working tables written by older code have no key column
+        fill_gstin_keys(conn, run_id)
+        _complete_run(conn, run_id, counts, keep)
+        return run_id
+    finally:
+        conn.close()
+
+
+def prune_runs(conn, keep=KEEP_RUNS):
+    """Delete all but the newest keep runs (a run_id range, so an index seek)"""
+    oldest_kept = conn.execute(f'SELECT run_id FROM {RUNS_TABLE} ORDER BY run_id DESC LIMIT 1 OFFSET ?',
+                               (keep - 1,)).fetchone()
+    if oldest_kept:
+        conn.execute(f'DELETE FROM {RESULTS_TABLE} WHERE run_id < ?', oldest_kept)
+        conn.execute(f'DELETE FROM {RUNS_TABLE} WHERE run_id < ?', oldest_kept)
+
+
+def latest_run(conn):
+    """run_id of the newest completed run, or None"""
+    try:
+        row = conn.execute(f'SELECT MAX(run_id) FROM {RUNS_TABLE} WHERE completed_at IS NOT NULL').fetchone()
+    except Exception:
+        return None
+    return row[0]
+
+
+def _run_id(conn, run_id):
+    run_id = run_id if run_id is not None else latest_run(conn)
+    if run_id is None:
+        raise ValueError('No reconciliation run found, run the reconciliation first')
+    return run_id
+
+
+def list_runs(conn):
+    """Completed runs, newest first"""
+    return pd.read_sql_query(
+        f'SELECT * FROM {RUNS_TABLE} WHERE completed_at IS NOT NULL ORDER BY run_id DESC', conn)
+
+
+def run_counts(conn, run_id=None):
+    """Row count per status of a run (the latest by default)"""
+    run_id = _run_id(conn, run_id)
+    row = conn.execute(f'SELECT {", ".join(RESULT_TABLES)} FROM {RUNS_TABLE} WHERE run_id = ?', (run_id,)).fetchone()
+    if row is None:
+        raise ValueError(f'Run {run_id} not found')
+    return dict(zip(RESULT_TABLES, row))
+
+
+def run_summary(conn, run_id=None):
+    """(run_id, {status: count / taxable value / tax}) of a run (the latest by default)
+
+    Aggregated in SQL over the run's rows; taxable value is the books side
+    for matched rows.
+    """
+    run_id = _run_id(conn, run_id)
+    summary = {status: {'count': 0, 'taxable_value': 0.0, 'tax': 0.0} for status in RESULT_TABLES}
+    rows = conn.execute(
+        f'SELECT status, COUNT(*), TOTAL(COALESCE(taxable_value, purchase_value)), TOTAL(tax) '
+        f'FROM {RESULTS_TABLE} WHERE run_id = ? GROUP BY status', (run_id,))
+    for status, count, taxable_value, tax in rows:
+        summary[status] = {'count': count, 'taxable_value': taxable_value, 'tax': tax}
+    return run_id, summary
+
+
+def read_run(conn, status, run_id=None, limit=None):
+    """Rows of one status of a run (the latest by default), ordered by GSTIN key"""
+    run_id = _run_id(conn, run_id)
+    columns = ', '.join(f'{STORED_AS.get(column, column)} AS {column}' for column in RESULT_COLUMNS[status])
+    # The order follows the (run_id, status, gstin_key) index, so no sort is needed
+    query = (f'SELECT {columns} FROM {RESULTS_TABLE} WHERE run_id = ? AND status = ? ORDER BY {GSTIN_KEY}, rowid'
+             + (f' LIMIT {int(limit)}' if limit is not None else ''))
+    return pd.read_sql_query(query, conn, params=(run_id, status))
+
+
+def page_run(conn, status, run_id=None, limit=PAGE_ROWS, offset=0, after=None, gstin=None, sort=None):
+    """One page of a run's rows for status, as (columns, rows, next_page).
+
+    Rows come in GSTIN key order by default. Pass the after value from
+    next_page to get the following page: it is a seek on the
+    (run_id, status, gstin_key) index, so a page deep into a large run
+    costs the same as the first. sort names another column of the status
+    ('-' prefix for descending); those orders page by offset. gstin keeps
+    rows whose GSTIN key starts with it (a range on the same index). next_page carries the run paged
+    (pass it back as run_id) and is None on the last page.
+    """
+    if status not in RESULT_COLUMNS:
+        raise ValueError(f'Unknown result category: {status}')
+    run_id = _run_id(conn, run_id)
+    limit = max(1, min(int(limit), MAX_PAGE_ROWS))
+    offset = max(0, int(offset))
+    columns = RESULT_COLUMNS[status]
+
+    where = ['run_id = ?', 'status = ?']
+    params = [run_id, status]
+    if gstin and gstin.strip():
+        # Compared as GSTIN keys, so spacing and case in either the stored
+        # GSTIN or the typed prefix do not matter
+        prefix = canonical_gstin(pd.Series([gstin]))[0]
+        where.append(f'{GSTIN_KEY} >= ? AND {GSTIN_KEY} < ?')
+        params += [prefix, prefix + '\uffff']
+
+    keyset = not sort or sort == 'gstin'
+    if keyset:
+        order = f'{GSTIN_KEY}, rowid'
+        if after is not None:
+            last_key, last_rowid = after
+            where.append(f'({GSTIN_KEY}, rowid) > (?, ?)')
+            params += [str(last_key), int(last_rowid)]
+    else:
+        name = sort.lstrip('-')
+        if name not in columns:
+            raise ValueError(f'Cannot sort {status} by {name}')
+        order = f'{STORED_AS.get(name, name)} {"DESC" if sort.startswith("-") else "ASC"}, rowid'
+
+    selected = ', '.join(STORED_AS.get(column, column) for column in columns)
+    # One row past the page tells whether another page follows
+    rows = conn.execute(
+        f'SELECT {selected}, {GSTIN_KEY}, rowid FROM {RESULTS_TABLE} WHERE {" AND ".join(where)} '
+        f'ORDER BY {order} LIMIT ? OFFSET ?', params + [limit + 1, offset]).fetchall()
+
+    next_page = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_page = {'after': list(rows[-1][-2:])} if keyset else {'offset': offset + limit}
+        # Later pages stay on this run even after a newer one completes
+        next_page['run'] = run_id
+    return columns, [list(row[:-2]) for row in rows], next_page
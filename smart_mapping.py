@@ -1,51 +1,23 @@
 import pandas as pd
 import sqlite3
 import json
+from excel_loader import ExcelChunkReader, find_data_start, header_names, CHUNK_ROWS
+from reconciliation_engine import add_match_keys
+from master_db import PURCHASE_STANDARD_SCHEMA, GSTR2B_STANDARD_SCHEMA
+from bulk_loader import connect, bulk_load
 
 class SmartMappingTool:
     def __init__(self):
-        self.purchase_standard = {
-            'gstin': 'TEXT',
-            'party_name': 'TEXT', 
-            'state': 'TEXT',
-            'invoice_no': 'TEXT',
-            'invoice_date': 'DATE',
-            'rate': 'REAL',
-            'taxable_value': 'REAL',
-            'igst': 'REAL',
-            'cgst': 'REAL', 
-            'sgst': 'REAL',
-            'cess': 'REAL'
-        }
-        
-        self.gstr2b_standard = {
-            'supplier_gstin': 'TEXT',
-            'supplier_name': 'TEXT',
-            'invoice_no': 'TEXT',
-            'invoice_type': 'TEXT',
-            'invoice_date': 'DATE',
-            'invoice_value': 'REAL',
-            'place_of_supply': 'TEXT',
-            'rate': 'REAL',
-            'taxable_value': 'REAL',
-            'igst': 'REAL',
-            'cgst': 'REAL',
-            'sgst': 'REAL',
-            'cess': 'REAL',
-            'itc_availability': 'TEXT'
-        }
+        self.purchase_standard = dict(PURCHASE_STANDARD_SCHEMA)
+        self.gstr2b_standard = dict(GSTR2B_STANDARD_SCHEMA)
     
-    def find_data_start(self, file_path):
-        df = pd.read_excel(file_path)
-        for i in range(len(df)):
-            test_df = pd.read_excel(file_path, skiprows=i)
-            if len(test_df.columns) >= 5 and not test_df.empty:
-                if test_df.iloc[0].count() >= 5:
-                    return i, test_df.columns.tolist()
-        return 0, []
+    def find_data_start(self, sheet):
+        skip_rows = find_data_start(sheet)
+        columns = header_names(sheet.iloc[skip_rows].tolist()) if skip_rows < len(sheet) else []
+        return skip_rows, columns
     
-    def create_mapping_file(self, file_path, db_type):
-        skip_rows, columns = self.find_data_start(file_path)
+    def create_mapping_file(self, sheet, db_type):
+        skip_rows, columns = self.find_data_start(sheet)
         standard_cols = list(self.purchase_standard.keys()) if db_type == 'purchase' else list(self.gstr2b_standard.keys())
         
         # Auto-create basic mapping based on position for current files
@@ -87,46 +59,55 @@ class SmartMappingTool:
         
         return mapping, skip_rows
     
-    def load_or_create_mapping(self, file_path, db_type):
+    def load_or_create_mapping(self, sheet, db_type):
         try:
             with open(f'{db_type}_mapping.json', 'r') as f:
                 config = json.load(f)
             return config['mapping'], config['skip_rows']
         except FileNotFoundError:
-            return self.create_mapping_file(file_path, db_type)
+            return self.create_mapping_file(sheet, db_type)
     
-    def process_to_database(self, file_path, db_type):
-        mapping, skip_rows = self.load_or_create_mapping(file_path, db_type)
-        
-        df = pd.read_excel(file_path, skiprows=skip_rows)
-        df = df.dropna(how='all')
+    def process_to_database(self, file_path, db_type, chunk_size=CHUNK_ROWS):
+        # Only the top of the sheet is parsed up front to locate the header;
+        # the data is then streamed chunk by chunk into the database
+        reader = ExcelChunkReader(file_path, chunk_size)
+        mapping, skip_rows = self.load_or_create_mapping(reader.head, db_type)
         
         standard_schema = self.purchase_standard if db_type == 'purchase' else self.gstr2b_standard
         
-        # Create standardized DataFrame
-        result_df = pd.DataFrame()
-        for std_col in standard_schema.keys():
-            if mapping.get(std_col) and mapping[std_col] in df.columns:
-                result_df[std_col] = df[mapping[std_col]]
-            else:
-                result_df[std_col] = None
+        def standardized():
+            for df in reader.chunks(skip_rows):
+                # Create standardized DataFrame
+                result_df = pd.DataFrame()
+                for std_col in standard_schema.keys():
+                    if mapping.get(std_col) and mapping[std_col] in df.columns:
+                        result_df[std_col] = df[mapping[std_col]]
+                    else:
+                        result_df[std_col] = None
+                
+                # Canonical matching keys, computed once per row at load time
+                yield add_match_keys(result_df, 'gstin' if db_type == 'purchase' else 'supplier_gstin')
         
-        # Save to database
-        conn = sqlite3.connect(f'{db_type}_standard.db')
-        result_df.to_sql(f'{db_type}_data', conn, if_exists='replace', index=False)
+        # Save to database in one transaction, with the declared column types
+        conn = connect(f'{db_type}_standard.db')
+        record_count = bulk_load(conn, f'{db_type}_data', standardized(), standard_schema)
         conn.close()
         
-        print(f"{db_type.upper()}: {len(result_df)} records processed")
-        return result_df
+        print(f"{db_type.upper()}: {record_count} records processed")
+        return record_count
 
 # Process files
 tool = SmartMappingTool()
-purchase_df = tool.process_to_database('purchase.xlsx', 'purchase')
-gstr2b_df = tool.process_to_database('gstr2b.xlsx', 'gstr2b')
+tool.process_to_database('purchase.xlsx', 'purchase')
+tool.process_to_database('gstr2b.xlsx', 'gstr2b')
 
 # Show sample data
 print("\nPurchase Sample:")
-print(purchase_df[['gstin', 'party_name', 'taxable_value']].head(3))
+conn = sqlite3.connect('purchase_standard.db')
+print(pd.read_sql_query("SELECT gstin, party_name, taxable_value FROM purchase_data LIMIT 3", conn))
+conn.close()
 
 print("\nGSTR2B Sample:")
-print(gstr2b_df[['supplier_gstin', 'supplier_name', 'taxable_value']].head(3))
\ No newline at end of file
+conn = sqlite3.connect('gstr2b_standard.db')
+print(pd.read_sql_query("SELECT supplier_gstin, supplier_name, taxable_value FROM gstr2b_data LIMIT 3", conn))
+conn.close()
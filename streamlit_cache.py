@@ -0,0 +1,101 @@
+import io
+import tempfile
+import streamlit as st
+from parse_cache import file_digest, cached_register
+from excel_export import export_workbook, EXPORT_BLOCK_ROWS
+
+# Streamlit reruns the whole script on every interaction; these in-memory
+# layers (over the on-disk parse cache) make a rerun with the same uploads
+# free. Entries expire after CACHE_TTL seconds and at most CACHE_ENTRIES
+# upload pairs are kept.
+CACHE_TTL = 3600
+CACHE_ENTRIES = 4
+
+# Rows of a result table shown at a time. st.tabs runs every tab's body on
+# every rerun, so only the page on screen is derived from the result
+TABLE_PAGE_ROWS = 1000
+
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def upload_handle(uploaded_file):
+    """Content digest of an upload, hashed once per uploaded file"""
+    digests = st.session_state.setdefault('upload_digests', {})
+    file_id = getattr(uploaded_file, 'file_id', None) or (uploaded_file.name, uploaded_file.size)
+    if file_id not in digests:
+        digests[file_id] = file_digest(uploaded_file)
+        # Only the most recent uploads are worth remembering
+        while len(digests) > CACHE_ENTRIES * 2:
+            digests.pop(next(iter(digests)))
+    return digests[file_id]
+
+
+def uploads_handle(purchase_file, gstr2b_file):
+    """Session-state handle of an upload pair: just the two content digests"""
+    return upload_handle(purchase_file), upload_handle(gstr2b_file)
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_ENTRIES * 2, show_spinner=False)
+def _parsed_upload(kind, digest, _uploaded_file):
+    return cached_register(_uploaded_file, kind)
+
+
+def parsed_upload(uploaded_file, kind):
+    """Normalized register of an upload, parsed once per content"""
+    return _parsed_upload(kind, upload_handle(uploaded_file), uploaded_file)
+
+
+def session_results(reconciled, purchase_file, gstr2b_file):
+    """Results of the upload pair last processed in this session, or None.
+
+    reconciled(handle, _purchase_file, _gstr2b_file) is the app's
+    st.cache_resource function; the session only keeps the handle. The
+    uploads are passed on only while they are still the processed ones, so
+    an expired entry is never rebuilt from different files: reconciled
+    raises LookupError instead.
+    """
+    handle = st.session_state.get('results_handle')
+    if handle is None:
+        return None
+    uploads = (purchase_file, gstr2b_file)
+    if not all(uploads) or uploads_handle(*uploads) != handle:
+        uploads = (None, None)
+    return reconciled(handle, *uploads)
+
+
+def show_result_page(results, category, key, page_rows=TABLE_PAGE_ROWS):
+    """Show one page of a result category, with a page picker when it has more than one"""
+    count = results.count(category)
+    pages = max(1, -(-count // page_rows))
+    page = 1
+    if pages > 1:
+        page = st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, value=1, key=f"{key}_page")
+    start = (page - 1) * page_rows
+    stop = min(start + page_rows, count)
+    st.dataframe(results.frame(category, rows=slice(start, stop)), use_container_width=True)
+    if pages > 1:
+        st.caption(f"Rows {start + 1:,}-{stop:,} of {count:,}")
+
+
+def result_csv(results, category):
+    """CSV text of a whole result category, derived a block at a time"""
+    output = io.StringIO()
+    for start in range(0, max(results.count(category), 1), EXPORT_BLOCK_ROWS):
+        rows = slice(start, start + EXPORT_BLOCK_ROWS)
+        results.frame(category, rows=rows).to_csv(output, index=False, header=start == 0)
+    return output.getvalue()
+
+
+def workbook_download(label, sheets, file_name):
+    """Download button for a workbook of sheets (as taken by export_workbook).
+
+    The workbook is streamed into a temp file on disk, so writing it keeps
+    memory flat. st.download_button still reads the finished file into
+    memory: Streamlit holds download data in its in-memory media store, so
+    the peak is the size of the .xlsx file (compressed, well below the
+    rows it holds) rather than zero.
+    """
+    with tempfile.TemporaryFile(suffix='.xlsx') as output:
+        export_workbook(output, sheets)
+        output.seek(0)
+        st.download_button(label=label, data=output, file_name=file_name, mime=XLSX_MIME)
@@ -0,0 +1,46 @@
+import os
+import tempfile
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import excel_export
+from excel_export import export_workbook
+
+
+def test_long_sheets_split_into_parts():
+    df = pd.DataFrame({
+        'invoice_no': [f'INV/{n}' for n in range(12)],
+        'invoice_date': [datetime(2024, 5, 1 + n) for n in range(12)],
+        'taxable_value': [100.0 * n for n in range(12)]
+    })
+    df.loc[4, 'taxable_value'] = np.inf
+    block_rows = excel_export.EXPORT_BLOCK_ROWS
+    # Blocks that straddle the sheet boundaries
+    excel_export.EXPORT_BLOCK_ROWS = 3
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'report.xlsx')
+            parts = export_workbook(path, [
+                ('Matched', df),
+                ('Derived', len(df), lambda start, stop: df.iloc[start:stop, :1]),
+                ('Empty', df.iloc[:0])
+            ], rows_per_sheet=5)
+            written = pd.read_excel(path, sheet_name=None)
+    finally:
+        excel_export.EXPORT_BLOCK_ROWS = block_rows
+
+    assert parts == {'Matched': ['Matched', 'Matched_2', 'Matched_3'],
+                     'Derived': ['Derived', 'Derived_2', 'Derived_3'], 'Empty': ['Empty']}
+    assert list(written) == ['Matched', 'Matched_2', 'Matched_3', 'Derived', 'Derived_2', 'Derived_3', 'Empty']
+    assert [len(written[name]) for name in parts['Matched']] == [5, 5, 2]
+    matched = pd.concat([written[name] for name in parts['Matched']], ignore_index=True)
+    expected = df.replace(np.inf, np.nan)
+    pd.testing.assert_frame_equal(matched, expected, check_dtype=False)
+    derived = pd.concat([written[name] for name in parts['Derived']], ignore_index=True)
+    assert derived['invoice_no'].tolist() == df['invoice_no'].tolist()
+    assert list(written['Empty'].columns) == list(df.columns) and written['Empty'].empty
+
+
+if __name__ == "__main__":
+    test_long_sheets_split_into_parts()
+    print("✅ Long sheets split over continuation sheets")
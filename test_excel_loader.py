@@ -0,0 +1,44 @@
+import os
+import tempfile
+from datetime import datetime
+import openpyxl
+import pandas as pd
+from excel_loader import load_register, iter_table_chunks, concat_chunks, GSTR2B_COLUMNS
+
+
+def write_sample(path, rows=60, skip_rows=6):
+    """GSTR2B-shaped workbook with runs of blank dates, blank text and whole-number amounts"""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    for i in range(skip_rows):
+        ws.append([f'Title line {i + 1}'] if i % 2 == 0 else [])
+    ws.append([f'Column {i + 1}' for i in range(len(GSTR2B_COLUMNS))])
+    for n in range(rows):
+        row = [None] * len(GSTR2B_COLUMNS)
+        row[0] = f'27AAAPL{n:04d}C1Z5'
+        row[1] = f'Supplier {n}'
+        row[2] = n if n % 3 else f'INV/{n}'
+        row[4] = datetime(2024, 5, 1 + n % 28)
+        row[9] = 1000.0 * (n + 1)
+        row[10] = 180 if n % 2 else 180.5
+        # Filing date blank for the first rows and again in the middle
+        row[15] = None if n < 15 or 30 <= n < 45 else datetime(2024, 6, 11)
+        row[17] = None if n < 20 else 'Reason'
+        ws.append(row)
+    wb.save(path)
+
+
+def test_chunked_dtypes_match_read_excel():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'gstr2b.xlsx')
+        write_sample(path)
+        expected = load_register(path, GSTR2B_COLUMNS, skip_rows=6).reset_index(drop=True)
+        for chunk_size in (7, 15, 1000):
+            chunked = concat_chunks(iter_table_chunks(path, 6, GSTR2B_COLUMNS, chunk_size))
+            assert chunked.dtypes.to_dict() == expected.dtypes.to_dict(), chunk_size
+            pd.testing.assert_frame_equal(chunked, expected)
+
+
+if __name__ == "__main__":
+    test_chunked_dtypes_match_read_excel()
+    print("✅ Chunked loads match read_excel dtypes")
@@ -0,0 +1,77 @@
+import io
+import json
+import os
+import tempfile
+import pandas as pd
+from excel_loader import concat_chunks, GSTR2B_COLUMNS
+from gstr2b_json import JsonStream, iter_gstr2b_json, read_gstr2b_json, invoice_rows, _b2b_rows, SUPPLIER_FIELDS
+
+
+def portal_json(suppliers=5, invoices=3):
+    """Portal-shaped GSTR-2B download with escapes, long numbers and sections to skip"""
+    b2b = []
+    for s in range(suppliers):
+        supplier = {
+            'trdnm': f'Supplier "{s}" \\ Traders ₹',
+            'supprd': '052024',
+            'supfildt': '11-06-2024',
+            'inv': [{
+                'inum': f'INV/{s}/{n:03d}', 'typ': 'R', 'dt': f'{1 + n:02d}-05-2024', 'val': 1180.123456789,
+                'pos': '27', 'rev': 'N', 'itcavl': 'Y', 'diffprcnt': 0.65 if n == 1 else None,
+                'items': [{'rt': 18, 'txval': 1000.5 * (n + 1), 'igst': 180.09, 'cess': 0}]
+                if n % 2 else [{'itm_det': {'rt': 5, 'txval': 200, 'iamt': 10.0}}, {'rt': 12, 'txval': 50}]
+            } for n in range(invoices)]
+        }
+        # Supplier fields before and after inv
+        supplier = {'ctin': f'27AAAPL{s:04d}C1Z5', **supplier} if s % 2 else {**supplier, 'ctin': f'27AAAPL{s:04d}C1Z5'}
+        b2b.append(supplier)
+    return {'chksum': 'x' * 40, 'data': {
+        'gstin': '27AAACT1234F1Z5', 'rtnprd': '052024',
+        'docdata': {'cdnr': [{'ctin': 'skip', 'nt': [{'ntnum': 'CN/1', 'items': [[1, [2, {}]]]}]}], 'b2b': b2b},
+        'empty': {}, 'nothing': [], 'flag': True
+    }}
+
+
+def reference_rows(document):
+    rows = []
+    for supplier in document['data']['docdata']['b2b']:
+        columns = {column: supplier.get(field) for column, field in SUPPLIER_FIELDS.items()}
+        for invoice in supplier['inv']:
+            rows += [{**row, **columns} for row in invoice_rows(invoice)]
+    return rows
+
+
+def test_json_stream_small_reads():
+    document = portal_json()
+    text = json.dumps(document, indent=1, ensure_ascii=False)
+    expected = reference_rows(document)
+    for read_chars in (1, 2, 3, 7, 64):
+        assert JsonStream(io.StringIO(text), read_chars).value() == document, read_chars
+        assert list(_b2b_rows(JsonStream(io.StringIO(text), read_chars))) == expected, read_chars
+
+
+def test_iter_gstr2b_json_matches_json_load():
+    document = portal_json()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'gstr2b.json')
+        with open(path, 'w', encoding='utf-8-sig') as f:
+            json.dump(document, f)
+        chunks = list(iter_gstr2b_json(path, chunk_size=4))
+        assert [len(chunk) for chunk in chunks[:-1]] == [4] * (len(chunks) - 1)
+        # A chunk whose column is all blank must not change the column's dtype
+        parsed = concat_chunks(chunks)
+        expected = pd.DataFrame.from_records(reference_rows(document), columns=GSTR2B_COLUMNS)
+        pd.testing.assert_frame_equal(parsed, expected)
+        pd.testing.assert_frame_equal(read_gstr2b_json(path), expected)
+        assert parsed['invoice_type'].eq('Regular').all() and parsed['igst'].notna().all()
+
+        with open(path, 'w') as f:
+            json.dump({'data': {'docdata': {}}}, f)
+        chunks = list(iter_gstr2b_json(path))
+        assert len(chunks) == 1 and chunks[0].empty and list(chunks[0].columns) == GSTR2B_COLUMNS
+
+
+if __name__ == "__main__":
+    test_json_stream_small_reads()
+    test_iter_gstr2b_json_matches_json_load()
+    print("✅ GSTR-2B JSON streams like json.load")
@@ -0,0 +1,58 @@
+import os
+import sqlite3
+import tempfile
+import pandas as pd
+from incremental import reconcile_incremental, build_results, RESULT_TABLES, RESULTS_LAYOUT
+
+
+def registers():
+    purchase = pd.DataFrame({
+        'gstin': [f'27AAAPL{n % 5:04d}C1Z5' for n in range(30)],
+        'party_name': [f'Party {n % 5}' for n in range(30)],
+        'invoice_no': [f'INV/{n:03d}/24-25' for n in range(30)],
+        'taxable_value': [1000.0 + n for n in range(30)],
+        'igst': [180.0] * 30,
+        'cgst': [0.0] * 30,
+        'sgst': [0.0] * 30,
+        'cess': [0.0] * 30
+    })
+    gstr2b = purchase.iloc[5:35].rename(columns={'gstin': 'supplier_gstin', 'party_name': 'supplier_name'})
+    gstr2b = pd.concat([gstr2b, gstr2b.iloc[:3].assign(taxable_value=1.0)], ignore_index=True)
+    return purchase, gstr2b
+
+
+def stored_tables(db_path):
+    """Result tables in a fixed row order: a patch appends the rows it rematched"""
+    conn = sqlite3.connect(db_path)
+    try:
+        tables = {table: pd.read_sql_query(f'SELECT * FROM {table}', conn) for table in RESULT_TABLES}
+    finally:
+        conn.close()
+    return {table: df.sort_values(list(df.columns)).reset_index(drop=True) for table, df in tables.items()}
+
+
+def test_patch_matches_full_rebuild():
+    purchase, gstr2b = registers()
+    with tempfile.TemporaryDirectory() as directory:
+        patched_db = os.path.join(directory, 'patched.db')
+        assert reconcile_incremental(purchase, gstr2b, build_results, RESULTS_LAYOUT, patched_db) == 30
+        assert reconcile_incremental(purchase, gstr2b, build_results, RESULTS_LAYOUT, patched_db) == 0
+
+        # Change an amount, drop a purchase row, add a GSTR2B row and move
+        # a duplicate of INV/005 ahead of its first row (the first one wins)
+        purchase.loc[7, 'taxable_value'] = 5.0
+        purchase = purchase.drop(index=12)
+        extra = gstr2b.iloc[[0]].assign(invoice_no='INV/999/24-25')
+        gstr2b = pd.concat([gstr2b.iloc[[25]], gstr2b.drop(index=25), extra], ignore_index=True)
+        assert reconcile_incremental(purchase, gstr2b, build_results, RESULTS_LAYOUT, patched_db) == 4
+
+        full_db = os.path.join(directory, 'full.db')
+        reconcile_incremental(purchase, gstr2b, build_results, RESULTS_LAYOUT, full_db)
+        patched, full = stored_tables(patched_db), stored_tables(full_db)
+        for table in RESULT_TABLES:
+            pd.testing.assert_frame_equal(patched[table], full[table], check_dtype=False)
+
+
+if __name__ == "__main__":
+    test_patch_matches_full_rebuild()
+    print("✅ Incremental patch matches a full rebuild")
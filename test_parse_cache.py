@@ -0,0 +1,39 @@
+import os
+import tempfile
+from datetime import datetime
+import pandas as pd
+from parse_cache import cached_register, text_columns
+from test_excel_loader import write_sample
+
+
+def test_hit_keeps_miss_dtypes():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'gstr2b.xlsx')
+        cache_dir = os.path.join(directory, 'cache')
+        write_sample(path)
+        parsed = cached_register(path, 'gstr2b', skip_rows=6, cache_dir=cache_dir)
+        cached = cached_register(path, 'gstr2b', skip_rows=6, cache_dir=cache_dir)
+        assert len(os.listdir(cache_dir)) == 1
+        assert cached.dtypes.to_dict() == parsed.dtypes.to_dict()
+        pd.testing.assert_frame_equal(cached, parsed)
+
+
+def test_text_columns_only_stringify_text_and_numbers():
+    df = pd.DataFrame({
+        'invoice_no': pd.Series([101, 'INV/7', None], dtype=object),
+        'invoice_date': pd.Series([datetime(2024, 5, 1), None, datetime(2024, 5, 3)], dtype=object),
+        'taxable_value': pd.Series([1000, None, 250.5], dtype=object),
+        'mixed': pd.Series([datetime(2024, 5, 1), 5.0, None], dtype=object)
+    })
+    converted = text_columns(df)
+    assert converted['invoice_no'].tolist()[:2] == ['101', 'INV/7'] and pd.isna(converted['invoice_no'][2])
+    assert pd.api.types.is_datetime64_any_dtype(converted['invoice_date'])
+    assert converted['taxable_value'].dtype == float
+    assert converted['mixed'].tolist()[:2] == [datetime(2024, 5, 1), 5.0]
+
+
+if __name__ == "__main__":
+    test_hit_keeps_miss_dtypes()
+    print("✅ Cache hits keep the parsed dtypes")
+    test_text_columns_only_stringify_text_and_numbers()
+    print("✅ Only text / number columns become text")
@@ -0,0 +1,109 @@
+import os
+import tempfile
+import pandas as pd
+from excel_loader import PURCHASE_COLUMNS
+from purchase_register import iter_tally_xml, iter_purchase_csv, iter_purchase_register
+
+
+def voucher(vch_type, reference, party, entries, cancelled=False):
+    ledgers = ''.join(f'<{tag}><LEDGERNAME>{name}</LEDGERNAME>'
+                      f'{"<ISPARTYLEDGER>Yes</ISPARTYLEDGER>" if name == party else ""}'
+                      f'<AMOUNT>{amount}</AMOUNT></{tag}>' for tag, name, amount in entries)
+    return (f'<TALLYMESSAGE><VOUCHER VCHTYPE="{vch_type}" ACTION="Create">'
+            f'<DATE>20240501</DATE><REFERENCEDATE>20240428</REFERENCEDATE><REFERENCE>{reference}</REFERENCE>'
+            f'<VOUCHERNUMBER>{reference}-B</VOUCHERNUMBER><PARTYLEDGERNAME>{party}</PARTYLEDGERNAME>'
+            f'<PARTYGSTIN>27AAAPL1234C1Z5</PARTYGSTIN><STATENAME>Maharashtra</STATENAME>'
+            f'<ISCANCELLED>{"Yes" if cancelled else "No"}</ISCANCELLED>{ledgers}</VOUCHER></TALLYMESSAGE>')
+
+
+def tally_export():
+    ledger = 'ALLLEDGERENTRIES.LIST'
+    intra_state = [(ledger, 'Acme &#4;Traders', '11800.00'), (ledger, 'Purchase @ 18%', '-10000.00'),
+                   (ledger, 'Input CGST 9%', '-900.00'), (ledger, 'Input SGST 9%', '-900.00')]
+    inter_state = [(ledger, 'Beta Ltd', '5900.40'), ('ALLINVENTORYENTRIES.LIST', 'Steel', '-5000.00'),
+                   (ledger, 'IGST Input', '-900.00'), (ledger, 'Round Off', '-0.40')]
+    vouchers = [
+        voucher('Purchase', 'INV/001', 'Acme &#4;Traders', intra_state),
+        voucher('Sales', 'S/001', 'Acme &#4;Traders', intra_state),
+        voucher('Purchase', 'INV/002', 'Acme &#4;Traders', intra_state, cancelled=True),
+        voucher('Purchase Order', 'PO/001', 'Beta Ltd', inter_state),
+        voucher('Purchase GST', 'INV/003', 'Beta Ltd', inter_state),
+        voucher('purchase', 'INV/004', 'Beta Ltd', inter_state),
+    ]
+    return ('<ENVELOPE><HEADER><TALLYREQUEST>Import Data</TALLYREQUEST></HEADER><BODY><IMPORTDATA>'
+            f'<REQUESTDATA>{"".join(vouchers)}</REQUESTDATA></IMPORTDATA></BODY></ENVELOPE>')
+
+
+def read_xml(path, **kwargs):
+    return pd.concat(list(iter_tally_xml(path, chunk_size=1, **kwargs)), ignore_index=True)
+
+
+def test_tally_xml_vouchers():
+    with tempfile.TemporaryDirectory() as directory:
+        frames = []
+        for encoding in ('utf-8', 'utf-8-sig', 'utf-16'):
+            path = os.path.join(directory, f'purchase-{encoding}.xml')
+            with open(path, 'w', encoding=encoding) as f:
+                f.write(tally_export())
+            frames.append(read_xml(path))
+            custom = read_xml(path, voucher_types=('Purchase', 'Purchase GST', 'Purchase Order'))
+        for df in frames[1:]:
+            pd.testing.assert_frame_equal(df, frames[0])
+
+    df = frames[0]
+    # Sales, cancelled and order vouchers are skipped; types compare case-insensitively
+    assert list(df.columns) == PURCHASE_COLUMNS
+    assert df['invoice_no'].tolist() == ['INV/001', 'INV/004']
+    first, second = df.to_dict('records')
+    assert first['party_name'] == 'Acme Traders' and first['gstin'] == '27AAAPL1234C1Z5'
+    assert first['invoice_date'] == pd.Timestamp('2024-04-28')
+    assert (first['taxable_value'], first['cgst'], first['sgst'], first['igst']) == (10000.0, 900.0, 900.0, 0.0)
+    assert (first['rate'], first['total_value']) == (18.0, 11800.0)
+    assert (second['taxable_value'], second['igst'], second['total_value']) == (5000.0, 900.0, 5900.4)
+    # Listed custom types are read, orders never are
+    assert custom['invoice_no'].tolist() == ['INV/001', 'INV/003', 'INV/004']
+
+
+def test_tally_xml_without_purchases():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'empty.xml')
+        with open(path, 'w') as f:
+            f.write('<ENVELOPE><BODY></BODY></ENVELOPE>')
+        chunks = list(iter_tally_xml(path))
+    assert len(chunks) == 1 and chunks[0].empty and list(chunks[0].columns) == PURCHASE_COLUMNS
+
+
+def test_purchase_csv():
+    lines = [
+        'Acme Industries Pvt Ltd',
+        'Purchase Register,1-Apr-2024 to 31-Mar-2025',
+        '',
+        'GSTIN,Party,State,Invoice No,Date,Rate,Taxable,IGST,CGST,SGST,Cess,Total',
+        '27AAAPL1234C1Z5,Acme Traders,Maharashtra,00123,01-05-2024,18,"1,23,456.50",0,"11,111.09","11,111.09",0,"1,45,678.68"',
+        ',,,,,,,,,,,',
+        '27AAAPL1234C1Z5,"Beta, Ltd",Maharashtra,INV/7,02-05-2024,5,200,10,0,0,0,210',
+        '29AABCB5678D1Z2,Gamma,Karnataka,1E5,03-05-2024,12,"1,000",120,0,0,0,"1,120"',
+    ]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'purchase.csv')
+        with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+            f.write('\r\n'.join(lines) + '\r\n')
+        df = pd.concat(list(iter_purchase_csv(path, chunk_size=2)), ignore_index=True)
+        by_extension = pd.concat(list(iter_purchase_register(path, chunk_size=2)), ignore_index=True)
+
+    pd.testing.assert_frame_equal(by_extension, df)
+    assert list(df.columns) == PURCHASE_COLUMNS
+    # Numeric-looking invoice numbers stay text, blank rows are dropped
+    assert df['invoice_no'].tolist() == ['00123', 'INV/7', '1E5']
+    assert df['party_name'].tolist() == ['Acme Traders', 'Beta, Ltd', 'Gamma']
+    assert df['taxable_value'].tolist() == [123456.5, 200.0, 1000.0]
+    assert df['total_value'].tolist() == [145678.68, 210.0, 1120.0]
+    assert df['cgst'].tolist() == [11111.09, 0.0, 0.0]
+
+
+if __name__ == "__main__":
+    test_tally_xml_vouchers()
+    test_tally_xml_without_purchases()
+    print("✅ Tally XML vouchers read in UTF-8 and UTF-16")
+    test_purchase_csv()
+    print("✅ CSV purchase registers read with thousands separators")
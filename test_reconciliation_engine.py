@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+from reconciliation_engine import match_invoices, match_with_tolerance, canonical_invoice
+
+
+def registers(rows=200, seed=0):
+    """Purchase / GSTR2B frames sharing some (GSTIN, invoice no) keys, with
+    repeated keys on both sides and rows only one side has"""
+    rng = np.random.default_rng(seed)
+    gstins = [f'27AAAPL{n:04d}C1Z5' for n in range(12)]
+    purchase = pd.DataFrame({
+        'gstin': rng.choice(gstins, rows),
+        'invoice_no': [f'INV-{n}' for n in rng.integers(0, rows // 2, rows)],
+        'taxable_value': rng.integers(100, 10000, rows).astype(float)
+    })
+    gstr2b = pd.DataFrame({
+        'supplier_gstin': rng.choice(gstins, rows),
+        'invoice_no': [f'INV-{n}' for n in rng.integers(0, rows // 2, rows)],
+        'taxable_value': rng.integers(100, 10000, rows).astype(float)
+    })
+    return purchase, gstr2b
+
+
+def nested_loop_match(purchase_df, gstr2b_df):
+    """The original row-by-row scan: each purchase row takes the first GSTR2B
+    row with the same GSTIN and invoice no, and the reverse for not in books"""
+    matched, not_in_gstr2b, not_in_books = [], [], []
+    for p_pos, (_, p_row) in enumerate(purchase_df.iterrows()):
+        for g_pos, (_, g_row) in enumerate(gstr2b_df.iterrows()):
+            if (str(p_row['gstin']).strip() == str(g_row['supplier_gstin']).strip() and
+                    str(p_row['invoice_no']).strip() == str(g_row['invoice_no']).strip()):
+                matched.append((p_pos, g_pos))
+                break
+        else:
+            not_in_gstr2b.append(p_pos)
+    for g_pos, (_, g_row) in enumerate(gstr2b_df.iterrows()):
+        if not any(str(p_row['gstin']).strip() == str(g_row['supplier_gstin']).strip() and
+                   str(p_row['invoice_no']).strip() == str(g_row['invoice_no']).strip()
+                   for _, p_row in purchase_df.iterrows()):
+            not_in_books.append(g_pos)
+    return matched, not_in_gstr2b, not_in_books
+
+
+def test_match_invoices_matches_nested_loop():
+    purchase, gstr2b = registers()
+    # Index labels must not matter: results are positions
+    purchase.index = purchase.index * 3 + 7
+    matched, not_in_gstr2b, not_in_books = nested_loop_match(purchase, gstr2b)
+    result = match_invoices(purchase, gstr2b)
+    assert list(zip(*(pos.tolist() for pos in result['matched']))) == matched
+    assert result['not_in_gstr2b'].tolist() == not_in_gstr2b
+    assert result['not_in_books'].tolist() == not_in_books
+    assert len(matched) and len(not_in_gstr2b) and len(not_in_books)
+
+
+def tolerance_pairs(purchase_rows, gstr2b_rows):
+    """match_with_tolerance over every row, as {purchase invoice no: GSTR2B invoice no}"""
+    columns = ['gstin', 'invoice_no', 'taxable_value', 'invoice_date']
+    purchase = pd.DataFrame(purchase_rows, columns=columns)
+    gstr2b = pd.DataFrame(gstr2b_rows, columns=columns).rename(columns={'gstin': 'supplier_gstin'})
+    p_pos, g_pos = match_with_tolerance(purchase, gstr2b, np.arange(len(purchase)), np.arange(len(gstr2b)))
+    return dict(zip(purchase['invoice_no'].iloc[p_pos], gstr2b['invoice_no'].iloc[g_pos]))
+
+
+def test_tolerance_windows():
+    day = pd.Timestamp('2024-05-10')
+    next_day = day + pd.Timedelta(days=1)
+    two_days = day + pd.Timedelta(days=2)
+    pairs = tolerance_pairs([
+        # ±₹1 on small amounts (2% of 10 is only 0.20)
+        ('GSTIN-A', 'P1', 10.0, day), ('GSTIN-B', 'P2', 10.0, day),
+        # 2% on large amounts
+        ('GSTIN-C', 'P3', 1000.0, day), ('GSTIN-D', 'P4', 1000.0, day),
+        # ±1 day
+        ('GSTIN-E', 'P5', 500.0, day), ('GSTIN-F', 'P6', 500.0, day),
+        # Undated invoices never pair
+        ('GSTIN-G', 'P7', 500.0, None),
+        # Other GSTIN
+        ('GSTIN-H', 'P8', 500.0, day),
+        # Closest amount wins and each GSTR2B row is used at most once
+        ('GSTIN-J', 'P9', 500.0, day), ('GSTIN-J', 'P10', 500.0, day), ('GSTIN-J', 'P11', 500.0, day),
+    ], [
+        ('GSTIN-A', 'G1', 11.0, day), ('GSTIN-B', 'G2', 11.5, day),
+        ('GSTIN-C', 'G3', 1020.0, day), ('GSTIN-D', 'G4', 1020.5, day),
+        ('GSTIN-E', 'G5', 500.0, next_day), ('GSTIN-F', 'G6', 500.0, two_days),
+        ('GSTIN-G', 'G7', 500.0, day),
+        ('GSTIN-X', 'G8', 500.0, day),
+        ('GSTIN-J', 'G9', 500.8, day), ('GSTIN-J', 'G10', 500.2, day),
+    ])
+    assert pairs == {'P1': 'G1', 'P3': 'G3', 'P5': 'G5', 'P9': 'G10', 'P10': 'G9'}
+
+
+def test_canonical_invoice():
+    keys = canonical_invoice(pd.Series([
+        'INV/001/24-25', 'inv-1/2024-25', ' INV 1 / 2024/2025 ', 1234.0, '1234.0', '00123', None
+    ])).tolist()
+    assert keys == ['INV-1-24-25', 'INV-1-24-25', 'INV-1-24-25', '1234', '1234', '123', '']
+
+
+def test_canonical_invoice_keeps_digit_runs_apart():
+    # A trailing pair of 2-digit groups is only a financial year after a
+    # separator, for consecutive years in the GST era
+    for first, second in [('A/45-46', 'A4546'), ('INV 12/13', 'INV1213'), ('INV/24-25', 'INV2425'),
+                          ('X/2016-17', 'X/16-17'), ('B/24-26', 'B/2426')]:
+        first_key, second_key = canonical_invoice(pd.Series([first, second])).tolist()
+        assert first_key != second_key, (first, second, first_key)
+    assert canonical_invoice(pd.Series(['4546', '2425'])).tolist() == ['4546', '2425']
+
+
+if __name__ == "__main__":
+    test_match_invoices_matches_nested_loop()
+    print("✅ Hash join matches the nested loop")
+    test_tolerance_windows()
+    print("✅ Tolerance windows hold")
+    test_canonical_invoice()
+    test_canonical_invoice_keeps_digit_runs_apart()
+    print("✅ Invoice keys canonicalize without collisions")
@@ -0,0 +1,98 @@
+import os
+import sqlite3
+import tempfile
+import pandas as pd
+from incremental import reconcile_incremental, build_results, RESULT_TABLES, RESULTS_LAYOUT, KEY_COLUMNS
+from reconciliation_engine import GSTIN_KEY
+from results_store import save_run, snapshot_run, list_runs, run_counts, read_run, page_run, RESULT_COLUMNS, RESULTS_TABLE
+from test_incremental import registers
+
+
+def sorted_rows(df):
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+def test_save_and_snapshot_runs():
+    purchase, gstr2b = registers()
+    results = build_results(purchase, gstr2b)
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, 'results.db')
+        saved = [save_run(results, 'test', db_path, keep=2) for _ in range(3)]
+        reconcile_incremental(purchase, gstr2b, build_results, RESULTS_LAYOUT, db_path)
+        snapshot = snapshot_run('snapshot', db_path, keep=2)
+
+        conn = sqlite3.connect(db_path)
+        try:
+            # Only the newest keep runs are left
+            assert list_runs(conn)['run_id'].tolist() == [snapshot, saved[-1]]
+            for run_id in (saved[-1], snapshot):
+                assert run_counts(conn, run_id) == {status: len(results[status]) for status in RESULT_TABLES}
+                for status in RESULT_TABLES:
+                    stored = read_run(conn, status, run_id)
+                    expected = results[status][RESULT_COLUMNS[status]]
+                    pd.testing.assert_frame_equal(sorted_rows(stored), sorted_rows(expected), check_dtype=False)
+            # The latest run is read by default
+            assert read_run(conn, 'matched').equals(read_run(conn, 'matched', snapshot))
+        finally:
+            conn.close()
+
+
+def test_page_run_keyset_pages():
+    purchase, gstr2b = registers()
+    # Same GSTINs typed with other spacing and case
+    purchase['gstin'] = [gstin.lower() if n % 3 == 0 else f' {gstin[:2]} {gstin[2:]}'
+                         for n, gstin in enumerate(purchase['gstin'])]
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, 'results.db')
+        run_id = save_run(build_results(purchase, gstr2b), 'test', db_path)
+        conn = sqlite3.connect(db_path)
+        try:
+            for status in RESULT_TABLES:
+                expected = read_run(conn, status).values.tolist()
+                pages, next_page = [], {}
+                while next_page is not None:
+                    columns, rows, next_page = page_run(conn, status, limit=4, **(
+                        {'run_id': next_page['run'], 'after': next_page['after']} if next_page else {}))
+                    assert len(rows) <= 4
+                    pages += rows
+                assert columns == RESULT_COLUMNS[status]
+                assert pages == expected
+
+            # Prefix filter on the key, whatever the spacing of the stored GSTIN
+            _, rows, _ = page_run(conn, 'not_in_gstr2b', gstin='27aaapl 0001')
+            assert rows and all(row[0].replace(' ', '').upper().startswith('27AAAPL0001') for row in rows)
+
+            # Both the prefix filter and the page seek run on the index, with no sort
+            plan = ' '.join(row[-1] for row in conn.execute(
+                f'EXPLAIN QUERY PLAN SELECT rowid FROM {RESULTS_TABLE} WHERE run_id = ? AND status = ? '
+                f'AND {GSTIN_KEY} >= ? AND {GSTIN_KEY} < ? AND ({GSTIN_KEY}, rowid) > (?, ?) '
+                f'ORDER BY {GSTIN_KEY}, rowid LIMIT 5', (run_id, 'matched', '27', '28', '27', 0)))
+            assert f'idx_{RESULTS_TABLE}_run_key' in plan and 'TEMP B-TREE' not in plan, plan
+        finally:
+            conn.close()
+
+
+def test_snapshot_fills_missing_gstin_keys():
+    purchase, gstr2b = registers()
+    results = build_results(purchase, gstr2b)
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, 'results.db')
+        conn = sqlite3.connect(db_path)
+        # Working tables as older code wrote them, without the key columns
+        for status in RESULT_TABLES:
+            results[status].drop(columns=KEY_COLUMNS).to_sql(status, conn, index=False)
+        conn.close()
+        snapshot_run('old tables', db_path)
+        conn = sqlite3.connect(db_path)
+        try:
+            assert conn.execute(f'SELECT COUNT(*) FROM {RESULTS_TABLE} WHERE {GSTIN_KEY} IS NULL').fetchone() == (0,)
+        finally:
+            conn.close()
+
+
+if __name__ == "__main__":
+    test_save_and_snapshot_runs()
+    print("✅ Runs are stored, snapshotted and pruned")
+    test_page_run_keyset_pages()
+    test_snapshot_fills_missing_gstin_keys()
+    print("✅ Runs page on the GSTIN key index")
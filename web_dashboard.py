@@ -1,145 +1,31 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import io
+from detailed_report import reconcile_result
+from streamlit_cache import uploads_handle, parsed_upload, session_results, show_result_page, result_csv, workbook_download, CACHE_TTL, CACHE_ENTRIES
 
-def find_data_start(uploaded_file):
-    df = pd.read_excel(uploaded_file)
-    for i in range(len(df)):
-        test_df = pd.read_excel(uploaded_file, skiprows=i)
-        if len(test_df.columns) >= 5 and not test_df.empty:
-            if test_df.iloc[0].count() >= 5:
-                return i
-    return 0
+# Columns this dashboard shows for the one-sided categories
+WEB_COLUMNS = {
+    'not_in_gstr2b': ['GSTIN', 'Name of Party', 'State Name', 'A/C Invoice No', 'A/C Date', 'A/C Rate',
+                      'A/C Taxable Value', 'A/C IGST', 'A/C CGST', 'A/C SGST', 'A/C CESS', 'Status', 'Reason',
+                      'Accept / Reject', 'Remark 1', 'Eligibility For ITC Books', 'A/C Reverse Charge'],
+    'not_in_books': ['GSTIN', 'Name of Party', 'GSTR 2B Invoice No', 'GSTR 2B Date', 'GSTR 2B Taxable Value',
+                     'GSTR 2B IGST', 'GSTR 2B CGST', 'GSTR 2B SGST', 'GSTR 2B CESS', 'Status', 'Reason',
+                     'Accept / Reject', 'Remark 1', 'ITC Claim Status', 'GSTR 2B Reverse Charge']
+}
 
 def detailed_reconciliation(purchase_df, gstr2b_df):
-    matched = []
-    mismatched = []
-    not_in_gstr2b = []
-    not_in_books = []
-    
-    for _, p_row in purchase_df.iterrows():
-        match_found = False
-        for _, g_row in gstr2b_df.iterrows():
-            if (str(p_row['gstin']).strip() == str(g_row['supplier_gstin']).strip() and
-                str(p_row['invoice_no']).strip() == str(g_row['invoice_no']).strip()):
-                
-                # Calculate differences
-                value_diff = float(p_row['taxable_value'] or 0) - float(g_row['taxable_value'] or 0)
-                igst_diff = float(p_row['igst'] or 0) - float(g_row['igst'] or 0)
-                cgst_diff = float(p_row['cgst'] or 0) - float(g_row['cgst'] or 0)
-                sgst_diff = float(p_row['sgst'] or 0) - float(g_row['sgst'] or 0)
-                cess_diff = float(p_row['cess'] or 0) - float(g_row['cess'] or 0)
-                
-                is_perfect_match = (abs(value_diff) < 0.01 and abs(igst_diff) < 0.01 and 
-                                  abs(cgst_diff) < 0.01 and abs(sgst_diff) < 0.01 and abs(cess_diff) < 0.01)
-                
-                record = {
-                    'GSTIN': p_row['gstin'],
-                    'Name of Party': p_row['party_name'],
-                    'State Name': p_row['state'],
-                    'A/C Invoice No': p_row['invoice_no'],
-                    'A/C Date': p_row['invoice_date'],
-                    'A/C Rate': p_row['rate'],
-                    'A/C Taxable Value': p_row['taxable_value'],
-                    'A/C IGST': p_row['igst'],
-                    'A/C CGST': p_row['cgst'],
-                    'A/C SGST': p_row['sgst'],
-                    'A/C CESS': p_row['cess'],
-                    'GSTR 2B Invoice No': g_row['invoice_no'],
-                    'GSTR 2B Date': g_row['invoice_date'],
-                    'GSTR 2B Rate': g_row['rate'],
-                    'GSTR 2B Taxable Value': g_row['taxable_value'],
-                    'GSTR 2B IGST': g_row['igst'],
-                    'GSTR 2B CGST': g_row['cgst'],
-                    'GSTR 2B SGST': g_row['sgst'],
-                    'GSTR 2B CESS': g_row['cess'],
-                    'Differnce Record Value': value_diff,
-                    'Differnce Record IGST': igst_diff,
-                    'Differnce Record CGST': cgst_diff,
-                    'Differnce Record SGST': sgst_diff,
-                    'Differnce Record CESS': cess_diff,
-                    'Status': 'Matched' if is_perfect_match else 'Mismatched',
-                    'Reason': 'Perfect Match' if is_perfect_match else 'Value Difference',
-                    'Accept / Reject': 'Accept' if is_perfect_match else 'Review Required',
-                    'Remark 1': '' if is_perfect_match else 'Check value differences',
-                    'ITC Claim Status': g_row.get('itc_availability', ''),
-                    'ITC Claim Month': '',
-                    'A/C Month': '',
-                    'GSTR 2B Month': '',
-                    'GSTR1 Filing Month': '',
-                    'GSTR1 Filing Date': g_row.get('filing_date', ''),
-                    'Remark 2': '',
-                    'Remark 3': '',
-                    'Eligibility For ITC Books': 'Yes',
-                    'Eligibility For ITC 2B': g_row.get('itc_availability', ''),
-                    'Section Name': '',
-                    'A/C Reverse Charge': 'No',
-                    'GSTR 2B Reverse Charge': g_row.get('reverse_charge', '')
-                }
-                
-                if is_perfect_match:
-                    matched.append(record)
-                else:
-                    mismatched.append(record)
-                
-                match_found = True
-                break
-        
-        if not match_found:
-            not_in_gstr2b.append({
-                'GSTIN': p_row['gstin'],
-                'Name of Party': p_row['party_name'],
-                'State Name': p_row['state'],
-                'A/C Invoice No': p_row['invoice_no'],
-                'A/C Date': p_row['invoice_date'],
-                'A/C Rate': p_row['rate'],
-                'A/C Taxable Value': p_row['taxable_value'],
-                'A/C IGST': p_row['igst'],
-                'A/C CGST': p_row['cgst'],
-                'A/C SGST': p_row['sgst'],
-                'A/C CESS': p_row['cess'],
-                'Status': 'Not in GSTR2B',
-                'Reason': 'Missing in GSTR2B',
-                'Accept / Reject': 'Reject',
-                'Remark 1': 'Invoice not found in GSTR2B',
-                'Eligibility For ITC Books': 'No',
-                'A/C Reverse Charge': 'No'
-            })
-    
-    for _, g_row in gstr2b_df.iterrows():
-        match_found = False
-        for _, p_row in purchase_df.iterrows():
-            if (str(p_row['gstin']).strip() == str(g_row['supplier_gstin']).strip() and
-                str(p_row['invoice_no']).strip() == str(g_row['invoice_no']).strip()):
-                match_found = True
-                break
-        
-        if not match_found:
-            not_in_books.append({
-                'GSTIN': g_row['supplier_gstin'],
-                'Name of Party': g_row['supplier_name'],
-                'GSTR 2B Invoice No': g_row['invoice_no'],
-                'GSTR 2B Date': g_row['invoice_date'],
-                'GSTR 2B Taxable Value': g_row['taxable_value'],
-                'GSTR 2B IGST': g_row['igst'],
-                'GSTR 2B CGST': g_row['cgst'],
-                'GSTR 2B SGST': g_row['sgst'],
-                'GSTR 2B CESS': g_row['cess'],
-                'Status': 'Not in Books',
-                'Reason': 'Missing in Purchase Books',
-                'Accept / Reject': 'Review Required',
-                'Remark 1': 'Invoice not found in books',
-                'ITC Claim Status': g_row.get('itc_availability', ''),
-                'GSTR 2B Reverse Charge': g_row.get('reverse_charge', '')
-            })
-    
-    return {
-        'matched': pd.DataFrame(matched),
-        'mismatched': pd.DataFrame(mismatched),
-        'not_in_gstr2b': pd.DataFrame(not_in_gstr2b),
-        'not_in_books': pd.DataFrame(not_in_books)
-    }
+    """Reconciliation as a ReconciliationResult; rows are derived only for the page shown or the export"""
+    return reconcile_result(purchase_df, gstr2b_df, columns=WEB_COLUMNS)
+
+@st.cache_resource(ttl=CACHE_TTL, max_entries=CACHE_ENTRIES, show_spinner=False)
+def reconciled(handle, _purchase_file, _gstr2b_file):
+    """Reconciliation of an upload pair, shared across reruns (treat it as read-only)"""
+    if _purchase_file is None or _gstr2b_file is None:
+        raise LookupError("Results have expired, please process the files again")
+    purchase_df = parsed_upload(_purchase_file, 'purchase')
+    gstr2b_df = parsed_upload(_gstr2b_file, 'gstr2b')
+    return detailed_reconciliation(purchase_df, gstr2b_df)
 
 def main():
     st.set_page_config(page_title="GST Reconciliation Dashboard", layout="wide")
@@ -160,55 +46,46 @@ def main():
         if st.button("🔄 Process & Reconcile", type="primary"):
             with st.spinner("Processing files and performing reconciliation..."):
                 try:
-                    # Process files
-                    purchase_skip = find_data_start(purchase_file)
-                    gstr2b_skip = find_data_start(gstr2b_file)
-                    
-                    purchase_df = pd.read_excel(purchase_file, skiprows=purchase_skip).dropna(how='all')
-                    gstr2b_df = pd.read_excel(gstr2b_file, skiprows=gstr2b_skip).dropna(how='all')
-                    
-                    # Standardize columns
-                    purchase_df.columns = ['gstin', 'party_name', 'state', 'invoice_no', 'invoice_date', 
-                                          'rate', 'taxable_value', 'igst', 'cgst', 'sgst', 'cess', 'total_value']
+                    # Parsing and reconciliation are cached by file content, so
+                    # re-clicking with the same workbooks is instant
+                    handle = uploads_handle(purchase_file, gstr2b_file)
+                    reconciled(handle, purchase_file, gstr2b_file)
                     
-                    gstr2b_df.columns = ['supplier_gstin', 'supplier_name', 'invoice_no', 'invoice_type', 
-                                        'invoice_date', 'invoice_value', 'place_of_supply', 'reverse_charge',
-                                        'rate', 'taxable_value', 'igst', 'cgst', 'sgst', 'cess', 'period',
-                                        'filing_date', 'itc_availability', 'reason', 'tax_rate_percent', 
-                                        'source', 'irn_no', 'irn_date']
-                    
-                    # Perform reconciliation
-                    results = detailed_reconciliation(purchase_df, gstr2b_df)
-                    
-                    # Store in session state
-                    st.session_state.results = results
+                    # Session state keeps only the content handle
+                    st.session_state.results_handle = handle
                     st.success("✅ Reconciliation completed successfully!")
                     
                 except Exception as e:
                     st.error(f"❌ Error processing files: {str(e)}")
     
     # Display results if available
-    if 'results' in st.session_state:
-        results = st.session_state.results
-        
-        # Summary metrics
+    try:
+        results = session_results(reconciled, purchase_file, gstr2b_file)
+    except LookupError as e:
+        del st.session_state['results_handle']
+        st.info(str(e))
+        results = None
+    
+    if results is not None:
+        # Summary metrics come from the result's status codes, no table is built
+        counts = {key: results.count(key) for key in ['matched', 'not_in_gstr2b', 'not_in_books']}
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            st.metric("✅ Matched", len(results['matched']))
+            st.metric("✅ Matched", counts['matched'])
         with col2:
-            st.metric("❌ Not in GSTR2B", len(results['not_in_gstr2b']))
+            st.metric("❌ Not in GSTR2B", counts['not_in_gstr2b'])
         with col3:
-            st.metric("⚠️ Not in Books", len(results['not_in_books']))
+            st.metric("⚠️ Not in Books", counts['not_in_books'])
         with col4:
-            total = len(results['matched']) + len(results['not_in_gstr2b']) + len(results['not_in_books'])
+            total = sum(counts.values())
             st.metric("📊 Total Records", total)
         
         # Chart
         if total > 0:
             chart_data = pd.DataFrame({
                 'Category': ['Matched', 'Not in GSTR2B', 'Not in Books'],
-                'Count': [len(results['matched']), len(results['not_in_gstr2b']), len(results['not_in_books'])]
+                'Count': [counts['matched'], counts['not_in_gstr2b'], counts['not_in_books']]
             })
             
             fig = px.pie(chart_data, values='Count', names='Category', 
@@ -219,50 +96,45 @@ def main():
         tab1, tab2, tab3 = st.tabs(["✅ Matched Records", "❌ Not in GSTR2B", "⚠️ Not in Books"])
         
         with tab1:
-            st.subheader(f"Matched Records ({len(results['matched'])})")
-            if not results['matched'].empty:
-                st.dataframe(results['matched'], use_container_width=True)
+            st.subheader(f"Matched Records ({counts['matched']})")
+            if counts['matched']:
+                show_result_page(results, 'matched', 'matched')
                 
-                # Download button
-                csv = results['matched'].to_csv(index=False)
-                st.download_button("📥 Download Matched Records", csv, "matched_records.csv", "text/csv")
+                # Every tab runs on each rerun, so the whole table is only
+                # turned into CSV once asked for
+                if st.button("📄 Prepare CSV", key="matched_csv"):
+                    st.download_button("📥 Download Matched Records", result_csv(results, 'matched'), "matched_records.csv", "text/csv")
             else:
                 st.info("No matched records found")
         
         with tab2:
-            st.subheader(f"Not in GSTR2B ({len(results['not_in_gstr2b'])})")
-            if not results['not_in_gstr2b'].empty:
-                st.dataframe(results['not_in_gstr2b'], use_container_width=True)
+            st.subheader(f"Not in GSTR2B ({counts['not_in_gstr2b']})")
+            if counts['not_in_gstr2b']:
+                show_result_page(results, 'not_in_gstr2b', 'not_in_gstr2b')
                 
-                csv = results['not_in_gstr2b'].to_csv(index=False)
-                st.download_button("📥 Download Not in GSTR2B", csv, "not_in_gstr2b.csv", "text/csv")
+                if st.button("📄 Prepare CSV", key="not_in_gstr2b_csv"):
+                    st.download_button("📥 Download Not in GSTR2B", result_csv(results, 'not_in_gstr2b'), "not_in_gstr2b.csv", "text/csv")
             else:
                 st.info("All purchase records found in GSTR2B")
         
         with tab3:
-            st.subheader(f"Not in Books ({len(results['not_in_books'])})")
-            if not results['not_in_books'].empty:
-                st.dataframe(results['not_in_books'], use_container_width=True)
+            st.subheader(f"Not in Books ({counts['not_in_books']})")
+            if counts['not_in_books']:
+                show_result_page(results, 'not_in_books', 'not_in_books')
                 
-                csv = results['not_in_books'].to_csv(index=False)
-                st.download_button("📥 Download Not in Books", csv, "not_in_books.csv", "text/csv")
+                if st.button("📄 Prepare CSV", key="not_in_books_csv"):
+                    st.download_button("📥 Download Not in Books", result_csv(results, 'not_in_books'), "not_in_books.csv", "text/csv")
             else:
                 st.info("All GSTR2B records found in books")
         
         # Export all results
         if st.button("📤 Export Complete Report to Excel"):
-            output = io.BytesIO()
-            with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                results['matched'].to_excel(writer, sheet_name='Matched', index=False)
-                results['not_in_gstr2b'].to_excel(writer, sheet_name='Not_in_GSTR2B', index=False)
-                results['not_in_books'].to_excel(writer, sheet_name='Not_in_Books', index=False)
-            
-            st.download_button(
-                label="📥 Download Complete Excel Report",
-                data=output.getvalue(),
-                file_name="GST_Reconciliation_Report.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
+            # Report rows are derived a block at a time as each sheet is written
+            workbook_download("📥 Download Complete Excel Report",
+                              [results.export_sheet('Matched', 'matched'),
+                               results.export_sheet('Not_in_GSTR2B', 'not_in_gstr2b'),
+                               results.export_sheet('Not_in_Books', 'not_in_books')],
+                              "GST_Reconciliation_Report.xlsx")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file